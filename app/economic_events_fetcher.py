@@ -1,7 +1,7 @@
 import requests
 from datetime import datetime
 import os
-from main import EconomicEvent, db
+from main import EconomicEvent, db, bump_registry_version
 
 # Correction du chemin de la base de données pour utiliser un chemin absolu
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -16,6 +16,7 @@ def fetch_economic_events():
         response.raise_for_status()
         events = response.json()
 
+        added = 0
         for event in events:
             existing_event = EconomicEvent.query.filter_by(title=event['title'], date=event['date']).first()
             if not existing_event:
@@ -27,7 +28,10 @@ def fetch_economic_events():
                     description=event.get('description', '')
                 )
                 db.session.add(new_event)
+                added += 1
 
+        if added:
+            bump_registry_version('economic_events')
         db.session.commit()
         print("Mise à jour des annonces économiques réussie.")
     except Exception as e:
@@ -6,3 +6,26 @@ class Config:
     basedir = os.path.abspath(os.path.dirname(__file__))
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(basedir, "instance", "trading_journal.db")}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Attente maximale d'un verrou d'écriture SQLite (secondes) : les imports et synchronisations
+    # parallèles se succèdent sur la base au lieu d'échouer en "database is locked"
+    SQLITE_BUSY_TIMEOUT = 30
+    SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT}}
+    # Backend d'agrégation du dashboard : "materialized", "sql" ou "python"
+    DASHBOARD_STATS_BACKEND = os.environ.get('DASHBOARD_STATS_BACKEND', 'materialized')
+    # Cache LRU des statistiques de dashboard (par processus)
+    STATS_CACHE_MAX_ENTRIES = 5000
+    STATS_CACHE_MAX_BYTES = 32 * 1024 * 1024
+    # Historique des taux de change : fichiers CSV (date,base,quote,rate) de ce dossier
+    FX_RATES_DIR = os.environ.get('FX_RATES_DIR', os.path.join(basedir, 'data', 'fx_rates'))
+    # Délai minimal entre deux vérifications de la version du registre des instruments (secondes)
+    INSTRUMENT_REGISTRY_CHECK_SECONDS = 5
+    # Synchronisation des plateformes liées : un dossier de dépôt de relevés par lien
+    # (<PLATFORM_SYNC_DIR>/<plateforme>/<identifiant>), lus en parallèle par un pool borné
+    PLATFORM_SYNC_DIR = os.environ.get('PLATFORM_SYNC_DIR', os.path.join(basedir, 'data', 'platform_sync'))
+    PLATFORM_SYNC_WORKERS = 8
+    PLATFORM_SYNC_INTERVAL_MINUTES = 5
+    # Bougies d'une minute par instrument (fichiers .npy mappés en mémoire), pour les MAE/MFE des trades
+    OHLC_DATA_DIR = os.environ.get('OHLC_DATA_DIR', os.path.join(basedir, 'data', 'ohlc'))
+    # Simulation Monte Carlo du risque de ruine : trajectoires par simulation et processus de calcul (None = un par cœur)
+    RISK_SIMULATION_PATHS = 20000
+    RISK_SIMULATION_WORKERS = None
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Budget de points par défaut d'une série de graphique, et maximum accepté
+DEFAULT_POINTS = 1500
+MAX_POINTS = 5000
+
+
+def lttb(x, y, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets : indices des points conservés pour tracer une série en threshold points.
+
+    Le premier et le dernier point sont conservés ; les autres sont répartis en threshold - 2 tranches
+    dont on garde le point formant le plus grand triangle avec le point retenu dans la tranche précédente
+    et la moyenne de la tranche suivante. Les pics et les creux, qui forment les plus grands triangles,
+    survivent à la réduction.
+
+    Args:
+        x: Abscisses croissantes
+        y: Ordonnées
+        threshold: Nombre de points souhaité (série rendue telle quelle s'il est atteint ou inférieur à 3)
+
+    Returns:
+        np.ndarray: Indices croissants des points conservés
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    count = len(y)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    # Bornes des tranches sur les points intérieurs : tranche i = [edges[i], edges[i + 1])
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.intp)
+    sizes = np.diff(edges)
+    # Moyennes de toutes les tranches en une passe (sommes cumulées)
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    mean_x = np.append((sum_x[edges[1:]] - sum_x[edges[:-1]]) / sizes, x[-1])
+    mean_y = np.append((sum_y[edges[1:]] - sum_y[edges[:-1]]) / sizes, y[-1])
+
+    indices = np.empty(threshold, dtype=np.intp)
+    indices[0], indices[-1] = 0, count - 1
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        ax, ay = x[selected], y[selected]
+        # Double de l'aire du triangle (point retenu, candidat, moyenne de la tranche suivante)
+        area = np.abs((ax - mean_x[bucket + 1]) * (y[start:end] - ay) - (ax - x[start:end]) * (mean_y[bucket + 1] - ay))
+        selected = start + int(area.argmax())
+        indices[bucket + 1] = selected
+    return indices
+
+
+def downsample(x, y, threshold: int, keep=()) -> np.ndarray:
+    """
+    Indices LTTB d'une série, complétés des points qui doivent figurer sur le graphique (keep),
+    par exemple le plus haut et le creux du drawdown maximal.
+    """
+    indices = lttb(x, y, threshold)
+    keep = np.asarray(keep, dtype=np.intp)
+    if not len(keep) or len(indices) == len(y):
+        return indices
+    return np.union1d(indices, keep[(keep >= 0) & (keep < len(y))])
+
+
+def drawdown_extremes(equity) -> tuple[int, int]:
+    """Indices du plus haut et du creux du drawdown maximal d'une courbe de solde."""
+    equity = np.asarray(equity, dtype=float)
+    if not len(equity):
+        return 0, 0
+    trough = int(np.argmax(np.maximum.accumulate(equity) - equity))
+    peak = int(np.argmax(equity[:trough + 1]))
+    return peak, trough
+
+
+def point_budget(value, default: int = DEFAULT_POINTS) -> int:
+    """Budget de points demandé, borné à [3, MAX_POINTS] (default si absent ou invalide)."""
+    try:
+        points = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(points, 3), MAX_POINTS)
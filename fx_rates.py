@@ -0,0 +1,137 @@
+import csv
+import glob
+import os
+from bisect import bisect_right
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Formats de date acceptés dans les fichiers CSV de taux
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d')
+
+
+def to_epoch(value) -> float:
+    """Convertit une date (naïve = UTC) en timestamp Unix ; None devient NaN."""
+    if value is None:
+        return float('nan')
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def parse_rate_date(value: str) -> datetime:
+    """
+    Lit la date d'une ligne de taux.
+
+    Raises:
+        ValueError: Si la date ne correspond à aucun format de DATE_FORMATS
+    """
+    value = value.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Date de taux invalide : {value}")
+
+
+class FxRateStore:
+    """
+    Historique des taux de change, une série triée par paire (devise source, devise cible).
+
+    Le taux retenu pour une date est le dernier connu à cette date (as-of) ;
+    une paire absente est résolue par son inverse si celui-ci est chargé.
+    """
+
+    def __init__(self):
+        self._series = {}  # (source, cible) -> (timestamps triés, taux)
+
+    def add_series(self, base: str, quote: str, timestamps, rates) -> None:
+        """Enregistre (ou remplace) la série d'une paire ; les points sont triés par date."""
+        timestamps = np.asarray(timestamps, dtype=float)
+        rates = np.asarray(rates, dtype=float)
+        order = np.argsort(timestamps, kind='stable')
+        self._series[(base, quote)] = (timestamps[order], rates[order])
+
+    @classmethod
+    def from_rows(cls, rows) -> 'FxRateStore':
+        """Construit l'historique à partir de lignes (date, source, cible, taux)."""
+        points = {}
+        for date, base, quote, rate in rows:
+            points.setdefault((base.strip().upper(), quote.strip().upper()), []).append(
+                (to_epoch(parse_rate_date(date) if isinstance(date, str) else date), float(rate))
+            )
+        store = cls()
+        for (base, quote), values in points.items():
+            timestamps, rates = zip(*values)
+            store.add_series(base, quote, timestamps, rates)
+        return store
+
+    @classmethod
+    def from_directory(cls, directory: str) -> 'FxRateStore':
+        """
+        Charge tous les fichiers CSV d'un dossier (colonnes date, base, quote, rate).
+
+        Un dossier absent donne un historique vide.
+        """
+        rows = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    rows.append((row['date'], row['base'], row['quote'], row['rate']))
+        return cls.from_rows(rows)
+
+    @property
+    def pairs(self) -> list[tuple[str, str]]:
+        return sorted(self._series)
+
+    def __len__(self):
+        return sum(len(timestamps) for timestamps, _ in self._series.values())
+
+    def _lookup_series(self, base: str, quote: str):
+        """Série directe de la paire, ou série inverse (taux inversés), ou None."""
+        if (base, quote) in self._series:
+            return self._series[(base, quote)], False
+        if (quote, base) in self._series:
+            return self._series[(quote, base)], True
+        return None, False
+
+    def rate_at(self, base: str, quote: str, when, default: float | None = None) -> float | None:
+        """
+        Taux de la paire au moment donné (dernier point à cette date ou avant).
+
+        Args:
+            when: datetime (naïve = UTC) ou timestamp Unix
+            default: Valeur retournée sans point connu à cette date
+        """
+        if base == quote:
+            return 1.0
+        series, inverse = self._lookup_series(base, quote)
+        if series is None:
+            return default
+        timestamps, rates = series
+        position = bisect_right(timestamps, when if isinstance(when, (int, float)) else to_epoch(when)) - 1
+        if position < 0:
+            return default
+        rate = float(rates[position])
+        return 1.0 / rate if inverse else rate
+
+    def rates_at(self, base: str, quote: str, timestamps, default: float = np.nan) -> np.ndarray:
+        """
+        Version vectorisée de rate_at : une recherche dichotomique par date, en une passe.
+
+        Les dates manquantes (NaN) ou antérieures au premier point prennent la valeur default.
+        """
+        timestamps = np.asarray(timestamps, dtype=float)
+        if base == quote:
+            return np.ones(len(timestamps))
+        result = np.full(len(timestamps), default, dtype=float)
+        series, inverse = self._lookup_series(base, quote)
+        if series is None:
+            return result
+        known, rates = series
+        positions = np.searchsorted(known, timestamps, side='right') - 1
+        found = (positions >= 0) & ~np.isnan(timestamps)
+        values = rates[positions[found]]
+        result[found] = 1.0 / values if inverse else values
+        return result
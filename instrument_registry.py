@@ -0,0 +1,87 @@
+import threading
+import time
+
+# Types d'instruments et caractéristiques requises pour chacun (format de predefined_instruments)
+INSTRUMENT_FIELDS = {
+    'forex': ('pip_value',),
+    'stock': ('multiplier',),
+    'futures': ('contract_size', 'point_value'),
+    'commodity': ('contract_size',),
+}
+
+
+def instrument_spec(type_: str, currency: str, **values) -> dict:
+    """
+    Construit la description d'un instrument au format de predefined_instruments.
+
+    Raises:
+        ValueError: Si le type est inconnu ou qu'une caractéristique requise manque
+    """
+    if type_ not in INSTRUMENT_FIELDS:
+        raise ValueError(f"Type d'instrument inconnu : {type_}")
+    spec = {'type': type_}
+    # Pour le forex la devise est celle de cotation (deuxième devise de la paire)
+    spec['quote_currency' if type_ == 'forex' else 'currency'] = currency
+    for field in INSTRUMENT_FIELDS[type_]:
+        if values.get(field) is None:
+            raise ValueError(f"Caractéristique manquante pour un instrument {type_} : {field}")
+        spec[field] = values[field]
+    return spec
+
+
+class InstrumentRegistry:
+    """
+    Copie en mémoire des instruments, rechargée seulement quand leur version change.
+
+    La version est relue au plus une fois par check_interval secondes : entre deux vérifications,
+    les recherches sont de simples accès à un dict.
+    """
+
+    def __init__(self, load_version, load_instruments, check_interval: float = 5.0, clock=time.monotonic):
+        """
+        Args:
+            load_version: Fonction retournant la version courante des instruments
+            load_instruments: Fonction retournant {symbole: description}
+            check_interval: Délai minimal entre deux lectures de la version (secondes)
+        """
+        self._load_version = load_version
+        self._load_instruments = load_instruments
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._instruments = {}
+        self._version = None
+        self._checked_at = None
+        self.reloads = 0
+
+    def refresh(self, force: bool = False) -> None:
+        """Recharge les instruments si leur version a changé depuis le dernier chargement."""
+        now = self._clock()
+        if not force and self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            version = self._load_version()
+            if version != self._version or self._checked_at is None:
+                self._instruments = self._load_instruments()
+                self._version = version
+                self.reloads += 1
+            self._checked_at = now
+
+    def invalidate(self) -> None:
+        """Force une vérification de version au prochain accès (après une modification locale)."""
+        self._checked_at = None
+
+    def instruments(self) -> dict:
+        """Instruments à jour, {symbole: description}."""
+        self.refresh()
+        return self._instruments
+
+    def get(self, symbol: str) -> dict | None:
+        return self.instruments().get(symbol)
+
+    def __contains__(self, symbol):
+        return symbol in self.instruments()
+
+    @property
+    def version(self):
+        return self._version
@@ -0,0 +1,311 @@
+from typing import NamedTuple
+
+import numpy as np
+
+# Trades clôturés d'un journal, dans l'ordre de clôture ; les dates sont des timestamps Unix
+_SQL_CLOSED_TRADES = """
+    SELECT resultat,
+           CAST(strftime('%s', date_debut) AS INTEGER),
+           CAST(strftime('%s', date_fin) AS INTEGER),
+           lot,
+           mae,
+           mfe
+    FROM trades
+    WHERE journal_id = ? AND statut = 'TERMINE' AND resultat IS NOT NULL
+    ORDER BY COALESCE(date_fin, date_debut), id
+"""
+
+
+class JournalArrays(NamedTuple):
+    """Colonnes contiguës des trades clôturés d'un journal."""
+    resultat: np.ndarray
+    date_debut: np.ndarray
+    date_fin: np.ndarray
+    lot: np.ndarray
+    mae: np.ndarray  # NaN tant que les excursions du trade n'ont pas été calculées
+    mfe: np.ndarray
+
+    def __len__(self):
+        return len(self.resultat)
+
+
+def arrays_from_rows(rows) -> JournalArrays:
+    """
+    Construit les tableaux à partir de lignes (resultat, date_debut, date_fin, lot, mae, mfe).
+
+    Les dates sont des timestamps Unix ; les valeurs manquantes deviennent NaN.
+    """
+    width = len(JournalArrays._fields)
+    data = np.array(rows, dtype=float).reshape(-1, width)
+    return JournalArrays(*(np.ascontiguousarray(data[:, i]) for i in range(width)))
+
+
+def load_journal_arrays(conn, journal_id: int) -> JournalArrays:
+    """
+    Charge en une seule requête les trades clôturés d'un journal.
+
+    Args:
+        conn: Connexion sqlite3 (voir get_db_connection)
+        journal_id: Identifiant du journal
+    """
+    return arrays_from_rows(conn.execute(_SQL_CLOSED_TRADES, (journal_id,)).fetchall())
+
+
+def equity_curve(capital_initial: float, resultat: np.ndarray) -> np.ndarray:
+    """Solde après chaque trade, précédé du capital initial (longueur n + 1)."""
+    equity = np.empty(len(resultat) + 1)
+    equity[0] = capital_initial
+    np.cumsum(resultat, out=equity[1:])
+    equity[1:] += capital_initial
+    return equity
+
+
+def drawdown(equity: np.ndarray) -> tuple[np.ndarray, float, float]:
+    """
+    Drawdown courant par rapport au plus haut historique du solde.
+
+    Returns:
+        tuple: (drawdown courant (<= 0), drawdown maximal en montant, drawdown maximal en %)
+    """
+    running_max = np.maximum.accumulate(equity)
+    current = equity - running_max
+    if not len(equity):
+        return current, 0.0, 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(running_max > 0, -current / running_max, 0.0)
+    return current, float(-current.min()), float(pct.max() * 100)
+
+
+def profit_factor(resultat: np.ndarray) -> float | None:
+    """Somme des gains divisée par la somme des pertes (None s'il n'y a aucune perte)."""
+    gains = resultat[resultat > 0].sum()
+    losses = -resultat[resultat < 0].sum()
+    if losses == 0:
+        return None
+    return float(gains / losses)
+
+
+def expectancy(resultat: np.ndarray) -> float:
+    """Espérance par trade (taux de réussite x gain moyen - taux d'échec x perte moyenne, soit la moyenne des résultats)."""
+    return float(resultat.mean()) if len(resultat) else 0.0
+
+
+def trade_returns(capital_initial: float, resultat: np.ndarray) -> np.ndarray:
+    """Rendement de chaque trade rapporté au solde avant son ouverture."""
+    before = equity_curve(capital_initial, resultat)[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(before > 0, resultat / before, 0.0)
+
+
+def sharpe_ratio(returns: np.ndarray) -> float:
+    """Ratio de Sharpe par trade (non annualisé, taux sans risque nul)."""
+    if len(returns) < 2:
+        return 0.0
+    std = returns.std(ddof=1)
+    return float(returns.mean() / std) if std > 0 else 0.0
+
+
+def sortino_ratio(returns: np.ndarray) -> float:
+    """Ratio de Sortino par trade : seule la volatilité des rendements négatifs est pénalisée."""
+    if len(returns) < 2:
+        return 0.0
+    downside = np.sqrt(np.mean(np.minimum(returns, 0) ** 2))
+    return float(returns.mean() / downside) if downside > 0 else 0.0
+
+
+def average_holding_time(date_debut: np.ndarray, date_fin: np.ndarray) -> float:
+    """Durée moyenne de détention en secondes (trades aux dates renseignées uniquement)."""
+    durations = date_fin - date_debut
+    durations = durations[~np.isnan(durations) & (durations >= 0)]
+    return float(durations.mean()) if len(durations) else 0.0
+
+
+def excursion_stats(resultat: np.ndarray, mae: np.ndarray, mfe: np.ndarray) -> dict:
+    """
+    Moyennes des excursions maximales sur les trades où elles sont connues.
+
+    L'efficacité de sortie est la part moyenne du gain latent maximal (MFE) effectivement encaissée
+    par les trades gagnants.
+
+    Returns:
+        dict: Nombre de trades mesurés, MAE et MFE moyennes, efficacité de sortie (% ou None)
+    """
+    known = ~np.isnan(mae) & ~np.isnan(mfe)
+    winners = known & (resultat > 0) & (mfe > 0)
+    return {
+        'excursion_trades': int(known.sum()),
+        'avg_mae': float(mae[known].mean()) if known.any() else 0.0,
+        'avg_mfe': float(mfe[known].mean()) if known.any() else 0.0,
+        'exit_efficiency': float(np.mean(resultat[winners] / mfe[winners]) * 100) if winners.any() else None,
+    }
+
+
+def streaks(resultat: np.ndarray) -> tuple[int, int]:
+    """
+    Plus longues séries de trades gagnants et perdants consécutifs.
+
+    Un trade à résultat nul interrompt les deux séries.
+    """
+    if not len(resultat):
+        return 0, 0
+    outcome = np.sign(resultat)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(outcome)) + 1))
+    lengths = np.diff(np.concatenate((starts, [len(outcome)])))
+    values = outcome[starts]
+    max_win = lengths[values > 0].max(initial=0)
+    max_loss = lengths[values < 0].max(initial=0)
+    return int(max_win), int(max_loss)
+
+
+def compute_journal_metrics(capital_initial: float, arrays: JournalArrays) -> dict:
+    """
+    Calcule les indicateurs avancés d'un journal en passes vectorisées.
+
+    Returns:
+        dict: Solde final, drawdown, profit factor, espérance, Sharpe/Sortino,
+              durée moyenne de détention (heures), séries de gains/pertes et excursions (MAE/MFE)
+    """
+    resultat = arrays.resultat
+    equity = equity_curve(capital_initial, resultat)
+    _, max_drawdown, max_drawdown_pct = drawdown(equity)
+    returns = trade_returns(capital_initial, resultat)
+    pf = profit_factor(resultat)
+    max_win_streak, max_loss_streak = streaks(resultat)
+    excursions = excursion_stats(resultat, arrays.mae, arrays.mfe)
+    return {
+        'closed_trades': len(resultat),
+        'final_equity': round(float(equity[-1]), 2),
+        'max_drawdown': round(max_drawdown, 2),
+        'max_drawdown_pct': round(max_drawdown_pct, 2),
+        'profit_factor': round(pf, 2) if pf is not None else None,
+        'expectancy': round(expectancy(resultat), 2),
+        'sharpe_ratio': round(sharpe_ratio(returns), 3),
+        'sortino_ratio': round(sortino_ratio(returns), 3),
+        'avg_holding_hours': round(average_holding_time(arrays.date_debut, arrays.date_fin) / 3600, 2),
+        'max_win_streak': max_win_streak,
+        'max_loss_streak': max_loss_streak,
+        'excursion_trades': excursions['excursion_trades'],
+        'avg_mae': round(excursions['avg_mae'], 2),
+        'avg_mfe': round(excursions['avg_mfe'], 2),
+        'exit_efficiency': round(excursions['exit_efficiency'], 1) if excursions['exit_efficiency'] is not None else None,
+    }
+
+
+# Résultat des trades clôturés d'un utilisateur par jour de clôture et par instrument
+_SQL_DAILY_INSTRUMENT_PNL = """
+    SELECT date(trades.date_fin) AS day, trades.instrument, SUM(trades.resultat), COUNT(*)
+    FROM trades JOIN journals ON journals.id = trades.journal_id
+    WHERE journals.user_id = ? AND trades.statut = 'TERMINE'
+      AND trades.resultat IS NOT NULL AND trades.date_fin IS NOT NULL
+"""
+
+
+class DailyPnl(NamedTuple):
+    """Matrice dense des résultats journaliers : une ligne par jour de trading, une colonne par instrument."""
+    days: list
+    instruments: list
+    pnl: np.ndarray
+    trade_counts: np.ndarray  # Trades clôturés par instrument
+
+
+def daily_pnl_matrix(rows) -> DailyPnl:
+    """
+    Répartit des lignes (jour, instrument, résultat, nombre de trades) dans une matrice jours x instruments.
+
+    Seuls les jours où au moins un trade a été clôturé forment une ligne ; un instrument sans trade
+    ce jour-là y vaut 0.
+    """
+    if not rows:
+        return DailyPnl([], [], np.zeros((0, 0)), np.zeros(0, dtype=np.int64))
+    days, instruments, resultat, counts = zip(*rows)
+    day_labels, day_index = np.unique(np.asarray(days, dtype=str), return_inverse=True)
+    instrument_labels, instrument_index = np.unique(np.asarray(instruments, dtype=str), return_inverse=True)
+    pnl = np.zeros((len(day_labels), len(instrument_labels)))
+    np.add.at(pnl, (day_index, instrument_index), np.asarray(resultat, dtype=float))
+    trade_counts = np.bincount(instrument_index, weights=counts, minlength=len(instrument_labels)).astype(np.int64)
+    return DailyPnl(day_labels.tolist(), instrument_labels.tolist(), pnl, trade_counts)
+
+
+def load_daily_pnl(conn, user_id: int, journal_id: int | None = None) -> DailyPnl:
+    """
+    Charge en une requête agrégée les résultats journaliers par instrument des trades d'un utilisateur.
+
+    Args:
+        conn: Connexion sqlite3 (voir get_db_connection)
+        user_id: Propriétaire des journaux
+        journal_id: Restreint l'analyse à un journal
+    """
+    sql, params = _SQL_DAILY_INSTRUMENT_PNL, [user_id]
+    if journal_id is not None:
+        sql += " AND trades.journal_id = ?"
+        params.append(journal_id)
+    sql += " GROUP BY day, trades.instrument"
+    return daily_pnl_matrix(conn.execute(sql, params).fetchall())
+
+
+def most_traded(daily: DailyPnl, limit: int) -> DailyPnl:
+    """Restreint la matrice aux limit instruments les plus tradés (les jours sans aucun trade restant sont retirés)."""
+    if len(daily.instruments) <= limit:
+        return daily
+    keep = np.sort(np.argsort(-daily.trade_counts, kind='stable')[:limit])
+    pnl = daily.pnl[:, keep]
+    active = (pnl != 0).any(axis=1)
+    return DailyPnl([day for day, kept in zip(daily.days, active) if kept],
+                    [daily.instruments[i] for i in keep], pnl[active], daily.trade_counts[keep])
+
+
+def correlation_matrix(pnl: np.ndarray) -> np.ndarray:
+    """
+    Corrélations de Pearson entre les colonnes (instruments) d'une matrice de résultats journaliers.
+
+    NaN pour un instrument dont le résultat ne varie pas (ou avec moins de deux jours) ; 1 sur la diagonale.
+    """
+    count = pnl.shape[1]
+    if pnl.shape[0] < 2:
+        result = np.full((count, count), np.nan)
+    else:
+        centered = pnl - pnl.mean(axis=0)
+        std = np.sqrt((centered ** 2).sum(axis=0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = (centered.T @ centered) / np.outer(std, std)
+        result[:, std == 0] = np.nan
+        result[std == 0, :] = np.nan
+        np.clip(result, -1.0, 1.0, out=result)
+    np.fill_diagonal(result, 1.0)
+    return result
+
+
+def rolling_correlations(pnl: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Corrélations glissantes sur window jours de chaque paire d'instruments (i < j).
+
+    Chaque fenêtre est calculée à partir de sommes cumulées (x, y, x², y², xy) :
+    le coût est proportionnel à jours x paires, quelle que soit la taille de la fenêtre.
+
+    Returns:
+        tuple: (paires, tableau n_paires x 2 d'indices de colonnes ;
+                corrélations, tableau n_paires x (jours - window + 1), NaN sans variation sur la fenêtre)
+    """
+    days, count = pnl.shape
+    pairs = np.array(np.triu_indices(count, k=1)).T.reshape(-1, 2)
+    if window < 2 or days < window or not len(pairs):
+        return pairs, np.empty((len(pairs), 0))
+    # Centrage global : réduit les erreurs d'arrondi des sommes cumulées sans changer les corrélations
+    centered = pnl - pnl.mean(axis=0)
+
+    def window_sums(values):
+        cumulative = np.concatenate((np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)))
+        return cumulative[window:] - cumulative[:-window]
+
+    sum_x = window_sums(centered)
+    sum_x2 = window_sums(centered ** 2)
+    x, y = pairs[:, 0], pairs[:, 1]
+    sum_xy = window_sums(centered[:, x] * centered[:, y])
+    covariance = sum_xy - sum_x[:, x] * sum_x[:, y] / window
+    variance = sum_x2 - sum_x ** 2 / window
+    variance[variance < 1e-9 * np.maximum(sum_x2, 1e-300)] = 0.0  # Fenêtre sans variation (aux arrondis près)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlations = covariance / np.sqrt(variance[:, x] * variance[:, y])
+    correlations[~np.isfinite(correlations)] = np.nan
+    np.clip(correlations, -1.0, 1.0, out=correlations)
+    return pairs, np.ascontiguousarray(correlations.T)
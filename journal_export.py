@@ -0,0 +1,142 @@
+import csv
+import io
+from datetime import datetime
+from itertools import islice
+
+# Parquet (via pyarrow) est facultatif : sans lui seul l'export CSV est proposé
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _HAS_PYARROW = True
+except Exception:
+    _HAS_PYARROW = False
+
+EXPORT_FORMATS = ('csv', 'parquet')
+EXPORT_MIMETYPES = {'csv': 'text/csv; charset=utf-8', 'parquet': 'application/vnd.apache.parquet'}
+
+# Colonnes exportées par jeu de données : (nom, type) avec type "int", "float", "str" ou "datetime"
+EXPORT_DATASETS = {
+    'trades': (
+        ('id', 'int'), ('journal_id', 'int'), ('numero_ordre', 'int'), ('date_debut', 'datetime'),
+        ('date_fin', 'datetime'), ('session', 'str'), ('instrument', 'str'), ('position', 'str'),
+        ('prix_entree', 'float'), ('prix_sortie', 'float'), ('lot', 'float'), ('risk_reward', 'str'),
+        ('time_frame', 'str'), ('resultat', 'float'), ('pourcentage', 'float'), ('statut', 'str'),
+        ('tags', 'str'), ('commentaires', 'str'), ('date_enregistrement', 'datetime'),
+    ),
+    'analyses': (
+        ('id', 'int'), ('journal_id', 'int'), ('titre', 'str'), ('contenu', 'str'), ('image', 'str'),
+        ('date_creation', 'datetime'),
+    ),
+    'reflections': (
+        ('id', 'int'), ('trade_id', 'int'), ('emotions', 'str'), ('notes', 'str'),
+        ('lessons_learned', 'str'), ('date_creation', 'datetime'),
+    ),
+}
+
+EXPORT_BATCH_ROWS = 5000
+
+
+def parquet_available() -> bool:
+    return _HAS_PYARROW
+
+
+def column_names(dataset: str) -> list[str]:
+    return [name for name, _ in EXPORT_DATASETS[dataset]]
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def csv_chunks(columns: list[str], rows, batch_rows: int = EXPORT_BATCH_ROWS):
+    """
+    Sérialise des lignes en CSV, morceau par morceau : au plus batch_rows lignes sont en mémoire à la fois.
+
+    Yields:
+        str: En-tête, puis un morceau de CSV par lot de lignes
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, batch_rows))
+        if not batch:
+            return
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+
+
+class _DrainBuffer(io.RawIOBase):
+    """Fichier en écriture seule dont le contenu est vidé à chaque lecture (drain)."""
+
+    def __init__(self):
+        super().__init__()
+        self._data = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._data.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._data)
+        self._data.clear()
+        return data
+
+
+def _arrow_schema(dataset: str):
+    types = {'int': pa.int64(), 'float': pa.float64(), 'str': pa.string(), 'datetime': pa.timestamp('us')}
+    return pa.schema([(name, types[kind]) for name, kind in EXPORT_DATASETS[dataset]])
+
+
+def parquet_chunks(dataset: str, rows, batch_rows: int = EXPORT_BATCH_ROWS):
+    """
+    Sérialise des lignes en Parquet, un groupe de lignes par lot : le fichier est produit au fil de l'eau.
+
+    Raises:
+        RuntimeError: Si pyarrow n'est pas installé
+
+    Yields:
+        bytes: Morceaux successifs du fichier Parquet
+    """
+    if not _HAS_PYARROW:
+        raise RuntimeError("L'export Parquet nécessite pyarrow.")
+    schema = _arrow_schema(dataset)
+    sink = _DrainBuffer()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        iterator = iter(rows)
+        while True:
+            batch = list(islice(iterator, batch_rows))
+            if not batch:
+                break
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_chunks(dataset: str, fmt: str, rows, batch_rows: int = EXPORT_BATCH_ROWS):
+    """Morceaux de l'export d'un jeu de données (EXPORT_DATASETS) au format demandé (EXPORT_FORMATS)."""
+    if fmt == 'parquet':
+        return parquet_chunks(dataset, rows, batch_rows)
+    return (chunk.encode('utf-8') for chunk in csv_chunks(column_names(dataset), rows, batch_rows))
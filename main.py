@@ -1,6 +1,6 @@
 import os
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, flash, session, send_from_directory
+from datetime import datetime, timedelta
+from flask import Flask, render_template, request, redirect, url_for, flash, session, send_from_directory, jsonify, Response, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from flask_paginate import Pagination, get_page_parameter
@@ -9,8 +9,35 @@ from apscheduler.schedulers.background import BackgroundScheduler
 import logging
 import sqlite3
 import atexit
+import multiprocessing
+import time
+import tracemalloc
+import click
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import Counter
+import numpy as np
 from flask_sqlalchemy import SQLAlchemy
 from validators import is_valid_email, is_valid_password, sanitize_string, parse_float, parse_datetime
+from stats_cache import VersionedLRUCache
+from journal_analytics import (load_journal_arrays, compute_journal_metrics, equity_curve, load_daily_pnl, most_traded,
+                               correlation_matrix, rolling_correlations)
+from trade_pivot import pivot_trades, pivot_by
+from pricing import price_trade, price_trades
+from fx_rates import FxRateStore, to_epoch
+from instrument_registry import InstrumentRegistry, INSTRUMENT_FIELDS, instrument_spec
+from trade_import import (StatementFormatError, IMPORT_FORMATS, open_statement, parse_statement,
+                          trade_hash, normalize_symbol, market_session, import_in_chunks, write_imported_trades)
+from trade_close import close_positions
+from journal_export import EXPORT_DATASETS, EXPORT_FORMATS, EXPORT_MIMETYPES, column_names, export_chunks, parquet_available
+from ohlc_store import OhlcStore, price_excursions
+from risk_simulation import run_simulation
+from position_sizing import replay, rule_grid, summarize_curves, sample_curve
+from downsampling import downsample, drawdown_extremes, point_budget
+from news_impact import (DEFAULT_WINDOW_MINUTES, NEWS_CATEGORIES, EventIndex, event_breakdown, instrument_currencies,
+                         is_high_impact, news_breakdown)
+from platform_sync import LinkLocks, link_folder, pending_statements, read_statements, after_watermark, run_bounded
+from trade_stats import split_tags, trade_contribution, empty_aggregate, apply_contribution, aggregate_trades, aggregate_trades_sql, build_dashboard_stats
 
 # Placeholder for fetch_economic_events if not defined elsewhere
 def fetch_economic_events():
@@ -35,7 +62,8 @@ import os
 # Correction du chemin de la base de données pour utiliser un chemin absolu
 basedir = os.path.abspath(os.path.dirname(__file__))
 def get_db_connection():
-    return sqlite3.connect(os.path.join(basedir, 'instance', 'trading_journal.db'))
+    return sqlite3.connect(os.path.join(basedir, 'instance', 'trading_journal.db'),
+                           timeout=app.config['SQLITE_BUSY_TIMEOUT'])
 
 # Exemple de requête brute pour récupérer les analyses
 def get_analyses(journal_id):
@@ -101,17 +129,17 @@ predefined_instruments = {
     "GBP/JPY": {"type": "forex", "pip_value": 1000, "quote_currency": "JPY"},
     "EUR/GBP": {"type": "forex", "pip_value": 10, "quote_currency": "GBP"},
     # Actions
-    "AAPL": {"type": "stock", "multiplier": 1, "currency": "USD"},
-    "TSLA": {"type": "stock", "multiplier": 1, "currency": "USD"},
-    "MSFT": {"type": "stock", "multiplier": 1, "currency": "USD"},
-    "AMZN": {"type": "stock", "multiplier": 1, "currency": "USD"},
-    "GOOGL": {"type": "stock", "multiplier": 1, "currency": "USD"},
-    "FB": {"type": "stock", "multiplier": 1, "currency": "USD"},
+    "AAPL": {"label": "Apple (AAPL)", "type": "stock", "multiplier": 1, "currency": "USD"},
+    "TSLA": {"label": "Tesla (TSLA)", "type": "stock", "multiplier": 1, "currency": "USD"},
+    "MSFT": {"label": "Microsoft (MSFT)", "type": "stock", "multiplier": 1, "currency": "USD"},
+    "AMZN": {"label": "Amazon (AMZN)", "type": "stock", "multiplier": 1, "currency": "USD"},
+    "GOOGL": {"label": "Alphabet (GOOGL)", "type": "stock", "multiplier": 1, "currency": "USD"},
+    "FB": {"label": "Meta (FB)", "type": "stock", "multiplier": 1, "currency": "USD"},
     # Futures
     "CAC40": {"type": "futures", "contract_size": 10, "point_value": 10, "currency": "EUR"},
-    "SP500": {"type": "futures", "contract_size": 5, "point_value": 50, "currency": "USD"},
+    "SP500": {"label": "S&P 500", "type": "futures", "contract_size": 5, "point_value": 50, "currency": "USD"},
     "DAX": {"type": "futures", "contract_size": 25, "point_value": 5, "currency": "EUR"},
-    "FTSE100": {"type": "futures", "contract_size": 10, "point_value": 10, "currency": "GBP"},
+    "FTSE100": {"label": "FTSE 100", "type": "futures", "contract_size": 10, "point_value": 10, "currency": "GBP"},
     # Commodités
     "Pétrole": {"type": "commodity", "contract_size": 100, "currency": "USD"},
     "Or": {"type": "commodity", "contract_size": 100, "currency": "USD"},
@@ -170,6 +198,8 @@ class Journal(db.Model):
     devise = db.Column(db.String(10), nullable=False)
     levier = db.Column(db.Float, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Incrémenté à chaque écriture de trade : sert de clé d'invalidation des caches de statistiques
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     user = db.relationship('User', backref=db.backref('journals', lazy=True))
     trades = db.relationship('Trade', backref='journal', lazy=True)
@@ -179,8 +209,31 @@ class Journal(db.Model):
     def __repr__(self):
         return f"<Journal {self.nom}>"
 
+# Association trade <-> tag ; l'index (tag_id, trade_id) sert les recherches par tag
+trade_tags = db.Table(
+    'trade_tags',
+    db.Column('trade_id', db.Integer, db.ForeignKey('trades.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id'), primary_key=True),
+    db.Index('ix_trade_tags_tag_trade', 'tag_id', 'trade_id')
+)
+
+class Tag(db.Model):
+    __tablename__ = 'tags'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f"<Tag {self.name}>"
+
 class Trade(db.Model):
     __tablename__ = 'trades'
+    __table_args__ = (
+        db.Index('ix_trades_journal_enregistrement', 'journal_id', 'date_enregistrement', 'id'),
+        db.Index('ix_trades_journal_debut', 'journal_id', 'date_debut', 'id'),
+        db.Index('ix_trades_journal_numero_ordre', 'journal_id', 'numero_ordre'),
+        db.Index('uq_trades_journal_import_hash', 'journal_id', 'import_hash', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     date_debut = db.Column(db.DateTime, nullable=False)
@@ -201,8 +254,13 @@ class Trade(db.Model):
     tags = db.Column(db.String(200), nullable=True)
     journal_id = db.Column(db.Integer, db.ForeignKey('journals.id'), nullable=False)
     date_enregistrement = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    numero_ordre = db.Column(db.Integer, nullable=True)  # Rang du trade dans son journal (par date d'enregistrement)
+    import_hash = db.Column(db.String(64), nullable=True)  # Empreinte du contenu pour les trades importés (voir trade_import)
+    mae = db.Column(db.Float, nullable=True)  # Excursion défavorable maximale (<= 0, devise du journal), voir ohlc_store
+    mfe = db.Column(db.Float, nullable=True)  # Excursion favorable maximale (>= 0, devise du journal)
 
     reflections = db.relationship('ReflectionEntry', backref='trade', lazy=True)
+    tag_list = db.relationship('Tag', secondary=trade_tags, lazy=True, backref=db.backref('trades', lazy='dynamic'))
 
     def __repr__(self):
         return f"<Trade {self.instrument} - {self.position}>"
@@ -228,6 +286,13 @@ class PlatformLink(db.Model):
     identifiant = db.Column(db.String(100), nullable=False)
     details = db.Column(db.Text, nullable=True)
     journal_id = db.Column(db.Integer, db.ForeignKey('journals.id'), nullable=False)
+    # État de la synchronisation : date du trade le plus récent importé et
+    # date de modification du dernier relevé lu dans le dossier de dépôt
+    sync_watermark = db.Column(db.DateTime, nullable=True)
+    sync_file_mtime = db.Column(db.Float, nullable=True)
+    last_sync_at = db.Column(db.DateTime, nullable=True)
+    last_sync_status = db.Column(db.String(20), nullable=True)
+    last_sync_message = db.Column(db.Text, nullable=True)
 
     def __repr__(self):
         return f"<PlatformLink {self.plateforme}>"
@@ -414,6 +479,100 @@ class Goal(db.Model):
     def __repr__(self):
         return f"<Goal {self.title}"
 
+class JournalStats(db.Model):
+    __tablename__ = 'journal_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    journal_id = db.Column(db.Integer, db.ForeignKey('journals.id'), nullable=False, unique=True)
+    trade_count = db.Column(db.Integer, default=0)
+    win_count = db.Column(db.Integer, default=0)
+    total_result = db.Column(db.Float, default=0)
+    total_profit = db.Column(db.Float, default=0)
+    total_loss = db.Column(db.Float, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<JournalStats {self.journal_id}>"
+
+class JournalStatsBucket(db.Model):
+    __tablename__ = 'journal_stats_buckets'
+    __table_args__ = (db.UniqueConstraint('journal_id', 'dimension', 'bucket', name='uq_journal_stats_buckets_key'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    journal_id = db.Column(db.Integer, db.ForeignKey('journals.id'), nullable=False)
+    dimension = db.Column(db.String(10), nullable=False)  # "month", "symbol", "hour" ou "tag"
+    bucket = db.Column(db.String(200), nullable=False)
+    trade_count = db.Column(db.Integer, default=0)
+    win_count = db.Column(db.Integer, default=0)
+    total_result = db.Column(db.Float, default=0)
+
+    def __repr__(self):
+        return f"<JournalStatsBucket {self.journal_id} {self.dimension}={self.bucket}>"
+
+class LeaderboardSnapshot(db.Model):
+    __tablename__ = 'leaderboard_snapshots'
+    __table_args__ = (db.Index('ix_leaderboard_snapshots_period_rank', 'period', 'rank'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False, default='all')
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    name = db.Column(db.String(101), nullable=False)
+    total_gains = db.Column(db.Float, default=0)
+    total_losses = db.Column(db.Float, default=0)
+    performance = db.Column(db.Float, default=0)
+    rank = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<LeaderboardSnapshot {self.period} {self.rank} - {self.user_id}>"
+
+class LeaderboardDailyTotal(db.Model):
+    __tablename__ = 'leaderboard_daily_totals'
+    __table_args__ = (db.UniqueConstraint('user_id', 'day', name='uq_leaderboard_daily_totals_user_day'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False, index=True)
+    total_gains = db.Column(db.Float, default=0)
+    total_losses = db.Column(db.Float, default=0)
+    trade_count = db.Column(db.Integer, default=0)
+
+    def __repr__(self):
+        return f"<LeaderboardDailyTotal {self.user_id} {self.day}>"
+
+class Instrument(db.Model):
+    __tablename__ = 'instruments'
+
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(50), nullable=False, unique=True)
+    label = db.Column(db.String(100), nullable=True)
+    type = db.Column(db.String(20), nullable=False)  # "forex", "stock", "futures" ou "commodity"
+    currency = db.Column(db.String(10), nullable=False)  # Devise de cotation
+    pip_value = db.Column(db.Float, nullable=True)
+    multiplier = db.Column(db.Float, nullable=True)
+    contract_size = db.Column(db.Float, nullable=True)
+    point_value = db.Column(db.Float, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Description de l'instrument au format de predefined_instruments, avec son libellé."""
+        spec = instrument_spec(self.type, self.currency, pip_value=self.pip_value, multiplier=self.multiplier,
+                               contract_size=self.contract_size, point_value=self.point_value)
+        spec['label'] = self.label or self.symbol
+        return spec
+
+    def __repr__(self):
+        return f"<Instrument {self.symbol}>"
+
+class RegistryVersion(db.Model):
+    __tablename__ = 'registry_versions'
+
+    name = db.Column(db.String(50), primary_key=True)  # Exemple : "instruments"
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<RegistryVersion {self.name} {self.version}>"
+
 # --- ACADEMY ---
 import sqlite3
 
@@ -695,27 +854,131 @@ def home():
         flash("Aucun journal trouvé. Veuillez en créer un.")
         return redirect(url_for('create_journal'))
 
-    total_trades = db.session.query(db.func.count(Trade.id)).join(Journal).filter(Journal.user_id == session['user_id']).scalar() or 0
-    total_gains = db.session.query(db.func.sum(Trade.resultat)).join(Journal).filter(
-        Journal.user_id == session['user_id'], Trade.statut == "TERMINE", Trade.resultat > 0
-    ).scalar() or 0
-    total_losses = db.session.query(db.func.sum(Trade.resultat)).join(Journal).filter(
-        Journal.user_id == session['user_id'], Trade.statut == "TERMINE", Trade.resultat < 0
-    ).scalar() or 0
-    win_rate = (
-        db.session.query(db.func.count(Trade.id)).join(Journal).filter(
-            Journal.user_id == session['user_id'], Trade.statut == "TERMINE", Trade.resultat > 0
-        ).scalar() / total_trades * 100 if total_trades > 0 else 0
+    stats = get_portfolio_summary(session['user_id'], journals)['totals']
+    return render_template('home.html', journals=journals, stats=stats)
+
+def compute_portfolio_summary(user_id):
+    """
+    Calcule en une seule requête (agrégation conditionnelle) le résumé de chaque journal d'un utilisateur et le total.
+
+    :param user_id: Identifiant de l'utilisateur
+    :return: {'journals': [...], 'totals': {...}} avec nombre de trades, gains, pertes et taux de réussite
+    """
+    closed = Trade.statut == "TERMINE"
+    rows = db.session.query(
+        Journal.id, Journal.nom,
+        db.func.count(Trade.id).label('total_trades'),
+        db.func.coalesce(db.func.sum(db.case((db.and_(closed, Trade.resultat > 0), Trade.resultat), else_=0)), 0).label('total_gains'),
+        db.func.coalesce(db.func.sum(db.case((db.and_(closed, Trade.resultat < 0), Trade.resultat), else_=0)), 0).label('total_losses'),
+        db.func.coalesce(db.func.sum(db.case((db.and_(closed, Trade.resultat > 0), 1), else_=0)), 0).label('wins')
+    ).outerjoin(Trade, Trade.journal_id == Journal.id).filter(
+        Journal.user_id == user_id
+    ).group_by(Journal.id).order_by(Journal.id.asc()).all()
+
+    def summarize(total_trades, total_gains, total_losses, wins):
+        return {
+            "total_trades": total_trades,
+            "total_gains": round(total_gains, 2),
+            "total_losses": round(abs(total_losses), 2),
+            "win_rate": round(wins / total_trades * 100 if total_trades > 0 else 0, 2),
+        }
+
+    journals = [
+        dict(summarize(row.total_trades, row.total_gains, row.total_losses, row.wins), journal_id=row.id, nom=row.nom)
+        for row in rows
+    ]
+    totals = summarize(
+        sum(row.total_trades for row in rows),
+        sum(row.total_gains for row in rows),
+        sum(row.total_losses for row in rows),
+        sum(row.wins for row in rows)
     )
+    return {'journals': journals, 'totals': totals}
+
+def get_portfolio_summary(user_id, journals=None):
+    """
+    Résumé du portefeuille d'un utilisateur, servi depuis le cache tant qu'aucun journal n'a changé.
+
+    :param user_id: Identifiant de l'utilisateur
+    :param journals: Journaux de l'utilisateur déjà chargés (évite une requête)
+    """
+    if journals is None:
+        journals = db.session.query(Journal.id, Journal.data_version).filter_by(user_id=user_id).all()
+    # Les versions des journaux suffisent à savoir si le résumé en cache est à jour
+    versions = tuple((journal.id, journal.data_version) for journal in journals)
+    return stats_cache.get_or_compute('portfolio', user_id, versions, lambda: compute_portfolio_summary(user_id))
+
+@app.route('/api/portfolio_summary')
+def api_portfolio_summary():
+    if 'user_id' not in session:
+        return jsonify({'error': "Authentification requise."}), 401
+    return jsonify(get_portfolio_summary(session['user_id']))
+
+CORRELATION_MAX_INSTRUMENTS = 12
+CORRELATION_DEFAULT_WINDOW = 20  # Jours de trading de la fenêtre des corrélations glissantes
+
+def _rounded(values):
+    """Valeurs arrondies pour le JSON (NaN devient None)."""
+    return [None if np.isnan(value) else round(float(value), 4) for value in values]
+
+def compute_pnl_correlations(user_id, journal_id=None, window=CORRELATION_DEFAULT_WINDOW):
+    """
+    Corrélations des résultats journaliers entre instruments (journal_analytics.correlation_matrix),
+    et corrélations glissantes de chaque paire sur window jours de trading (window None : pas de séries glissantes).
 
-    stats = {
-        "total_trades": total_trades,
-        "total_gains": round(total_gains, 2),
-        "total_losses": round(abs(total_losses), 2),
-        "win_rate": round(win_rate, 2),
+    Seuls les CORRELATION_MAX_INSTRUMENTS instruments les plus tradés sont comparés.
+    """
+    conn = get_db_connection()
+    try:
+        daily = most_traded(load_daily_pnl(conn, user_id, journal_id), CORRELATION_MAX_INSTRUMENTS)
+    finally:
+        conn.close()
+    result = {
+        'instruments': daily.instruments,
+        'trade_counts': daily.trade_counts.tolist(),
+        'days': len(daily.days),
+        'matrix': [_rounded(row) for row in correlation_matrix(daily.pnl)],
     }
+    if window is None:
+        return result
+    pairs, rolling = rolling_correlations(daily.pnl, window)
+    result['rolling'] = {
+        'window': window,
+        'dates': daily.days[window - 1:] if rolling.shape[1] else [],
+        'pairs': [
+            {'instruments': [daily.instruments[a], daily.instruments[b]], 'correlation': _rounded(values)}
+            for (a, b), values in zip(pairs.tolist(), rolling)
+        ],
+    }
+    return result
 
-    return render_template('home.html', journals=journals, stats=stats)
+@app.route('/api/correlations')
+def api_correlations():
+    """
+    Corrélations des résultats journaliers par instrument, sur tous les journaux de l'utilisateur
+    ou sur celui de journal_id ; mises en cache tant qu'aucun de ces journaux n'a changé.
+    ?rolling=0 ne calcule (ni n'envoie) que la matrice, sans les corrélations glissantes.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': "Authentification requise."}), 401
+    user_id = session['user_id']
+    journals = db.session.query(Journal.id, Journal.data_version).filter_by(user_id=user_id)
+    journal_id = request.args.get('journal_id', type=int)
+    if journal_id is not None:
+        journals = journals.filter_by(id=journal_id)
+    journals = journals.all()
+    if journal_id is not None and not journals:
+        return jsonify({'error': "Journal introuvable."}), 404
+    window = request.args.get('window', CORRELATION_DEFAULT_WINDOW, type=int)
+    if window < 2:
+        return jsonify({'error': "La fenêtre doit compter au moins 2 jours."}), 400
+    if request.args.get('rolling', '1') in ('0', 'false', 'non'):
+        window = None
+    versions = tuple((journal.id, journal.data_version) for journal in journals)
+    return jsonify(stats_cache.get_or_compute(
+        f'correlations:{journal_id or ""}:{window or ""}', user_id, versions,
+        lambda: compute_pnl_correlations(user_id, journal_id, window)
+    ))
 
 @app.route('/create_journal', methods=['GET', 'POST'])
 def create_journal():
@@ -745,151 +1008,818 @@ def create_journal():
         return redirect(url_for('home'))
     return render_template('create_journal.html')
 
+#############################################
+# Statistiques matérialisées par journal
+#############################################
+
+# Cache des statistiques calculées, invalidé par Journal.data_version (un cache par processus)
+stats_cache = VersionedLRUCache(
+    max_entries=app.config.get('STATS_CACHE_MAX_ENTRIES', 5000),
+    max_bytes=app.config.get('STATS_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+)
+
+def registry_version(name):
+    """Version courante d'un registre (0 tant qu'il n'a jamais été modifié)."""
+    row = db.session.get(RegistryVersion, name)
+    return row.version if row else 0
+
+def bump_registry_version(name):
+    """Incrémente la version d'un registre, dans la transaction de la modification."""
+    row = db.session.get(RegistryVersion, name)
+    if row is None:
+        db.session.add(RegistryVersion(name=name, version=1))
+    else:
+        row.version += 1
+
+def load_instruments():
+    """Instruments de la table, ou predefined_instruments tant que la table est vide."""
+    instruments = {instrument.symbol: instrument.to_dict() for instrument in Instrument.query.all()}
+    return instruments or dict(predefined_instruments)
+
+# Registre des instruments : dict en mémoire, rechargé quand la version "instruments" change
+instrument_registry = InstrumentRegistry(
+    lambda: registry_version('instruments'), load_instruments,
+    check_interval=app.config.get('INSTRUMENT_REGISTRY_CHECK_SECONDS', 5)
+)
+
+INSTRUMENT_GROUP_LABELS = {'forex': "Forex", 'stock': "Actions", 'futures': "Futures", 'commodity': "Commodités"}
+
+def instrument_choices():
+    """Instruments du registre groupés par type, pour les listes déroulantes : [(groupe, [(symbole, libellé)])]."""
+    groups = {}
+    for symbol, spec in sorted(instrument_registry.instruments().items()):
+        groups.setdefault(spec['type'], []).append((symbol, spec.get('label', symbol)))
+    return [(INSTRUMENT_GROUP_LABELS[type_], groups[type_]) for type_ in INSTRUMENT_FIELDS if type_ in groups]
+
+# Historique des taux de change (fichiers CSV date,base,quote,rate), conversion_rates servant de repli
+fx_rates = FxRateStore.from_directory(app.config.get('FX_RATES_DIR', os.path.join(basedir, 'data', 'fx_rates')))
+
+# Bougies d'une minute par instrument (MAE/MFE des trades), lues par mappage mémoire
+ohlc_store = OhlcStore(app.config.get('OHLC_DATA_DIR', os.path.join(basedir, 'data', 'ohlc')))
+
+def journal_trade_contribution(trade):
+    """Contribution d'un trade aux statistiques matérialisées de son journal."""
+    return trade_contribution(trade.instrument, trade.tags, trade.date_debut, trade.resultat)
+
+def rebuild_journal_stats(journal_id):
+    """
+    Recalcule entièrement les statistiques matérialisées d'un journal à partir de ses trades.
+
+    :param journal_id: Identifiant du journal
+    :return: Agrégat recalculé (format trade_stats.empty_aggregate)
+    """
+    rows = db.session.query(Trade.instrument, Trade.tags, Trade.date_debut, Trade.resultat).filter(
+        Trade.journal_id == journal_id
+    ).yield_per(1000)
+    aggregate = aggregate_trades(rows)
+
+    JournalStatsBucket.query.filter_by(journal_id=journal_id).delete(synchronize_session=False)
+    JournalStats.query.filter_by(journal_id=journal_id).delete(synchronize_session=False)
+    totals = aggregate['totals']
+    db.session.add(JournalStats(
+        journal_id=journal_id,
+        trade_count=totals['count'],
+        win_count=totals['wins'],
+        total_result=totals['total_result'],
+        total_profit=totals['total_profit'],
+        total_loss=totals['total_loss']
+    ))
+    db.session.bulk_insert_mappings(JournalStatsBucket, [
+        {
+            'journal_id': journal_id,
+            'dimension': dimension,
+            'bucket': key,
+            'trade_count': bucket['count'],
+            'win_count': bucket['wins'],
+            'total_result': bucket['total_result']
+        }
+        for dimension, buckets in aggregate['buckets'].items()
+        for key, bucket in buckets.items()
+    ])
+    return aggregate
+
+def _apply_journal_stats(stats, contribution, sign):
+    result = contribution['result']
+    stats.trade_count += sign
+    stats.win_count += sign if contribution['win'] else 0
+    stats.total_result += sign * result
+    if result > 0:
+        stats.total_profit += sign * result
+    elif result < 0:
+        stats.total_loss += sign * -result
+
+    for dimension, key in contribution['buckets']:
+        bucket = JournalStatsBucket.query.filter_by(journal_id=stats.journal_id, dimension=dimension, bucket=key).first()
+        if bucket is None:
+            if sign < 0:
+                continue  # Décompte écarté en amont par _journal_stats_drifted (recalcul complet)
+            bucket = JournalStatsBucket(journal_id=stats.journal_id, dimension=dimension, bucket=key,
+                                        trade_count=0, win_count=0, total_result=0)
+            db.session.add(bucket)
+        bucket.trade_count += sign
+        bucket.win_count += sign if contribution['win'] else 0
+        bucket.total_result += sign * result
+        if bucket.trade_count <= 0:
+            db.session.delete(bucket)
+
+def _journal_stats_drifted(stats, removed):
+    """
+    Indique si les statistiques ne peuvent pas décompter les trades retirés (compteur ou tranche manquants),
+    par exemple pour des trades écrits sans mise à jour des statistiques.
+
+    :param removed: Contributions des trades retirés ou modifiés (avant modification)
+    """
+    if not removed:
+        return False
+    if (stats.trade_count or 0) < len(removed):
+        return True
+    needed = Counter((dimension, key) for contribution in removed for dimension, key in contribution['buckets'])
+    existing = {
+        (dimension, key): count for dimension, key, count in db.session.query(
+            JournalStatsBucket.dimension, JournalStatsBucket.bucket, JournalStatsBucket.trade_count
+        ).filter(JournalStatsBucket.journal_id == stats.journal_id)
+    }
+    return any(existing.get(bucket, 0) < count for bucket, count in needed.items())
+
+def update_journal_stats(journal_id, before=None, after=None):
+    """
+    Met à jour incrémentalement les statistiques d'un journal après l'écriture d'un trade.
+
+    À appeler dans la même transaction que l'écriture, avant le commit.
+
+    :param journal_id: Identifiant du journal
+    :param before: Contribution du trade avant modification (None pour une création)
+    :param after: Contribution du trade après modification (None pour une suppression)
+    """
+    update_journal_stats_many(journal_id, [(before, after)])
+
+def update_journal_stats_many(journal_id, changes):
+    """
+    Met à jour incrémentalement les statistiques d'un journal après l'écriture de plusieurs trades
+    (une seule nouvelle version des données pour tout le lot).
+
+    :param changes: Liste de (contribution avant, contribution après), voir update_journal_stats
+    """
+    Journal.query.filter_by(id=journal_id).update(
+        {Journal.data_version: Journal.data_version + 1}, synchronize_session=False
+    )
+    stats = JournalStats.query.filter_by(journal_id=journal_id).first()
+    if stats is None or _journal_stats_drifted(stats, [before for before, _ in changes if before is not None]):
+        # Journal antérieur aux statistiques matérialisées, ou statistiques qui ne comptent pas un trade retiré :
+        # recalcul complet une seule fois
+        db.session.flush()
+        rebuild_journal_stats(journal_id)
+        return
+    for before, after in changes:
+        if before is not None:
+            _apply_journal_stats(stats, before, -1)
+        if after is not None:
+            _apply_journal_stats(stats, after, 1)
+
+def load_journal_stats(journal_id):
+    """Lit les statistiques matérialisées d'un journal (format trade_stats.empty_aggregate)."""
+    stats = JournalStats.query.filter_by(journal_id=journal_id).first()
+    if stats is None:
+        aggregate = rebuild_journal_stats(journal_id)
+        db.session.commit()
+        return aggregate
+
+    aggregate = empty_aggregate()
+    aggregate['totals'].update({
+        'count': stats.trade_count,
+        'wins': stats.win_count,
+        'total_result': stats.total_result,
+        'total_profit': stats.total_profit,
+        'total_loss': stats.total_loss
+    })
+    for bucket in JournalStatsBucket.query.filter_by(journal_id=journal_id).all():
+        aggregate['buckets'][bucket.dimension][bucket.bucket] = {
+            'count': bucket.trade_count,
+            'wins': bucket.win_count,
+            'total_result': bucket.total_result
+        }
+    return aggregate
+
+# Backends d'agrégation du dashboard (clé de configuration DASHBOARD_STATS_BACKEND)
+def _python_journal_stats(journal_id):
+    rows = db.session.query(Trade.instrument, Trade.tags, Trade.date_debut, Trade.resultat).filter(
+        Trade.journal_id == journal_id
+    ).yield_per(1000)
+    return aggregate_trades(rows)
+
+def _sql_journal_stats(journal_id):
+    conn = get_db_connection()
+    try:
+        return aggregate_trades_sql(conn, journal_id)
+    finally:
+        conn.close()
+
+DASHBOARD_STATS_BACKENDS = {
+    'materialized': load_journal_stats,
+    'sql': _sql_journal_stats,
+    'python': _python_journal_stats
+}
+
+def get_journal_stats(journal_id, backend=None):
+    """
+    Retourne l'agrégat statistique d'un journal avec le backend configuré.
+
+    :param journal_id: Identifiant du journal
+    :param backend: "materialized", "sql" ou "python" (DASHBOARD_STATS_BACKEND par défaut)
+    """
+    backend = backend or app.config.get('DASHBOARD_STATS_BACKEND', 'materialized')
+    if backend not in DASHBOARD_STATS_BACKENDS:
+        raise ValueError(f"Backend de statistiques inconnu : {backend}")
+    return DASHBOARD_STATS_BACKENDS[backend](journal_id)
+
+def get_journal_metrics(journal):
+    """Indicateurs avancés (equity, drawdown, ratios, séries) calculés sur les trades clôturés du journal."""
+    conn = get_db_connection()
+    try:
+        arrays = load_journal_arrays(conn, journal.id)
+    finally:
+        conn.close()
+    return compute_journal_metrics(journal.capital_initial, arrays)
+
+@app.cli.command('benchmark_dashboard_stats')
+@click.argument('journal_id', type=int)
+def benchmark_dashboard_stats(journal_id):
+    """Compare la latence et la mémoire de chaque backend d'agrégation sur un journal."""
+    for backend in DASHBOARD_STATS_BACKENDS:
+        tracemalloc.start()
+        start = time.perf_counter()
+        aggregate = get_journal_stats(journal_id, backend)
+        elapsed = (time.perf_counter() - start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{backend:<12} {elapsed:8.1f} ms  {peak / 1024:8.1f} Kio  {aggregate['totals']['count']} trades")
+
+@app.cli.command('rebuild_journal_stats')
+def rebuild_journal_stats_command():
+    """Recalcule les statistiques matérialisées de tous les journaux."""
+    journal_ids = [journal_id for (journal_id,) in db.session.query(Journal.id).all()]
+    for journal_id in journal_ids:
+        rebuild_journal_stats(journal_id)
+    db.session.commit()
+    print(f"Statistiques recalculées pour {len(journal_ids)} journal(aux).")
+
+def get_dashboard_data(journal):
+    """Statistiques du dashboard d'un journal, mises en cache pour sa version de données."""
+    def compute_dashboard():
+        dashboard_data = build_dashboard_stats(journal.capital_initial, get_journal_stats(journal.id))
+        dashboard_data['stats']['metrics'] = get_journal_metrics(journal)
+        return dashboard_data
+
+    return stats_cache.get_or_compute('dashboard', journal.id, journal.data_version, compute_dashboard)
+
+def _breakdown_chart(name):
+    def build(journal, points):
+        breakdown = get_dashboard_data(journal)[name]
+        return {
+            'labels': list(breakdown),
+            'count': [data['count'] for data in breakdown.values()],
+            'total_result': [round(data['total_result'], 2) for data in breakdown.values()],
+        }
+    return build
+
+def _monthly_chart(journal, points):
+    stats = get_dashboard_data(journal)['stats']
+    gains = stats['gains_per_month']
+    # Au-delà du budget (historiques très longs), les mois sont réduits sur la série des gains
+    kept = downsample(np.arange(len(gains)), gains, points)
+    return {
+        'labels': [stats['mois'][i] for i in kept],
+        'gains': [round(gains[i], 2) for i in kept],
+        'trades_count': [stats['trades_count'][i] for i in kept],
+    }
+
+def _profit_loss_chart(journal, points):
+    stats = get_dashboard_data(journal)['stats']
+    return {'total_profit': stats['total_profit'], 'total_loss': stats['total_loss']}
+
+def _win_rate_chart(journal, points):
+    return {'win_rate': get_dashboard_data(journal)['stats']['win_rate']}
+
+def _closed_results(journal):
+    conn = get_db_connection()
+    try:
+        return load_journal_arrays(conn, journal.id).resultat
+    finally:
+        conn.close()
+
+def _equity_chart(journal, points):
+    """Solde après chaque trade, réduit à points valeurs (LTTB) en conservant le drawdown maximal."""
+    equity = equity_curve(journal.capital_initial, _closed_results(journal))
+    x = np.arange(len(equity))
+    kept = downsample(x, equity, points, keep=drawdown_extremes(equity))
+    return {'x': x[kept].tolist(), 'equity': [round(float(value), 2) for value in equity[kept]], 'total': len(equity)}
+
+def _pnl_chart(journal, points):
+    """Résultat de chaque trade clôturé, réduit à points valeurs (LTTB) en conservant le meilleur et le pire."""
+    resultat = _closed_results(journal)
+    x = np.arange(1, len(resultat) + 1)
+    extremes = (int(resultat.argmax()), int(resultat.argmin())) if len(resultat) else ()
+    kept = downsample(x, resultat, points, keep=extremes)
+    return {'x': x[kept].tolist(), 'resultat': [round(float(value), 2) for value in resultat[kept]], 'total': len(resultat)}
+
+# Séries des graphiques du dashboard, chargées à la demande par /api/journal/<id>/charts/<kind>
+CHART_KINDS = {
+    'monthly': _monthly_chart,
+    'profit_loss': _profit_loss_chart,
+    'win_rate': _win_rate_chart,
+    'symbol': _breakdown_chart('trades_by_symbol'),
+    'tag': _breakdown_chart('trades_by_tag'),
+    'hour': _breakdown_chart('trades_by_hour'),
+    'equity': _equity_chart,
+    'pnl': _pnl_chart,
+}
+
+@app.route('/api/journal/<int:journal_id>/charts/<kind>')
+def api_journal_chart(journal_id, kind):
+    """
+    Données JSON d'un graphique du dashboard.
+
+    L'ETag dépend de la version des données du journal : tant qu'aucun trade n'est modifié,
+    le navigateur revalide sa copie et reçoit un 304 sans que les séries soient recalculées.
+    Les séries longues sont réduites côté serveur au budget ?points= (downsampling.DEFAULT_POINTS par défaut).
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': "Authentification requise."}), 401
+    if kind not in CHART_KINDS:
+        return jsonify({'error': f"Graphique inconnu : {kind}"}), 404
+    journal = Journal.query.filter_by(id=journal_id, user_id=session['user_id']).first()
+    if not journal:
+        return jsonify({'error': "Journal introuvable."}), 404
+
+    points = point_budget(request.args.get('points'))
+    etag = f"journal-{journal.id}-v{journal.data_version}-{kind}-{points}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(stats_cache.get_or_compute(
+            f'chart:{kind}:{points}', journal.id, journal.data_version, lambda: CHART_KINDS[kind](journal, points)
+        ))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+#############################################
+# Simulation Monte Carlo du risque de ruine
+#############################################
+
+RISK_SIMULATION_MIN_TRADES = 10
+
+# Les simulations tournent hors des requêtes : un thread de coordination par simulation en cours,
+# qui répartit les trajectoires sur un pool de processus (créés au premier besoin). Les processus sont
+# lancés par 'spawn' : un fork du serveur, multi-thread (requêtes, planificateur), pourrait hériter d'un
+# verrou tenu par un autre thread et rester bloqué
+_risk_mp_context = multiprocessing.get_context('spawn')
+_risk_dispatcher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='risk-simulation')
+_risk_pool = None
+_risk_pending = {}  # (journal, version) -> Future
+_risk_lock = threading.Lock()
+
+def risk_process_pool():
+    global _risk_pool
+    with _risk_lock:
+        if _risk_pool is None:
+            _risk_pool = ProcessPoolExecutor(max_workers=app.config.get('RISK_SIMULATION_WORKERS'),
+                                             mp_context=_risk_mp_context)
+        return _risk_pool
+
+def shutdown_risk_simulations():
+    """Arrête le pool de processus des simulations (fin de l'application)."""
+    _risk_dispatcher.shutdown(wait=False, cancel_futures=True)
+    with _risk_lock:
+        if _risk_pool is not None:
+            _risk_pool.shutdown(wait=False, cancel_futures=True)
+
+def journal_closed_results(journal_id):
+    """Résultats des trades clôturés d'un journal, dans l'ordre de clôture."""
+    conn = get_db_connection()
+    try:
+        return load_journal_arrays(conn, journal_id).resultat
+    finally:
+        conn.close()
+
+def _run_risk_simulation(journal_id, version, resultat, capital):
+    try:
+        summary = run_simulation(resultat, capital, n_paths=app.config.get('RISK_SIMULATION_PATHS', 20000),
+                                 executor=risk_process_pool()) or {'trades': 0}
+        stats_cache.set('risk', journal_id, version, summary)
+        return summary
+    except Exception as e:
+        logging.error(f"Erreur lors de la simulation de risque du journal {journal_id} : {e}")
+        # Échec mis en cache pour cette version des données : les interrogations suivantes ne relancent pas
+        # la simulation, qui est retentée à la prochaine modification du journal
+        summary = {'error': "La simulation de risque a échoué."}
+        stats_cache.set('risk', journal_id, version, summary)
+        return summary
+    finally:
+        with _risk_lock:
+            _risk_pending.pop((journal_id, version), None)
+
+def request_risk_simulation(journal):
+    """
+    Résultat de la simulation de risque d'un journal pour sa version de données courante.
+
+    Ne bloque jamais : sans résultat en cache, la simulation est lancée en arrière-plan (une seule fois
+    par version) et None est retourné ; l'appelant redemande plus tard. Une simulation en échec
+    retourne {'error': ...} jusqu'à la version suivante.
+    """
+    version = journal.data_version
+    summary = stats_cache.get('risk', journal.id, version)
+    if summary is not None:
+        return summary
+    with _risk_lock:
+        if (journal.id, version) in _risk_pending:
+            return None
+    resultat = journal_closed_results(journal.id)
+    with _risk_lock:
+        if (journal.id, version) not in _risk_pending:
+            _risk_pending[(journal.id, version)] = _risk_dispatcher.submit(
+                _run_risk_simulation, journal.id, version, resultat, journal.capital_initial
+            )
+    return None
+
+@app.route('/api/journal/<int:journal_id>/risk')
+def api_journal_risk(journal_id):
+    """
+    Probabilités de drawdown et de ruine d'un journal (simulation Monte Carlo).
+
+    202 tant que la simulation de la version courante des données est en cours, 200 ensuite.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': "Authentification requise."}), 401
+    journal = Journal.query.filter_by(id=journal_id, user_id=session['user_id']).first()
+    if not journal:
+        return jsonify({'error': "Journal introuvable."}), 404
+    stats = JournalStats.query.filter_by(journal_id=journal.id).first()
+    if stats is not None and stats.trade_count < RISK_SIMULATION_MIN_TRADES:
+        return jsonify({'status': 'insufficient', 'min_trades': RISK_SIMULATION_MIN_TRADES})
+    summary = request_risk_simulation(journal)
+    if summary is None:
+        return jsonify({'status': 'pending'}), 202
+    if 'error' in summary:
+        return jsonify({'status': 'failed', 'error': summary['error']}), 500
+    if summary['trades'] < RISK_SIMULATION_MIN_TRADES:
+        return jsonify({'status': 'insufficient', 'min_trades': RISK_SIMULATION_MIN_TRADES})
+    response = jsonify(dict(summary, status='ready'))
+    response.set_etag(f"journal-{journal.id}-v{journal.data_version}-risk")
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.cli.command('simulate_risk')
+@click.argument('journal_id', type=int)
+@click.option('--paths', type=int, default=None, help="Nombre de trajectoires simulées")
+@click.option('--horizon', type=int, default=None, help="Nombre de trades par trajectoire")
+def simulate_risk_command(journal_id, paths, horizon):
+    """Simule le risque de drawdown et de ruine d'un journal et affiche les percentiles."""
+    journal = db.session.get(Journal, journal_id)
+    if journal is None:
+        raise click.ClickException(f"Journal {journal_id} introuvable.")
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=app.config.get('RISK_SIMULATION_WORKERS'), mp_context=_risk_mp_context) as executor:
+        summary = run_simulation(journal_closed_results(journal.id), journal.capital_initial,
+                                 n_paths=paths or app.config.get('RISK_SIMULATION_PATHS', 20000),
+                                 horizon=horizon, executor=executor)
+    if summary is None:
+        raise click.ClickException("Aucun trade clôturé à simuler.")
+    print(f"{summary['paths']} trajectoires de {summary['horizon']} trades "
+          f"(bootstrap de {summary['trades']} trades) en {time.perf_counter() - started:.2f} s")
+    for q, value in summary['drawdown_percentiles'].items():
+        print(f"  Drawdown maximal P{q} : {value} %")
+    for level, probability in summary['drawdown_probabilities'].items():
+        print(f"  Probabilité d'un drawdown >= {level} % : {probability} %")
+    print(f"  Probabilité de ruine (solde <= {100 - summary['ruin_level']} % du capital) : {summary['ruin_probability']} %")
+
+#############################################
+# Rejeu des trades sous d'autres règles de dimensionnement (what-if)
+#############################################
+
+WHATIF_MAX_RULES = 200
+WHATIF_DEFAULTS = {'fixed_lots': '0.1, 0.5, 1', 'risk_percents': '0.5, 1, 2', 'kelly_fractions': '0.25, 0.5, 1'}
+
+def whatif_trade_arrays(journal):
+    """
+    Résultat et valeur engagée d'un lot de chaque trade clôturé du journal, dans l'ordre de clôture.
+
+    Les trades sont revalorisés pour un lot en une passe (pricing.price_trades), au taux de leur date de clôture.
+    """
+    rows = db.session.query(
+        Trade.instrument, Trade.position, Trade.prix_entree, Trade.prix_sortie,
+        db.cast(db.func.strftime('%s', Trade.date_fin), db.Float)
+    ).filter(
+        Trade.journal_id == journal.id, Trade.statut == 'TERMINE', Trade.prix_sortie.isnot(None)
+    ).order_by(db.func.coalesce(Trade.date_fin, Trade.date_debut), Trade.id).all()
+    if not rows:
+        return np.empty(0), np.empty(0)
+    instrument, position, prix_entree, prix_sortie, dates = zip(*rows)
+    count = len(rows)
+    priced = price_trades(instrument, position, prix_entree, prix_sortie, [1.0] * count,
+                          [journal.devise] * count, [journal.capital_initial] * count, [journal.levier] * count,
+                          instrument_registry.instruments(), conversion_rates, dates=dates, fx=fx_rates)
+    # La marge est la valeur engagée divisée par le levier du journal
+    notional = priced.margin * journal.levier if journal.levier and journal.levier > 0 else priced.margin
+    return np.nan_to_num(priced.resultat), notional
+
+def whatif_replay(journal, rules):
+    """
+    Compare les règles de dimensionnement sur les trades clôturés du journal (voir position_sizing.replay).
+
+    Le résultat est mis en cache pour la version des données du journal et la grille de règles.
+
+    :return: Liste de dicts par règle (libellé, solde final, rendement, drawdown, ruine, trades pris, courbe réduite)
+    """
+    def compute():
+        unit_pnl, notional = whatif_trade_arrays(journal)
+        curves, taken = replay(unit_pnl, notional, journal.capital_initial, rules)
+        summary = summarize_curves(curves, journal.capital_initial)
+        return [
+            {
+                'label': rule.label,
+                'kind': rule.kind,
+                'value': rule.value,
+                'max_leverage': rule.max_leverage,
+                'final_equity': round(float(summary['final_equity'][i]), 2),
+                'return_pct': round(float(summary['return_pct'][i]), 2),
+                'max_drawdown_pct': round(float(summary['max_drawdown_pct'][i]), 2),
+                'ruined': bool(summary['ruined'][i]),
+                'trades_taken': int(taken[i]),
+                'curve': sample_curve(curves[i]),
+            }
+            for i, rule in enumerate(rules)
+        ]
+    grid = '|'.join(f"{rule.kind}:{rule.value:g}:{rule.max_leverage or ''}" for rule in rules)
+    return stats_cache.get_or_compute(f'whatif:{grid}', journal.id, journal.data_version, compute)
+
+def parse_float_list(text):
+    """
+    Liste de nombres positifs séparés par des espaces, des points-virgules ou ", " ("0,5" reste une décimale) ;
+    les valeurs invalides sont ignorées.
+    """
+    values = [parse_float(part, None) for part in (text or '').replace(';', ' ').replace(', ', ' ').split()]
+    return sorted({value for value in values if value is not None and value > 0})
+
+@app.route('/whatif/<int:journal_id>')
+def whatif(journal_id):
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    journal = Journal.query.filter_by(id=journal_id, user_id=session['user_id']).first()
+    if not journal:
+        flash("Journal introuvable ou non autorisé.")
+        return redirect(url_for('home'))
+    form = {key: request.args.get(key, default) for key, default in WHATIF_DEFAULTS.items()}
+    form['leverages'] = request.args.get('leverages', f"{journal.levier:g}" if journal.levier else '')
+    leverages = parse_float_list(form['leverages'])
+    rules = rule_grid(parse_float_list(form['fixed_lots']), parse_float_list(form['risk_percents']),
+                      parse_float_list(form['kelly_fractions']), leverages or [None])
+    if len(rules) > WHATIF_MAX_RULES:
+        flash(f"Grille trop grande ({len(rules)} règles, {WHATIF_MAX_RULES} au maximum).")
+        rules = []
+    started = time.perf_counter()
+    results = whatif_replay(journal, rules) if rules else []
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    results = sorted(results, key=lambda result: result['final_equity'], reverse=True)
+    return render_template('whatif.html', journal=journal, form=form, results=results, elapsed_ms=elapsed_ms)
+
+NEWS_MAX_WINDOW_MINUTES = 24 * 60
+NEWS_RECENT_TRADES = 50
+
+def high_impact_events():
+    """
+    Index des annonces à fort impact (news_impact.EventIndex), avec leurs intitulés et leurs dates.
+
+    :return: (index, intitulés, dates) ; les indices retournés par EventIndex.match désignent ces listes
+    """
+    rows = db.session.query(
+        EconomicEvent.title, EconomicEvent.currency, EconomicEvent.impact, EconomicEvent.date,
+        db.cast(db.func.strftime('%s', EconomicEvent.date), db.Float)
+    ).all()
+    rows = [row for row in rows if is_high_impact(row[2])]
+    titles = [row[0] for row in rows]
+    return EventIndex([row[4] for row in rows], [row[1] for row in rows]), titles, [row[3] for row in rows]
+
+def journal_news_impact(journal, window_minutes):
+    """
+    Performance des trades clôturés du journal autour des annonces à fort impact de leurs devises.
+
+    Le résultat est mis en cache pour la version des données du journal et celle du calendrier
+    (registre "economic_events", incrémenté à chaque ajout ou suppression d'annonce).
+
+    :return: Dict (répartition par catégorie, par annonce, derniers trades rattachés)
+    """
+    events_version = registry_version('economic_events')
+
+    def compute():
+        index, titles, dates = high_impact_events()
+        rows = db.session.query(
+            Trade.id, Trade.instrument, Trade.date_debut, Trade.resultat,
+            db.cast(db.func.strftime('%s', Trade.date_debut), db.Float),
+            db.cast(db.func.strftime('%s', Trade.date_fin), db.Float)
+        ).filter(Trade.journal_id == journal.id, Trade.statut == 'TERMINE').order_by(Trade.date_debut.desc()).all()
+        if not rows:
+            return {'breakdown': news_breakdown([], []), 'events': [], 'recent': [], 'event_count': len(titles)}
+        trade_ids, instruments, opened, resultat, starts, ends = zip(*rows)
+        specs = instrument_registry.instruments()
+        currencies = {symbol: instrument_currencies(symbol, specs.get(symbol)) for symbol in set(instruments)}
+        category, event = index.match([currencies[symbol] for symbol in instruments],
+                                      np.array(starts, dtype=float), np.array(ends, dtype=float), window_minutes * 60)
+        recent = [
+            {
+                'trade_id': trade_ids[i], 'instrument': instruments[i], 'date_debut': opened[i],
+                'resultat': resultat[i], 'category': NEWS_CATEGORIES[category[i]],
+                'event': titles[event[i]], 'event_date': dates[event[i]],
+            }
+            for i in np.flatnonzero(category)[:NEWS_RECENT_TRADES]
+        ]
+        resultat = np.array([r if r is not None else np.nan for r in resultat], dtype=float)
+        return {
+            'breakdown': news_breakdown(resultat, category),
+            'events': event_breakdown(resultat, category, event, titles),
+            'recent': recent,
+            'event_count': len(titles),
+        }
+    key = f'news:{window_minutes:g}:{events_version}'
+    return stats_cache.get_or_compute(key, journal.id, journal.data_version, compute)
+
+@app.route('/news_impact/<int:journal_id>')
+def news_impact(journal_id):
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    journal = Journal.query.filter_by(id=journal_id, user_id=session['user_id']).first()
+    if not journal:
+        flash("Journal introuvable ou non autorisé.")
+        return redirect(url_for('home'))
+    window = parse_float(request.args.get('window'), DEFAULT_WINDOW_MINUTES)
+    if not 0 <= window <= NEWS_MAX_WINDOW_MINUTES:
+        flash(f"Fenêtre invalide : entre 0 et {NEWS_MAX_WINDOW_MINUTES} minutes.")
+        window = DEFAULT_WINDOW_MINUTES
+    impact = journal_news_impact(journal, window)
+    return render_template('news_impact.html', journal=journal, window=window, impact=impact)
+
 @app.route('/dashboard/<int:journal_id>')
 def dashboard(journal_id):
     journal = Journal.query.filter_by(id=journal_id, user_id=session['user_id']).first()
     if not journal:
         return redirect(url_for('home'))
 
-    trades = Trade.query.filter_by(journal_id=journal.id).all()
-
-    # Analyse par symbole
-    trades_by_symbol = {}
-    for trade in trades:
-        symbol = trade.instrument
-        if symbol not in trades_by_symbol:
-            trades_by_symbol[symbol] = {'count': 0, 'total_result': 0, 'win_rate': 0}
-        trades_by_symbol[symbol]['count'] += 1
-        trades_by_symbol[symbol]['total_result'] += trade.resultat or 0
-        if trade.resultat and trade.resultat > 0:
-            trades_by_symbol[symbol]['win_rate'] += 1
-
-    for symbol, data in trades_by_symbol.items():
-        data['win_rate'] = (data['win_rate'] / data['count']) * 100 if data['count'] > 0 else 0
-
-    # Analyse par tags
-    trades_by_tag = {}
-    for trade in trades:
-        tags = (trade.tags or '').split(',')
-        for tag in tags:
-            tag = tag.strip()
-            if not tag:
-                continue
-            if tag not in trades_by_tag:
-                trades_by_tag[tag] = {'count': 0, 'total_result': 0, 'win_rate': 0}
-            trades_by_tag[tag]['count'] += 1
-            trades_by_tag[tag]['total_result'] += trade.resultat or 0
-            if trade.resultat and trade.resultat > 0:
-                trades_by_tag[tag]['win_rate'] += 1
-
-    for tag, data in trades_by_tag.items():
-        data['win_rate'] = (data['win_rate'] / data['count']) * 100 if data['count'] > 0 else 0
-
-    # Analyse par heure
-    trades_by_hour = {}
-    for trade in trades:
-        if trade.date_debut:
-            hour = trade.date_debut.strftime('%H:00')
-            if hour not in trades_by_hour:
-                trades_by_hour[hour] = {'count': 0, 'total_result': 0}
-            trades_by_hour[hour]['count'] += 1
-            trades_by_hour[hour]['total_result'] += trade.resultat or 0
-
-    # Calculate monthly data for charts
-    monthly_data = {}
-    for trade in trades:
-        if trade.date_debut:
-            month = trade.date_debut.strftime('%Y-%m')
-            if month not in monthly_data:
-                monthly_data[month] = {'gains': 0, 'count': 0}
-            monthly_data[month]['gains'] += trade.resultat or 0
-            monthly_data[month]['count'] += 1
-
-    mois = list(monthly_data.keys())
-    gains_per_month = [monthly_data[month]['gains'] for month in mois]
-    trades_count = [monthly_data[month]['count'] for month in mois]
-
-    # Correct calculation of total profit and loss
-    total_profit = sum(
-        (trade.prix_sortie - trade.prix_entree) * trade.lot * predefined_instruments[trade.instrument]['pip_value']
-        if trade.instrument in predefined_instruments and predefined_instruments[trade.instrument]['type'] == 'forex' and trade.resultat > 0 else 0
-        for trade in trades
+    dashboard_data = get_dashboard_data(journal)
+    return render_template(
+        'dashboard.html',
+        journal=journal,
+        stats=dashboard_data['stats'],
+        trades_by_symbol=dashboard_data['trades_by_symbol'],
+        trades_by_tag=dashboard_data['trades_by_tag'],
+        trades_by_hour=dashboard_data['trades_by_hour']
     )
 
-    total_loss = sum(
-        (trade.prix_sortie - trade.prix_entree) * trade.lot * predefined_instruments[trade.instrument]['pip_value']
-        if trade.instrument in predefined_instruments and predefined_instruments[trade.instrument]['type'] == 'forex' and trade.resultat < 0 else 0
-    for trade in trades
+# Fenêtres glissantes du classement, en jours (None = depuis le début)
+LEADERBOARD_WINDOWS = {'daily': 1, 'weekly': 7, 'monthly': 30, 'all': None}
+LEADERBOARD_DEFAULT_WINDOW = 'monthly'
+LEADERBOARD_PAGE_SIZE = 50
+
+def refresh_leaderboard_totals(since=None):
+    """
+    Recalcule les totaux journaliers (gains, pertes, nombre de trades) par utilisateur.
+
+    :param since: Date à partir de laquelle les jours sont recalculés (None = recalcul complet)
+    :return: Nombre de lignes (utilisateur, jour) recalculées
+    """
+    day = db.func.date(Trade.date_fin)
+    query = db.session.query(
+        Journal.user_id,
+        day.label('day'),
+        db.func.sum(db.case((Trade.resultat > 0, Trade.resultat), else_=0)).label('total_gains'),
+        db.func.sum(db.case((Trade.resultat < 0, -Trade.resultat), else_=0)).label('total_losses'),
+        db.func.count(Trade.id).label('trade_count')
+    ).join(Journal, Trade.journal_id == Journal.id).filter(
+        Trade.statut == "TERMINE", Trade.date_fin.isnot(None)
     )
+    totals = LeaderboardDailyTotal.query
+    if since is not None:
+        query = query.filter(Trade.date_fin >= datetime.combine(since, datetime.min.time()))
+        totals = totals.filter(LeaderboardDailyTotal.day >= since)
+    rows = query.group_by(Journal.user_id, day).all()
+
+    totals.delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(LeaderboardDailyTotal, [
+        {
+            'user_id': row.user_id,
+            'day': datetime.strptime(row.day, '%Y-%m-%d').date(),
+            'total_gains': row.total_gains or 0,
+            'total_losses': row.total_losses or 0,
+            'trade_count': row.trade_count
+        }
+        for row in rows
+    ])
+    return len(rows)
+
+def compute_leaderboard(period='all', today=None):
+    """
+    Calcule gains, pertes et ratio de performance de tous les participants sur une fenêtre glissante.
 
-    total_loss = abs(total_loss)  # Ensure total_loss is positive for display purposes
-
-    # Adjust win rate calculation to ensure accuracy
-    total_wins = sum(1 for trade in trades if trade.resultat and trade.resultat > 0)
-    total_trades = len(trades)
-    win_rate = (total_wins / total_trades * 100) if total_trades > 0 else 0
-
-    stats = {
-        'solde': journal.capital_initial + sum(trade.resultat or 0 for trade in trades),
-        'mois': mois,
-        'gains_per_month': gains_per_month,
-        'trades_count': trades_count,
-        'total_profit': round(total_profit, 2),
-        'total_loss': round(total_loss, 2),
-        'win_rate': round(win_rate, 2)
-    }
+    :param period: Clé de LEADERBOARD_WINDOWS
+    :param today: Dernier jour inclus dans la fenêtre (aujourd'hui par défaut)
+    :return: Liste de dictionnaires triés par performance décroissante, avec leur rang
+    """
+    gains = db.func.coalesce(db.func.sum(LeaderboardDailyTotal.total_gains), 0)
+    losses = db.func.coalesce(db.func.sum(LeaderboardDailyTotal.total_losses), 0)
+    performance = db.case((gains + losses > 0, gains * 100.0 / (gains + losses)), else_=0)
+
+    # Jointure externe pour conserver les participants sans trade terminé (performance nulle)
+    join_condition = [LeaderboardDailyTotal.user_id == User.id]
+    days = LEADERBOARD_WINDOWS[period]
+    if days is not None:
+        today = today or datetime.utcnow().date()
+        join_condition.append(LeaderboardDailyTotal.day > today - timedelta(days=days))
+
+    rows = db.session.query(
+        User.id, User.prenom, User.nom,
+        gains.label('total_gains'),
+        losses.label('total_losses'),
+        performance.label('performance')
+    ).outerjoin(LeaderboardDailyTotal, db.and_(*join_condition)).filter(
+        User.participate == True
+    ).group_by(User.id).order_by(performance.desc(), User.id.asc()).all()
+
+    return [
+        {
+            'user_id': row.id,
+            'name': f"{row.prenom} {row.nom}",
+            'total_gains': round(row.total_gains, 2),
+            'total_losses': round(row.total_losses, 2),
+            'performance': round(row.performance, 2),
+            'rank': index
+        }
+        for index, row in enumerate(rows, start=1)
+    ]
 
-    return render_template(
-        'dashboard.html',
-        journal=journal,
-        stats=stats,
-        trades_by_symbol=trades_by_symbol,
-        trades_by_tag=trades_by_tag,
-        trades_by_hour=trades_by_hour
+def rebuild_leaderboard(full=False):
+    """
+    Met à jour les totaux journaliers puis régénère l'instantané classé de chaque fenêtre.
+
+    Hors recalcul complet, seuls les trades clôturés depuis la veille du dernier passage sont relus.
+    """
+    computed_at = datetime.utcnow()
+    last_run = None if full else db.session.query(db.func.max(LeaderboardSnapshot.computed_at)).scalar()
+    since = last_run.date() - timedelta(days=1) if last_run else None
+    refresh_leaderboard_totals(since)
+
+    LeaderboardSnapshot.query.delete(synchronize_session=False)
+    counts = {}
+    for period in LEADERBOARD_WINDOWS:
+        entries = compute_leaderboard(period, today=computed_at.date())
+        db.session.bulk_insert_mappings(
+            LeaderboardSnapshot,
+            [dict(entry, period=period, computed_at=computed_at) for entry in entries]
+        )
+        counts[period] = len(entries)
+    db.session.commit()
+    return counts
+
+def scheduled_leaderboard_refresh(full=False):
+    """Tâche planifiée : reconstruit les classements dans un contexte d'application."""
+    with app.app_context():
+        try:
+            rebuild_leaderboard(full=full)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Erreur lors de la reconstruction du classement : {e}")
+
+def get_leaderboard_page(period, page=1, per_page=LEADERBOARD_PAGE_SIZE):
+    """Retourne une page de l'instantané classé d'une fenêtre, en le construisant s'il est absent."""
+    snapshots = LeaderboardSnapshot.query.filter_by(period=period)
+    if not db.session.query(snapshots.exists()).scalar():
+        rebuild_leaderboard()
+    return snapshots.order_by(LeaderboardSnapshot.rank.asc()).paginate(
+        page=page, per_page=per_page, error_out=False
     )
 
+@app.cli.command('rebuild_leaderboard')
+def rebuild_leaderboard_command():
+    """Recalcule entièrement les totaux journaliers et les classements."""
+    counts = rebuild_leaderboard(full=True)
+    for period, count in counts.items():
+        print(f"Classement {period} recalculé : {count} participant(s).")
+
 @app.route('/performance_ranking')
 def performance_ranking():
     if 'user_id' not in session:
         return redirect(url_for('login'))
 
-    # Récupérer uniquement les utilisateurs qui participent
-    users = User.query.filter_by(participate=True).all()
-
-    # Calculer la performance mensuelle pour chaque utilisateur
-    performance_data = []
-    for user in users:
-        journals = Journal.query.filter_by(user_id=user.id).all()
-        total_gains = 0
-        total_losses = 0
-
-        for journal in journals:
-            trades = Trade.query.filter_by(journal_id=journal.id, statut="TERMINE").all()
-            for trade in trades:
-                if trade.resultat > 0:
-                    total_gains += trade.resultat
-                elif trade.resultat < 0:
-                    total_losses += abs(trade.resultat)
-
-        # Calculer la performance mensuelle en pourcentage
-        if total_gains + total_losses > 0:
-            performance_percentage = (total_gains / (total_gains + total_losses)) * 100
-        else:
-            performance_percentage = 0
-
-        performance_data.append({
-            'name': f"{user.prenom} {user.nom}",
-            'performance': round(performance_percentage, 2)
-        })
-
-    # Trier les utilisateurs par performance décroissante
-    performance_data.sort(key=lambda x: x['performance'], reverse=True)
-
-    # Ajouter un champ `rank` pour chaque utilisateur
-    for index, user in enumerate(performance_data, start=1):
-        user['rank'] = index
-
-    return render_template('performance_ranking.html', performance_ranking=performance_data)
+    period = request.args.get('window', LEADERBOARD_DEFAULT_WINDOW)
+    if period not in LEADERBOARD_WINDOWS:
+        period = LEADERBOARD_DEFAULT_WINDOW
+    page = request.args.get(get_page_parameter(), type=int, default=1)
+    pagination = get_leaderboard_page(period, page)
+    return render_template(
+        'performance_ranking.html',
+        performance_ranking=pagination.items,
+        pagination=pagination,
+        window=period,
+        windows=LEADERBOARD_WINDOWS
+    )
 
 ## SUPPRESSION DE LA DEUXIEME DEFINITION (doublon)
 
@@ -902,87 +1832,133 @@ def participate_ranking():
     cursor.execute('UPDATE users SET participate = 1 WHERE id = ?', (session['user_id'],))
     conn.commit()
     conn.close()
+    # Le nouveau participant doit apparaître immédiatement dans le classement
+    rebuild_leaderboard()
     flash('Vous participez désormais au classement !')
     return redirect(url_for('performance_ranking'))
-    if 'user_id' not in session:
-        return redirect(url_for('login'))
-
-    # Récupérer uniquement les utilisateurs qui participent
-    users = User.query.filter_by(participate=True).all()
-
-    # Calculer la performance mensuelle pour chaque utilisateur
-    performance_data = []
-    for user in users:
-        journals = Journal.query.filter_by(user_id=user.id).all()
-        total_gains = 0
-        total_losses = 0
-
-        for journal in journals:
-            trades = Trade.query.filter_by(journal_id=journal.id, statut="TERMINE").all()
-            for trade in trades:
-                if trade.resultat > 0:
-                    total_gains += trade.resultat
-                elif trade.resultat < 0:
-                    total_losses += abs(trade.resultat)
-
-        # Calculer la performance mensuelle en pourcentage
-        if total_gains + total_losses > 0:
-            performance_percentage = (total_gains / (total_gains + total_losses)) * 100
-        else:
-            performance_percentage = 0
 
-        performance_data.append({
-            'name': f"{user.prenom} {user.nom}",
-            'performance': round(performance_percentage, 2)
-        })
-
-    # Trier les utilisateurs par performance décroissante
-    performance_data.sort(key=lambda x: x['performance'], reverse=True)
+def pivot_filters_from_request():
+    """Lit les filtres communs des analyses (journal_id, date_from, date_to) dans la query string."""
+    filters = {'journal_id': request.args.get('journal_id', type=int)}
+    for name in ('date_from', 'date_to'):
+        value = request.args.get(name)
+        try:
+            filters[name] = datetime.strptime(value, '%Y-%m-%d').date() if value else None
+        except ValueError:
+            filters[name] = None
+    return filters
 
-    # Ajouter un champ `rank` pour chaque utilisateur
-    for index, user in enumerate(performance_data, start=1):
-        user['rank'] = index
+def run_pivot(dimensions, user_id, **filters):
+    """Exécute le tableau croisé des trades d'un utilisateur (voir trade_pivot.pivot_trades)."""
+    conn = get_db_connection()
+    try:
+        return pivot_trades(conn, dimensions, user_id, **filters)
+    finally:
+        conn.close()
 
-    return render_template('performance_ranking.html', performance_ranking=performance_data)
+@app.route('/api/pivot')
+def api_pivot():
+    if 'user_id' not in session:
+        return jsonify({'error': "Authentification requise."}), 401
+    dimensions = [d.strip() for d in request.args.get('by', 'instrument').split(',') if d.strip()]
+    try:
+        rows = run_pivot(dimensions, session['user_id'], **pivot_filters_from_request())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'dimensions': dimensions, 'rows': rows})
 
 @app.route('/analysis_by_symbol')
 def analysis_by_symbol():
-    # Exemple de données fictives pour l'analyse par symbole
-    trades_by_symbol = {
-        'AAPL': {'count': 10, 'total_result': 500, 'win_rate': 70},
-        'GOOGL': {'count': 8, 'total_result': 300, 'win_rate': 60},
-    }
-    return render_template('analysis_by_symbol.html', trades_by_symbol=trades_by_symbol)
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    rows = run_pivot(['instrument'], session['user_id'], **pivot_filters_from_request())
+    return render_template('analysis_by_symbol.html', trades_by_symbol=pivot_by(rows, 'instrument'))
 
 @app.route('/analysis_by_tags')
 def analysis_by_tags():
-    # Exemple de données fictives pour l'analyse par tags
-    trades_by_tag = {
-        'Breakout': {'count': 15, 'total_result': 700, 'win_rate': 75},
-        'Reversal': {'count': 5, 'total_result': -200, 'win_rate': 40},
-    }
-    return render_template('analysis_by_tags.html', trades_by_tag=trades_by_tag)
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    rows = run_pivot(['tag'], session['user_id'], **pivot_filters_from_request())
+    return render_template('analysis_by_tags.html', trades_by_tag=pivot_by(rows, 'tag'))
 
 @app.route('/analysis_by_hour')
 def analysis_by_hour():
-    # Exemple de données fictives pour l'analyse par heure
-    trades_by_hour = {
-        '09:00': {'count': 5, 'total_result': 200},
-        '10:00': {'count': 7, 'total_result': 300},
-    }
-    return render_template('analysis_by_hour.html', trades_by_hour=trades_by_hour)
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    rows = run_pivot(['hour'], session['user_id'], **pivot_filters_from_request())
+    return render_template('analysis_by_hour.html', trades_by_hour=pivot_by(rows, 'hour'))
 
 @app.route('/strategy_check')
 def strategy_check():
-    # Exemple de messages fictifs pour la vérification des stratégies
-    messages = [
-        'Stratégie 1 : Valide',
-        'Stratégie 2 : À améliorer',
-    ]
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    # Les trades d'une stratégie sont ceux tagués de son nom
+    by_tag = pivot_by(run_pivot(['tag'], session['user_id'], **pivot_filters_from_request()), 'tag')
+    messages = []
+    for strategy in Strategy.query.filter_by(user_id=session['user_id']).order_by(Strategy.name.asc()).all():
+        data = by_tag.get(strategy.name)
+        if not data:
+            messages.append(f"{strategy.name} : aucun trade terminé tagué avec cette stratégie")
+            continue
+        verdict = "Valide" if data['total_result'] > 0 else "À améliorer"
+        messages.append(
+            f"{strategy.name} : {verdict} ({data['count']} trades, taux de réussite {data['win_rate']}%, "
+            f"résultat moyen {data['mean_result']})"
+        )
     return render_template('strategy_check.html', messages=messages)
 
 # 3. Gestion des Trades
 
+def get_or_create_tags(names):
+    """Retourne les objets Tag correspondant aux noms donnés, en créant ceux qui n'existent pas."""
+    if not names:
+        return []
+    existing = {tag.name: tag for tag in Tag.query.filter(Tag.name.in_(names)).all()}
+    for name in names:
+        if name not in existing:
+            existing[name] = Tag(name=name)
+            db.session.add(existing[name])
+    return [existing[name] for name in names]
+
+def set_trade_tags(trade, tags):
+    """Enregistre les tags d'un trade : chaîne saisie et association normalisée trade_tags."""
+    trade.tags = tags
+    trade.tag_list = get_or_create_tags(split_tags(tags))
+
+def trades_tagged(tag_name, user_id=None, journal_id=None):
+    """
+    Requête des trades portant un tag, résolue par l'index (tag_id, trade_id) de trade_tags.
+
+    :param tag_name: Nom exact du tag (exemple : "Breakout")
+    :param user_id: Restreint aux journaux de cet utilisateur
+    :param journal_id: Restreint à ce journal
+    """
+    query = Trade.query.join(trade_tags, trade_tags.c.trade_id == Trade.id).join(
+        Tag, Tag.id == trade_tags.c.tag_id
+    ).filter(Tag.name == tag_name)
+    if journal_id is not None:
+        query = query.filter(Trade.journal_id == journal_id)
+    if user_id is not None:
+        query = query.join(Journal, Trade.journal_id == Journal.id).filter(Journal.user_id == user_id)
+    return query
+
+def backfill_trade_tags():
+    """Crée les associations trade_tags manquantes à partir de la colonne texte Trade.tags."""
+    tagged_ids = db.session.query(trade_tags.c.trade_id).distinct()
+    trades_to_fill = Trade.query.filter(
+        Trade.tags.isnot(None), Trade.tags != '', ~Trade.id.in_(tagged_ids)
+    ).all()
+    for trade in trades_to_fill:
+        set_trade_tags(trade, trade.tags)
+    db.session.commit()
+    return len(trades_to_fill)
+
+@app.cli.command('backfill_trade_tags')
+def backfill_trade_tags_command():
+    """Normalise les tags texte des trades existants dans tags / trade_tags."""
+    count = backfill_trade_tags()
+    print(f"Tags normalisés pour {count} trade(s).")
+
 def calculate_lot_size(account_risk, leverage, pip_value, base_currency_value):
     """
     Calcule la taille du lot en fonction du risque, de l'effet de levier, de la valeur par pip et de la valeur de la devise de base.
@@ -1015,9 +1991,9 @@ def can_take_position(account_balance, leverage, lot_size, entry_price, instrume
     :return: True si la position peut être prise, False sinon
     """
     # Récupérer les informations de l'instrument
-    instrument_data = predefined_instruments.get(instrument)
+    instrument_data = instrument_registry.get(instrument)
     if not instrument_data:
-        raise ValueError(f"Instrument {instrument} non défini dans predefined_instruments.")
+        raise ValueError(f"Instrument {instrument} non défini dans le registre des instruments.")
 
     # Calculer la valeur de la position sans inclure l'effet de levier
     position_value = lot_size * entry_price
@@ -1028,6 +2004,342 @@ def can_take_position(account_balance, leverage, lot_size, entry_price, instrume
     # Vérifier si le solde du compte permet de prendre la position
     return account_balance >= required_margin
 
+def price_journal_trade(journal, instrument, position, prix_entree, prix_sortie, lot, date=None):
+    """
+    Valorise un trade dans la devise de son journal (voir pricing.price_trade).
+
+    :param date: Date de conversion (clôture du trade) : taux historique connu à cette date,
+                 conversion_rates en repli
+    :return: (résultat ou None sans prix de sortie, pourcentage du capital initial, marge requise)
+    """
+    return price_trade(instrument, position, prix_entree, prix_sortie, lot,
+                       journal.devise, journal.capital_initial, journal.levier,
+                       instrument_registry.instruments(), conversion_rates,
+                       date=None if date is None else to_epoch(date), fx=fx_rates)
+
+def reprice_trade(journal, trade):
+    """Recalcule le résultat et le pourcentage d'un trade à partir de ses prix, au taux de sa date de clôture."""
+    trade.resultat, trade.pourcentage, _ = price_journal_trade(
+        journal, trade.instrument, trade.position, trade.prix_entree, trade.prix_sortie, trade.lot,
+        date=trade.date_fin or trade.date_debut
+    )
+
+def close_trades(journal, closes):
+    """
+    Clôture en une fois plusieurs positions ouvertes d'un journal.
+
+    Les trades sont chargés en une requête, valorisés en une seule passe vectorisée (pricing.price_trades)
+    et les statistiques du journal mises à jour pour tout le lot ; le commit reste à la charge de l'appelant,
+    qui valide ainsi l'ensemble en une transaction. Rien n'est modifié si une clôture est invalide.
+
+    :param closes: Liste de (identifiant du trade, prix de sortie, date de clôture)
+    :return: Trades clôturés, dans l'ordre de closes
+    :raises ValueError: Si un trade est inconnu, déjà clôturé, cité deux fois ou clôturé avant son ouverture,
+                        si un prix de sortie n'est pas un nombre fini strictement positif ou si une date
+                        de clôture porte un fuseau horaire (les dates des trades sont naïves)
+    """
+    trade_ids = [trade_id for trade_id, _, _ in closes]
+    trades = {trade.id: trade for trade in Trade.query.filter(Trade.journal_id == journal.id, Trade.id.in_(trade_ids))}
+
+    def price(closed, closes):
+        count = len(closed)
+        priced = price_trades(
+            [trade.instrument for trade in closed], [trade.position for trade in closed],
+            [trade.prix_entree for trade in closed], [prix_sortie for _, prix_sortie, _ in closes],
+            [trade.lot for trade in closed], [journal.devise] * count,
+            [journal.capital_initial] * count, [journal.levier] * count,
+            instrument_registry.instruments(), conversion_rates,
+            dates=[to_epoch(date_fin) for _, _, date_fin in closes], fx=fx_rates
+        )
+        return priced.resultat, priced.pourcentage
+
+    return close_positions(trades, closes, price, lambda changes: update_journal_stats_many(journal.id, changes))
+
+def reprice_trades(journal_id=None, batch_size=5000):
+    """
+    Recalcule en bloc le résultat et le pourcentage des trades clôturés, par lots vectorisés,
+    puis les statistiques des journaux concernés.
+
+    À utiliser après une modification des instruments, de conversion_rates
+    ou des fichiers de taux historiques.
+
+    :param journal_id: Journal à revaloriser (None = toute la base)
+    :return: Nombre de trades revalorisés
+    """
+    conversion_date = db.cast(db.func.strftime('%s', db.func.coalesce(Trade.date_fin, Trade.date_debut)), db.Float)
+    query = db.select(
+        Trade.id, Trade.journal_id, Trade.instrument, Trade.position, Trade.prix_entree, Trade.prix_sortie,
+        Trade.lot, Journal.devise, Journal.capital_initial, Journal.levier, conversion_date
+    ).join(Journal, Trade.journal_id == Journal.id).where(Trade.prix_sortie.isnot(None))
+    if journal_id is not None:
+        query = query.where(Trade.journal_id == journal_id)
+
+    # Lecture en flux par lots de batch_size (yield_per) : la mémoire ne dépend pas de la taille de la base
+    count, journal_ids = 0, set()
+    for batch in db.session.execute(query.order_by(Trade.id).execution_options(yield_per=batch_size)).partitions():
+        columns = list(zip(*batch))
+        priced = price_trades(*columns[2:10], instrument_registry.instruments(), conversion_rates,
+                              dates=columns[10], fx=fx_rates)
+        db.session.bulk_update_mappings(Trade, [
+            {'id': trade_id, 'resultat': float(resultat), 'pourcentage': float(pourcentage)}
+            for trade_id, resultat, pourcentage in zip(columns[0], priced.resultat, priced.pourcentage)
+        ])
+        count += len(batch)
+        journal_ids.update(columns[1])
+
+    journal_ids = sorted(journal_ids)
+    for affected in journal_ids:
+        rebuild_journal_stats(affected)
+    if journal_ids:
+        Journal.query.filter(Journal.id.in_(journal_ids)).update(
+            {Journal.data_version: Journal.data_version + 1}, synchronize_session=False
+        )
+    return count
+
+def compute_trade_excursions(journal_id=None, batch_size=5000):
+    """
+    Calcule l'excursion défavorable (MAE) et favorable (MFE) maximales des trades clôturés
+    à partir des bougies d'une minute du magasin OHLC, par lots vectorisés.
+
+    Les extrêmes de prix de chaque trade entre son ouverture et sa clôture sont lus par instrument
+    (ohlc_store.window_extremes), puis valorisés en devise du journal comme un résultat latent.
+    Un trade dont l'instrument n'a pas de bougies sur sa durée reçoit des valeurs vides.
+
+    :param journal_id: Journal traité (None = toute la base)
+    :return: Nombre de trades dont les excursions ont pu être calculées
+    """
+    query = db.select(
+        Trade.id, Trade.journal_id, Trade.instrument, Trade.position, Trade.prix_entree, Trade.lot,
+        Journal.devise, Journal.capital_initial, Journal.levier,
+        db.cast(db.func.strftime('%s', Trade.date_debut), db.Float),
+        db.cast(db.func.strftime('%s', Trade.date_fin), db.Float),
+        Trade.mae, Trade.mfe
+    ).join(Journal, Trade.journal_id == Journal.id).where(Trade.prix_sortie.isnot(None), Trade.date_fin.isnot(None))
+    if journal_id is not None:
+        query = query.where(Trade.journal_id == journal_id)
+    query = query.order_by(Trade.instrument, Trade.date_debut).execution_options(yield_per=batch_size)
+
+    computed, changed_journals = 0, set()
+    for batch in db.session.execute(query).partitions():
+        (trade_ids, journal_ids, instrument, position, prix_entree, lot, devise, capital_initial, levier,
+         starts, ends, old_mae, old_mfe) = (np.asarray(column) for column in zip(*batch))
+        highest = np.full(len(batch), np.nan)
+        lowest = np.full(len(batch), np.nan)
+        for name in np.unique(instrument):
+            positions = np.flatnonzero(instrument == name)
+            highest[positions], lowest[positions] = ohlc_store.extremes(
+                name, starts[positions].astype(float), ends[positions].astype(float)
+            )
+        adverse, favourable = price_excursions(position, prix_entree, highest, lowest)
+
+        direction = np.where(np.char.lower(position.astype(str)) == 'achat', 1.0, -1.0)
+        entree = prix_entree.astype(float)
+        priced = [
+            price_trades(instrument, position, entree, entree + direction * move, lot, devise,
+                         capital_initial, levier, instrument_registry.instruments(), conversion_rates,
+                         dates=ends, fx=fx_rates).resultat
+            for move in (-np.nan_to_num(adverse), np.nan_to_num(favourable))
+        ]
+        known = ~np.isnan(highest)
+        computed += int(known.sum())
+        mae = np.where(known, priced[0], np.nan)
+        mfe = np.where(known, priced[1], np.nan)
+        # Seuls les trades dont les excursions changent sont réécrits (et leurs journaux invalidés)
+        changed = (~np.isclose(mae, old_mae.astype(float), equal_nan=True)
+                   | ~np.isclose(mfe, old_mfe.astype(float), equal_nan=True))
+        if not changed.any():
+            continue
+        db.session.bulk_update_mappings(Trade, [
+            {'id': int(trade_id), 'mae': None if np.isnan(value_mae) else float(value_mae),
+             'mfe': None if np.isnan(value_mfe) else float(value_mfe)}
+            for trade_id, value_mae, value_mfe in zip(trade_ids[changed], mae[changed], mfe[changed])
+        ])
+        changed_journals.update(int(journal) for journal in journal_ids[changed])
+
+    if changed_journals:
+        Journal.query.filter(Journal.id.in_(sorted(changed_journals))).update(
+            {Journal.data_version: Journal.data_version + 1}, synchronize_session=False
+        )
+    return computed
+
+def scheduled_trade_excursions():
+    """Tâche planifiée : recalcule les MAE/MFE de tous les trades clôturés."""
+    with app.app_context():
+        try:
+            compute_trade_excursions()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Erreur lors du calcul des excursions des trades : {e}")
+
+@app.cli.command('compute_excursions')
+@click.argument('journal_id', type=int, required=False)
+def compute_excursions_command(journal_id):
+    """Calcule les MAE/MFE des trades clôturés d'un journal, ou de toute la base sans JOURNAL_ID."""
+    started = time.perf_counter()
+    count = compute_trade_excursions(journal_id)
+    db.session.commit()
+    print(f"Excursions calculées pour {count} trade(s) en {time.perf_counter() - started:.2f} s.")
+
+@app.cli.command('import_ohlc')
+@click.argument('symbol')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_ohlc_command(symbol, path):
+    """Importe un fichier CSV de bougies d'une minute (time, open, high, low, close) pour un instrument."""
+    count = ohlc_store.import_csv(symbol, path)
+    print(f"{count} bougie(s) stockée(s) pour {symbol}.")
+
+@app.cli.command('reprice_trades')
+@click.argument('journal_id', type=int, required=False)
+def reprice_trades_command(journal_id):
+    """Revalorise les trades clôturés d'un journal, ou de toute la base sans JOURNAL_ID."""
+    count = reprice_trades(journal_id)
+    db.session.commit()
+    if count:
+        rebuild_leaderboard(full=True)
+    print(f"{count} trade(s) revalorisé(s).")
+
+# Numérotation des trades d'un journal (ordre d'enregistrement), recalculée en une seule requête
+_SQL_RENUMBER_TRADES = """
+    UPDATE trades SET numero_ordre = sequence.numero
+    FROM (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY journal_id ORDER BY date_enregistrement, id) AS numero
+        FROM trades {where}
+    ) AS sequence
+    WHERE sequence.id = trades.id
+"""
+
+def renumber_journal_trades(journal_id=None):
+    """
+    Renumérote en bloc les trades d'un journal (ou de tous les journaux si journal_id vaut None).
+
+    À appeler dans une transaction ; le commit reste à la charge de l'appelant.
+    """
+    if journal_id is None:
+        db.session.execute(db.text(_SQL_RENUMBER_TRADES.format(where='')))
+    else:
+        db.session.execute(
+            db.text(_SQL_RENUMBER_TRADES.format(where='WHERE journal_id = :journal_id')),
+            {'journal_id': journal_id}
+        )
+
+def ensure_trade_sequence(journal_id):
+    """
+    Renumérote un journal dont des trades n'ont pas encore de numéro d'ordre (trades antérieurs à la colonne).
+
+    :return: True si le journal a été renuméroté (commit à la charge de l'appelant)
+    """
+    missing = db.session.query(Trade.id).filter(
+        Trade.journal_id == journal_id, Trade.numero_ordre.is_(None)
+    ).first()
+    if missing is None:
+        return False
+    renumber_journal_trades(journal_id)
+    return True
+
+def assign_trade_sequence(trade):
+    """
+    Attribue à un nouveau trade le numéro suivant de son journal (lecture de l'index, sans parcours).
+
+    Le numéro est calculé par une sous-requête de l'INSERT du trade : lecture du dernier numéro et écriture
+    se font dans la même instruction, sous le verrou d'écriture de SQLite, et deux ajouts simultanés
+    dans un journal ne peuvent pas obtenir le même numéro.
+    """
+    with db.session.no_autoflush:
+        ensure_trade_sequence(trade.journal_id)
+    trade.numero_ordre = db.select(db.func.coalesce(db.func.max(Trade.numero_ordre), 0) + 1).where(
+        Trade.journal_id == trade.journal_id
+    ).scalar_subquery()
+
+def release_trade_sequence(trade):
+    """Décale d'un rang les trades enregistrés après un trade supprimé, en une seule requête."""
+    if trade.numero_ordre is None:
+        return
+    Trade.query.filter(
+        Trade.journal_id == trade.journal_id, Trade.numero_ordre > trade.numero_ordre
+    ).update({Trade.numero_ordre: Trade.numero_ordre - 1}, synchronize_session=False)
+
+@app.cli.command('renumber_trades')
+def renumber_trades_command():
+    """Recalcule le numéro d'ordre de tous les trades."""
+    renumber_journal_trades()
+    db.session.commit()
+    print("Numéros d'ordre des trades recalculés.")
+
+TRADES_PAGE_SIZE = 50
+# Tris de la liste des trades : clé -> (libellé, colonne, ordre décroissant)
+TRADE_SORTS = {
+    'enregistrement_desc': ("Ajout le plus récent", Trade.date_enregistrement, True),
+    'enregistrement_asc': ("Ajout le plus ancien", Trade.date_enregistrement, False),
+    'debut_desc': ("Ouverture la plus récente", Trade.date_debut, True),
+    'debut_asc': ("Ouverture la plus ancienne", Trade.date_debut, False),
+}
+TRADE_DEFAULT_SORT = 'enregistrement_desc'
+TRADE_STATUSES = ('EN_COURS', 'TERMINE')
+
+def trade_list_filters_from_request():
+    """Lit les filtres de la liste des trades (instrument, statut, tag, date_from, date_to) dans la query string."""
+    filters = {
+        'instrument': request.args.get('instrument', '').strip() or None,
+        'statut': request.args.get('statut') if request.args.get('statut') in TRADE_STATUSES else None,
+        'tag': request.args.get('tag', '').strip() or None,
+    }
+    filters.update({name: value for name, value in pivot_filters_from_request().items() if name != 'journal_id'})
+    return filters
+
+def trade_list_query(journal_id, instrument=None, statut=None, tag=None, date_from=None, date_to=None):
+    """Trades d'un journal filtrés côté base."""
+    query = Trade.query.filter(Trade.journal_id == journal_id)
+    if instrument:
+        query = query.filter(Trade.instrument == instrument)
+    if statut:
+        query = query.filter(Trade.statut == statut)
+    if date_from:
+        query = query.filter(Trade.date_debut >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        query = query.filter(Trade.date_debut <= datetime.combine(date_to, datetime.max.time()))
+    if tag:
+        query = query.join(trade_tags, trade_tags.c.trade_id == Trade.id).join(
+            Tag, Tag.id == trade_tags.c.tag_id
+        ).filter(Tag.name == tag)
+    return query
+
+def paginate_trades_keyset(query, sort, after=None, before=None, per_page=TRADES_PAGE_SIZE):
+    """
+    Pagination par clé (colonne de tri, id) : chaque page est une lecture d'index bornée,
+    quelle que soit sa position dans le journal.
+
+    :param query: Requête de trade_list_query
+    :param sort: Clé de TRADE_SORTS
+    :param after: Id du dernier trade de la page précédente (page suivante)
+    :param before: Id du premier trade de la page courante (page précédente)
+    :return: (lignes de la page, existence d'une page précédente, existence d'une page suivante)
+    """
+    _, column, descending = TRADE_SORTS[sort]
+    cursor_id = before if before is not None else after
+    backward = before is not None
+    # Sens de parcours effectif : la page précédente se lit dans l'ordre inverse puis se retourne
+    scan_desc = descending != backward
+
+    page_query = query
+    cursor_value = None
+    if cursor_id is not None:
+        cursor_value = query.filter(Trade.id == cursor_id).with_entities(column).scalar()
+    if cursor_value is not None:
+        if scan_desc:
+            page_query = page_query.filter(db.or_(column < cursor_value, db.and_(column == cursor_value, Trade.id < cursor_id)))
+        else:
+            page_query = page_query.filter(db.or_(column > cursor_value, db.and_(column == cursor_value, Trade.id > cursor_id)))
+    order = (column.desc(), Trade.id.desc()) if scan_desc else (column.asc(), Trade.id.asc())
+    rows = page_query.order_by(*order).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backward:
+        rows.reverse()
+        return rows, has_more, True
+    return rows, cursor_value is not None, has_more
+
 @app.route('/trades/<int:journal_id>', methods=['GET', 'POST'])
 def trades(journal_id):
     if 'user_id' not in session:
@@ -1038,27 +2350,33 @@ def trades(journal_id):
         return redirect(url_for('home'))
 
     if request.method == 'POST':
-        date_debut_str = sanitize_string(request.form.get('date_debut'))
-        heure_debut_str = sanitize_string(request.form.get('heure_debut'))
-        session_trade = sanitize_string(request.form.get('session'))
-        instrument_selected = sanitize_string(request.form.get('instrument'))
+        form_fields = {}
+        for name in ('date_debut', 'heure_debut', 'session', 'instrument', 'custom_instrument', 'position',
+                     'prix_entree', 'lot', 'risk_reward', 'tags', 'time_frame'):
+            ok, value = sanitize_string(request.form.get(name))
+            if not ok:
+                flash(f"Champ {name} invalide : {value}")
+                return redirect(url_for('trades', journal_id=journal_id))
+            form_fields[name] = value
+        date_debut_str = form_fields['date_debut']
+        heure_debut_str = form_fields['heure_debut']
+        session_trade = form_fields['session']
+        instrument_selected = form_fields['instrument']
         if instrument_selected == "Autre":
-            instrument = request.form.get('custom_instrument')
-            if not instrument or not instrument.strip():
+            instrument = form_fields['custom_instrument']
+            if not instrument:
                 flash("Veuillez renseigner l'instrument personnalisé si 'Autre' est sélectionné.")
                 return redirect(url_for('trades', journal_id=journal_id))
-            predefined = None
         else:
             instrument = instrument_selected
-            predefined = predefined_instruments.get(instrument)
-        position = sanitize_string(request.form.get('position'))
-        prix_entree_str = sanitize_string(request.form.get('prix_entree'))
-        lot_str = sanitize_string(request.form.get('lot'))
-        rr_str = sanitize_string(request.form.get('risk_reward'))
-        tags = sanitize_string(request.form.get('tags', ''))
+        position = form_fields['position']
+        prix_entree_str = form_fields['prix_entree']
+        lot_str = form_fields['lot']
+        rr_str = form_fields['risk_reward']
+        tags = form_fields['tags']
 
         # --- SUPPRESSION DES CHAMPS LOWER/HIGHER TIME FRAME ---
-        time_frame = sanitize_string(request.form.get('time_frame'))
+        time_frame = form_fields['time_frame']
         if not time_frame:
             flash("Veuillez sélectionner un time frame.")
             return redirect(url_for('trades', journal_id=journal_id))
@@ -1097,77 +2415,18 @@ def trades(journal_id):
             capture_filename = f"{timestamp}_{capture_filename}"
             file.save(os.path.join(app.config['UPLOAD_FOLDER'], capture_filename))
 
-        account_risk = float(request.form.get('account_risk', 100))  # Montant risqué par défaut : 100
-        leverage = journal.levier
-
-        # Correction pour éviter l'erreur lorsque 'prix_sortie' n'est pas défini
-        prix_sortie_str = request.form.get('prix_sortie')
-        if predefined:
-            instr_type = predefined["type"]
-            if instr_type == "forex":
-                pip_size = 0.01 if predefined["quote_currency"] == "JPY" else 0.0001
-                if prix_sortie_str:
-                    prix_sortie = float(prix_sortie_str.replace(',', '.'))
-                    pips = (prix_sortie - prix_entree) / pip_size if position.lower() == "achat" else (prix_entree - prix_sortie) / pip_size
-                    raw_result = pips * lot * predefined["pip_value"]
-                    montant_injecte = abs(prix_entree * lot * predefined["pip_value"])
-                else:
-                    raw_result = None
-                    montant_injecte = abs(prix_entree * lot * predefined["pip_value"])
-                trade_currency = predefined["quote_currency"]
-            elif instr_type == "stock":
-                if prix_sortie_str:
-                    prix_sortie = float(prix_sortie_str.replace(',', '.'))
-                    raw_result = (prix_sortie - prix_entree) * lot
-                else:
-                    raw_result = None
-                montant_injecte = abs(prix_entree * lot)
-                trade_currency = predefined["currency"]
-            elif instr_type == "futures":
-                if prix_sortie_str:
-                    prix_sortie = float(prix_sortie_str.replace(',', '.'))
-                    raw_result = (prix_sortie - prix_entree) * predefined["contract_size"] * predefined["point_value"] if position.lower() == "achat" else (prix_entree - prix_sortie) * predefined["contract_size"] * predefined["point_value"]
-                else:
-                    raw_result = None
-                montant_injecte = abs(prix_entree * predefined["contract_size"] * predefined["point_value"])
-                trade_currency = predefined["currency"]
-            elif instr_type == "commodity":
-                if prix_sortie_str:
-                    prix_sortie = float(prix_sortie_str.replace(',', '.'))
-                    raw_result = (prix_sortie - prix_entree) * predefined["contract_size"] if position.lower() == "achat" else (prix_entree - prix_sortie) * predefined["contract_size"]
-                else:
-                    raw_result = None
-                montant_injecte = abs(prix_entree * predefined["contract_size"])
-                trade_currency = predefined["currency"]
-            else:
-                if prix_sortie_str:
-                    prix_sortie = float(prix_sortie_str.replace(',', '.'))
-                    raw_result = (prix_sortie - prix_entree) * lot if position.lower() == "achat" else (prix_entree - prix_sortie) * lot
-                else:
-                    raw_result = None
-                montant_injecte = abs(prix_entree * lot)
-                trade_currency = journal.devise
-        else:
-            if prix_sortie_str:
-                prix_sortie = float(prix_sortie_str.replace(',', '.'))
-                raw_result = (prix_sortie - prix_entree) * lot if position.lower() == "achat" else (prix_entree - prix_sortie) * lot
-            else:
-                raw_result = None
-            montant_injecte = abs(prix_entree * lot)
-            trade_currency = journal.devise
-
-        if raw_result is not None:
-            journal_currency = journal.devise
-            conversion_rate = conversion_rates.get((trade_currency, journal_currency), 1)
-            result_converted = raw_result * conversion_rate
-        else:
-            result_converted = None
+        # Clôture saisie dès la création : date, heure et prix de sortie
+        date_fin = prix_sortie = None
+        if request.form.get('date_fin') and request.form.get('heure_fin') and request.form.get('prix_sortie'):
+            try:
+                date_fin = datetime.strptime(request.form.get('date_fin') + ' ' + request.form.get('heure_fin'), '%Y-%m-%d %H:%M')
+                prix_sortie = float(request.form.get('prix_sortie').replace(',', '.'))
+            except ValueError:
+                flash("Valeur incorrecte pour le prix de sortie ou la date de fin.")
+                return redirect(url_for('trades', journal_id=journal_id))
+        resultat, pourcentage, _ = price_journal_trade(journal, instrument, position, prix_entree, prix_sortie, lot,
+                                                       date=date_fin or date_debut)
 
-        # Pourcentage basé sur le capital initial du journal
-        if result_converted is not None and journal.capital_initial:
-            pourcentage = (result_converted / journal.capital_initial) * 100
-        else:
-            pourcentage = 0
         # --- ENREGISTREMENT DU TRADE ---
         from datetime import datetime as dt
         date_enregistrement = dt.now()
@@ -1183,78 +2442,275 @@ def trades(journal_id):
             commentaires=request.form.get('commentaires', ''),
             capture=capture_filename,
             journal_id=journal.id,
-            resultat=result_converted,
+            resultat=resultat,
             pourcentage=pourcentage,
-            tags=tags,
             date_enregistrement=date_enregistrement
         )
-        if request.form.get('date_fin') and request.form.get('heure_fin') and request.form.get('prix_sortie'):
-            try:
-                date_fin = datetime.strptime(request.form.get('date_fin') + ' ' + request.form.get('heure_fin'), '%Y-%m-%d %H:%M')
-                prix_sortie = float(request.form.get('prix_sortie').replace(',', '.'))
-                # Recalcule le résultat et le montant injecté à la clôture
-                if predefined:
-                    instr_type = predefined["type"]
-                    if instr_type == "forex":
-                        pip_size = 0.01 if predefined["quote_currency"] == "JPY" else 0.0001
-                        pips = (prix_sortie - prix_entree) / pip_size if position.lower() == "achat" else (prix_entree - prix_sortie) / pip_size
-                        raw_result = pips * lot * predefined["pip_value"]
-                        montant_injecte = abs(prix_entree * lot * predefined["pip_value"])
-                        trade_currency = predefined["quote_currency"]
-                    elif instr_type == "stock":
-                        raw_result = (prix_sortie - prix_entree) * lot if position.lower() == "achat" else (prix_entree - prix_sortie) * lot
-                        montant_injecte = abs(prix_entree * lot)
-                        trade_currency = predefined["currency"]
-                    elif instr_type == "futures":
-                        raw_result = (prix_sortie - prix_entree) * predefined["contract_size"] * predefined["point_value"] if position.lower() == "achat" else (prix_entree - prix_sortie) * predefined["contract_size"] * predefined["point_value"]
-                        montant_injecte = abs(prix_entree * predefined["contract_size"] * predefined["point_value"])
-                        trade_currency = predefined["currency"]
-                    elif instr_type == "commodity":
-                        raw_result = (prix_sortie - prix_entree) * predefined["contract_size"] if position.lower() == "achat" else (prix_entree - prix_sortie) * predefined["contract_size"]
-                        montant_injecte = abs(prix_entree * predefined["contract_size"])
-                        trade_currency = predefined["currency"]
-                    else:
-                        raw_result = (prix_sortie - prix_entree) * lot if position.lower() == "achat" else (prix_entree - prix_sortie) * lot
-                        montant_injecte = abs(prix_entree * lot)
-                        trade_currency = journal.devise
-                else:
-                    raw_result = (prix_sortie - prix_entree) * lot if position.lower() == "achat" else (prix_entree - prix_sortie) * lot
-                    montant_injecte = abs(prix_entree * lot)
-                    trade_currency = journal.devise
-                journal_currency = journal.devise
-                conversion_rate = conversion_rates.get((trade_currency, journal_currency), 1)
-                result_converted = raw_result * conversion_rate
-                # Pourcentage basé sur le capital initial du journal
-                if result_converted is not None and journal.capital_initial:
-                    pourcentage = (result_converted / journal.capital_initial) * 100
-                else:
-                    pourcentage = 0
-                new_trade.date_fin = date_fin
-                new_trade.prix_sortie = prix_sortie
-                new_trade.resultat = result_converted
-                new_trade.pourcentage = pourcentage
-                new_trade.statut = "TERMINE"
-            except ValueError:
-                flash("Valeur incorrecte pour le prix de sortie ou la date de fin.")
-                return redirect(url_for('trades', journal_id=journal_id))
+        set_trade_tags(new_trade, tags)
+        assign_trade_sequence(new_trade)
+        if prix_sortie is not None:
+            new_trade.date_fin = date_fin
+            new_trade.prix_sortie = prix_sortie
+            new_trade.statut = "TERMINE"
         db.session.add(new_trade)
+        update_journal_stats(journal.id, after=journal_trade_contribution(new_trade))
         db.session.commit()
         flash("Trade enregistré avec succès.")
         return redirect(url_for('trades', journal_id=journal.id))
 
-    trades_encours = Trade.query.filter_by(journal_id=journal.id, statut="EN_COURS").order_by(Trade.date_enregistrement.asc(), Trade.id.asc()).all()
-    trades_termine = Trade.query.filter(Trade.journal_id == journal.id, Trade.statut == "TERMINE").order_by(Trade.date_enregistrement.asc(), Trade.id.asc()).all()
-    trades_ordered = Trade.query.filter_by(journal_id=journal.id).order_by(Trade.date_enregistrement.asc(), Trade.id.asc()).all()
-    numero_ordre_map = {t.id: idx for idx, t in enumerate(trades_ordered, start=1)}
+    filters = trade_list_filters_from_request()
+    sort = request.args.get('sort', TRADE_DEFAULT_SORT)
+    if sort not in TRADE_SORTS:
+        sort = TRADE_DEFAULT_SORT
+    if ensure_trade_sequence(journal.id):
+        db.session.commit()
+    trade_rows, has_prev, has_next = paginate_trades_keyset(
+        trade_list_query(journal.id, **filters), sort,
+        after=request.args.get('after', type=int),
+        before=request.args.get('before', type=int)
+    )
+    # Paramètres à conserver dans les liens de pagination
+    list_args = {name: value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else value
+                 for name, value in filters.items() if value}
+    list_args['sort'] = sort
 
     return render_template(
         'trades.html',
         journal=journal,
-        trades_encours=trades_encours,
-        trades_termine=trades_termine,
-        numero_ordre_map=numero_ordre_map
+        trade_rows=trade_rows,
+        has_prev=has_prev,
+        has_next=has_next,
+        filters=filters,
+        sort=sort,
+        sorts=TRADE_SORTS,
+        list_args=list_args,
+        instrument_choices=instrument_choices(),
+        parquet_export=parquet_available()
     )
 
+IMPORT_CHUNK_SIZE = 2000
+
+_SQL_LINK_IMPORTED_TAG = """
+    INSERT OR IGNORE INTO trade_tags (trade_id, tag_id)
+    SELECT trades.id, tags.id FROM trades, tags
+    WHERE trades.journal_id = ? AND trades.import_hash = ? AND tags.name = ?
+"""
+
+def _sql_datetime(value):
+    """Date au format de stockage de SQLAlchemy pour SQLite."""
+    return value.isoformat(sep=' ', timespec='microseconds') if value else None
+
+def import_trades(journal, text_stream, fmt=None, chunk_size=IMPORT_CHUNK_SIZE, refresh_leaderboard=True):
+    """
+    Importe un relevé de courtier dans un journal, en flux et par lots (voir import_parsed_trades).
+
+    :param text_stream: Flux texte du relevé (voir trade_import.open_statement)
+    :param fmt: Format imposé ("csv", "mt4", "mt5"), détecté si None
+    :return: ImportReport
+    :raises StatementFormatError: Si le relevé est illisible
+    """
+    return import_parsed_trades(journal, parse_statement(text_stream, fmt), chunk_size, refresh_leaderboard)
+
+def import_parsed_trades(journal, parsed, chunk_size=IMPORT_CHUNK_SIZE, refresh_leaderboard=True):
+    """
+    Importe dans un journal des lignes de relevé déjà lues, par lots.
+
+    Chaque lot est valorisé en une passe vectorisée (pricing.price_trades) puis inséré par executemany
+    dans sa propre transaction. Les doublons (même ouverture dans le journal, y compris d'un import précédent)
+    sont écartés par l'index unique (journal_id, import_hash) ; une position importée ouverte et relevée
+    clôturée ensuite est clôturée et revalorisée (trade_import.write_imported_trades).
+
+    :param parsed: Lignes (numéro, trade normalisé, motif de rejet) produites par trade_import.parse_statement
+    :param refresh_leaderboard: Recalcule les totaux des classements (False quand l'appelant s'en charge
+                                une seule fois pour plusieurs imports, voir report.earliest_close)
+    :return: ImportReport
+    :raises StatementFormatError: Si le relevé est illisible (les lots déjà validés restent importés
+                                  et le journal est mis à jour en conséquence, voir trade_import.import_in_chunks)
+    """
+    instruments = instrument_registry.instruments()
+    aliases = {normalize_symbol(symbol): symbol for symbol in instruments}
+    conn = get_db_connection()
+
+    def insert_chunk(rows):
+        for row in rows:
+            row['instrument'] = aliases.get(normalize_symbol(row['instrument']), row['instrument'])
+            if row['date_fin'] is None:
+                row['prix_sortie'] = None
+        count = len(rows)
+        priced = price_trades(
+            [row['instrument'] for row in rows], [row['position'] for row in rows],
+            [row['prix_entree'] for row in rows], [row['prix_sortie'] for row in rows],
+            [row['lot'] for row in rows], [journal.devise] * count,
+            [journal.capital_initial] * count, [journal.levier] * count,
+            instruments, conversion_rates,
+            dates=[to_epoch(row['date_fin'] or row['date_debut']) for row in rows], fx=fx_rates
+        )
+        now = _sql_datetime(datetime.now())
+        params, closes, tag_links = [], [], []
+        for row, resultat, pourcentage in zip(rows, priced.resultat, priced.pourcentage):
+            closed = row['prix_sortie'] is not None
+            digest = trade_hash(row)
+            if closed:
+                closes.append((_sql_datetime(row['date_fin']), row['prix_sortie'], float(resultat), float(pourcentage),
+                               journal.id, digest))
+            params.append((
+                journal.id, _sql_datetime(row['date_debut']), _sql_datetime(row['date_fin']),
+                row['session'] or market_session(row['date_debut']), row['instrument'], row['position'],
+                row['prix_entree'], row['prix_sortie'], row['lot'], row['risk_reward'] or '',
+                row['time_frame'], row['commentaires'], float(resultat) if closed else None,
+                float(pourcentage), "TERMINE" if closed else "EN_COURS", row['tags'], now, digest
+            ))
+            tag_links.extend((journal.id, digest, tag) for tag in split_tags(row['tags']))
+        with conn:
+            written = write_imported_trades(conn, params, closes)
+            if tag_links:
+                conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", {(tag,) for _, _, tag in tag_links})
+                conn.executemany(_SQL_LINK_IMPORTED_TAG, tag_links)
+        return written
+
+    def finalize(report, completed):
+        renumber_journal_trades(journal.id)
+        rebuild_journal_stats(journal.id)
+        Journal.query.filter_by(id=journal.id).update(
+            {Journal.data_version: Journal.data_version + 1}, synchronize_session=False
+        )
+        # Après un échec l'appelant ne reçoit pas le bilan : les classements sont recalculés ici
+        if (refresh_leaderboard or not completed) and report.earliest_close is not None:
+            refresh_leaderboard_totals(since=report.earliest_close.date())
+        db.session.commit()
+
+    try:
+        return import_in_chunks(parsed, chunk_size, insert_chunk, finalize)
+    finally:
+        conn.close()
+
+@app.route('/import_trades/<int:journal_id>', methods=['GET', 'POST'])
+def import_trades_view(journal_id):
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    journal = Journal.query.filter_by(id=journal_id, user_id=session['user_id']).first()
+    if not journal:
+        flash("Journal introuvable ou non autorisé.")
+        return redirect(url_for('home'))
+    if request.method == 'POST':
+        file = request.files.get('statement')
+        if not file or not file.filename:
+            flash("Veuillez sélectionner un relevé à importer.")
+            return redirect(url_for('import_trades_view', journal_id=journal.id))
+        fmt = request.form.get('format') or None
+        if fmt is not None and fmt not in IMPORT_FORMATS:
+            flash("Format de relevé inconnu.")
+            return redirect(url_for('import_trades_view', journal_id=journal.id))
+        try:
+            report = import_trades(journal, open_statement(file.stream), fmt)
+        except (StatementFormatError, UnicodeDecodeError) as e:
+            flash(f"Relevé illisible : {e}")
+            return redirect(url_for('import_trades_view', journal_id=journal.id))
+        flash(report.summary())
+        for line_number, reason in report.rejected[:10]:
+            flash(f"Ligne {line_number} rejetée : {reason}")
+        return redirect(url_for('trades', journal_id=journal.id))
+    return render_template('import_trades.html', journal=journal, formats=IMPORT_FORMATS)
+
+@app.cli.command('import_trades')
+@click.argument('journal_id', type=int)
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None, help="Format du relevé (détecté par défaut)")
+def import_trades_command(journal_id, path, fmt):
+    """Importe un relevé CSV, MT4 ou MT5 dans un journal."""
+    journal = db.session.get(Journal, journal_id)
+    if journal is None:
+        raise click.ClickException(f"Journal {journal_id} introuvable.")
+    with open(path, 'rb') as f:
+        report = import_trades(journal, open_statement(f), fmt)
+    print(report.summary())
+    for line_number, reason in report.rejected:
+        print(f"Ligne {line_number} rejetée : {reason}")
+
+EXPORT_MODELS = {'trades': Trade, 'analyses': Analysis, 'reflections': ReflectionEntry}
+EXPORT_BATCH_SIZE = 5000
+
+def export_rows(dataset, journal_ids):
+    """
+    Lignes d'un jeu de données exporté pour des journaux, lues par un curseur en flux.
+
+    Les lignes sont produites au fil de la lecture (yield_per) : la mémoire utilisée ne dépend pas
+    du nombre de trades. Les réflexions sont celles rattachées aux trades des journaux.
+    """
+    model = EXPORT_MODELS[dataset]
+    query = db.select(*[getattr(model, name) for name in column_names(dataset)]).order_by(model.id)
+    if dataset == 'reflections':
+        query = query.join(Trade, ReflectionEntry.trade_id == Trade.id).where(Trade.journal_id.in_(journal_ids))
+    else:
+        query = query.where(model.journal_id.in_(journal_ids))
+    for partition in db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE)).partitions():
+        for row in partition:
+            yield tuple(row)
+
+def export_response(dataset, fmt, journal_ids, filename):
+    """Réponse HTTP diffusant l'export en morceaux (le fichier n'est jamais assemblé en mémoire)."""
+    chunks = export_chunks(dataset, fmt, export_rows(dataset, journal_ids), EXPORT_BATCH_SIZE)
+    return Response(stream_with_context(chunks), mimetype=EXPORT_MIMETYPES[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}.{fmt}"'})
+
+def export_request_error(dataset, fmt):
+    """Message d'erreur d'une demande d'export, ou None si elle est valide."""
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        return "Export inconnu."
+    if fmt == 'parquet' and not parquet_available():
+        return "L'export Parquet n'est pas disponible sur ce serveur (pyarrow non installé)."
+    return None
+
+@app.route('/export/journal/<int:journal_id>/<dataset>.<fmt>')
+def export_journal_data(journal_id, dataset, fmt):
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    journal = Journal.query.filter_by(id=journal_id, user_id=session['user_id']).first()
+    if not journal:
+        flash("Journal introuvable ou non autorisé.")
+        return redirect(url_for('home'))
+    error = export_request_error(dataset, fmt)
+    if error:
+        flash(error)
+        return redirect(url_for('trades', journal_id=journal.id))
+    return export_response(dataset, fmt, [journal.id], f"journal_{journal.id}_{dataset}")
+
+@app.route('/export/<dataset>.<fmt>')
+def export_user_data(dataset, fmt):
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    error = export_request_error(dataset, fmt)
+    if error:
+        flash(error)
+        return redirect(url_for('home'))
+    journal_ids = [journal_id for (journal_id,) in db.session.query(Journal.id).filter_by(user_id=session['user_id'])]
+    return export_response(dataset, fmt, journal_ids, dataset)
+
+@app.cli.command('export_data')
+@click.argument('dataset', type=click.Choice(list(EXPORT_DATASETS)))
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--journal', 'journal_id', type=int, default=None, help="Journal exporté")
+@click.option('--user', 'user_id', type=int, default=None, help="Utilisateur exporté (tous ses journaux)")
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='csv', help="Format du fichier")
+def export_data_command(dataset, path, journal_id, user_id, fmt):
+    """Exporte les trades, analyses ou réflexions d'un journal ou d'un utilisateur."""
+    if (journal_id is None) == (user_id is None):
+        raise click.ClickException("Indiquez soit --journal, soit --user.")
+    error = export_request_error(dataset, fmt)
+    if error:
+        raise click.ClickException(error)
+    if journal_id is not None:
+        journal_ids = [journal_id]
+    else:
+        journal_ids = [journal_id for (journal_id,) in db.session.query(Journal.id).filter_by(user_id=user_id)]
+    started = time.perf_counter()
+    size = 0
+    with open(path, 'wb') as f:
+        for chunk in export_chunks(dataset, fmt, export_rows(dataset, journal_ids), EXPORT_BATCH_SIZE):
+            f.write(chunk)
+            size += len(chunk)
+    print(f"{dataset} exporté(s) dans {path} ({size / 1024:.0f} Ko en {time.perf_counter() - started:.2f} s).")
+
 @app.route('/trade/<int:trade_id>', methods=['GET', 'POST'])
 def trade_detail(trade_id):
     if 'user_id' not in session:
@@ -1267,13 +2723,9 @@ def trade_detail(trade_id):
     if not journal or journal.user.id != session['user_id']:
         flash("Accès non autorisé.")
         return redirect(url_for('home'))
-    # Calcul du numéro d'ordre du trade dans le journal (par date_debut croissante)
-    trades_ordered = Trade.query.filter_by(journal_id=journal.id).order_by(Trade.date_debut.asc(), Trade.id.asc()).all()
-    numero_ordre = None
-    for idx, t in enumerate(trades_ordered, start=1):
-        if t.id == trade.id:
-            numero_ordre = idx
-            break
+    if trade.numero_ordre is None and ensure_trade_sequence(journal.id):
+        db.session.commit()
+        db.session.refresh(trade)
     if request.method == 'POST':
         date_fin_str = request.form.get('date_fin')
         heure_fin_str = request.form.get('heure_fin')
@@ -1282,21 +2734,90 @@ def trade_detail(trade_id):
             try:
                 date_fin = datetime.strptime(date_fin_str + ' ' + heure_fin_str, '%Y-%m-%d %H:%M')
                 prix_sortie = float(prix_sortie_str.replace(',', '.'))
+                before = journal_trade_contribution(trade)
                 trade.date_fin = date_fin
                 trade.prix_sortie = prix_sortie
-                if trade.position.lower() == "achat":
-                    trade.resultat = (prix_sortie - trade.prix_entree) * trade.lot
-                    trade.pourcentage = ((prix_sortie - trade.prix_entree) / trade.prix_entree) * 100
-                else:
-                    trade.resultat = (trade.prix_entree - prix_sortie) * trade.lot
-                    trade.pourcentage = ((trade.prix_entree - prix_sortie) / trade.prix_entree) * 100
+                reprice_trade(journal, trade)
                 trade.statut = "TERMINE"
+                update_journal_stats(journal.id, before=before, after=journal_trade_contribution(trade))
                 db.session.commit()
                 flash("Trade mis à jour et terminé.")
             except ValueError:
                 flash("Valeur incorrecte pour le prix de sortie ou la date de fin.")
         return redirect(url_for('trade_detail', trade_id=trade.id))
-    return render_template('trade_detail.html', trade=trade, numero_ordre=numero_ordre)
+    return render_template('trade_detail.html', trade=trade, numero_ordre=trade.numero_ordre)
+
+@app.route('/close_trades/<int:journal_id>', methods=['GET', 'POST'])
+def close_trades_view(journal_id):
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    journal = Journal.query.filter_by(id=journal_id, user_id=session['user_id']).first()
+    if not journal:
+        flash("Journal introuvable ou non autorisé.")
+        return redirect(url_for('home'))
+    if request.method == 'POST':
+        closes = []
+        for trade_id in request.form.getlist('trade_id', type=int):
+            prix_sortie = parse_float(request.form.get(f'prix_sortie_{trade_id}'), None)
+            date_fin = parse_datetime(request.form.get(f'date_fin_{trade_id}') or request.form.get('date_fin'),
+                                      request.form.get(f'heure_fin_{trade_id}') or request.form.get('heure_fin'))
+            if prix_sortie is None or date_fin is None:
+                flash(f"Prix de sortie ou date de fin manquant pour le trade {trade_id}.")
+                return redirect(url_for('close_trades_view', journal_id=journal.id))
+            closes.append((trade_id, prix_sortie, date_fin))
+        if not closes:
+            flash("Aucun trade sélectionné.")
+            return redirect(url_for('close_trades_view', journal_id=journal.id))
+        try:
+            closed = close_trades(journal, closes)
+        except ValueError as e:
+            db.session.rollback()
+            flash(str(e))
+            return redirect(url_for('close_trades_view', journal_id=journal.id))
+        db.session.commit()
+        flash(f"{len(closed)} trade(s) clôturé(s).")
+        return redirect(url_for('trades', journal_id=journal.id))
+    open_trades = Trade.query.filter_by(journal_id=journal.id, statut="EN_COURS").order_by(Trade.date_debut, Trade.id).all()
+    return render_template('close_trades.html', journal=journal, open_trades=open_trades, now=datetime.now())
+
+@app.route('/api/journal/<int:journal_id>/close_trades', methods=['POST'])
+def api_close_trades(journal_id):
+    """
+    Clôture en une transaction une liste de positions ouvertes.
+
+    Corps JSON : {"trades": [{"trade_id": 1, "prix_sortie": 1.0850, "date_fin": "2024-05-02 17:30"}, ...]}
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': "Authentification requise."}), 401
+    journal = Journal.query.filter_by(id=journal_id, user_id=session['user_id']).first()
+    if not journal:
+        return jsonify({'error': "Journal introuvable."}), 404
+    payload = request.get_json(silent=True) or {}
+    items = payload.get('trades')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': "Liste de trades à clôturer attendue."}), 400
+    closes = []
+    for item in items:
+        try:
+            date_fin = datetime.fromisoformat(item['date_fin'])
+            closes.append((int(item['trade_id']), float(item['prix_sortie']), date_fin))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': f"Clôture invalide : {item}"}), 400
+        if date_fin.tzinfo is not None:
+            return jsonify({'error': f"Date de clôture sans fuseau horaire attendue : {item['date_fin']}"}), 400
+    try:
+        closed = close_trades(journal, closes)
+    except (ValueError, TypeError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    return jsonify({
+        'closed': [
+            {'trade_id': trade.id, 'resultat': trade.resultat, 'pourcentage': trade.pourcentage}
+            for trade in closed
+        ],
+        'data_version': journal.data_version,
+    })
 
 @app.route('/edit_trade/<int:trade_id>', methods=['GET', 'POST'])
 def edit_trade(trade_id):
@@ -1311,6 +2832,7 @@ def edit_trade(trade_id):
         flash("Accès non autorisé.")
         return redirect(url_for('home'))
     if request.method == 'POST':
+        before = journal_trade_contribution(trade)
         try:
             trade.date_debut = datetime.strptime(request.form['date_debut'] + ' ' + request.form['heure_debut'], '%Y-%m-%d %H:%M')
             trade.session = request.form['session']
@@ -1320,13 +2842,14 @@ def edit_trade(trade_id):
             trade.lot = float(request.form['lot'])
             trade.risk_reward = request.form['risk_reward']
             trade.commentaires = request.form['commentaires']
-            trade.tags = request.form['tags']
+            set_trade_tags(trade, request.form['tags'])
             if request.form.get('date_fin') and request.form.get('heure_fin') and request.form.get('prix_sortie'):
                 trade.date_fin = datetime.strptime(request.form['date_fin'] + ' ' + request.form['heure_fin'], '%Y-%m-%d %H:%M')
                 trade.prix_sortie = float(request.form.get('prix_sortie').replace(',', '.'))
-                trade.resultat = (trade.prix_sortie - trade.prix_entree) * trade.lot
-                trade.pourcentage = ((trade.prix_sortie - trade.prix_entree) / trade.prix_entree) * 100
                 trade.statut = "TERMINE"
+            if trade.prix_sortie is not None:
+                reprice_trade(journal, trade)
+            update_journal_stats(journal.id, before=before, after=journal_trade_contribution(trade))
             db.session.commit()
             flash("Trade modifié avec succès.")
         except ValueError:
@@ -1346,7 +2869,10 @@ def delete_trade(trade_id):
     if not journal or journal.user.id != session['user_id']:
         flash("Accès non autorisé.")
         return redirect(url_for('home'))
+    before = journal_trade_contribution(trade)
     db.session.delete(trade)
+    release_trade_sequence(trade)
+    update_journal_stats(journal.id, before=before)
     db.session.commit()
     flash("Trade supprimé avec succès.")
     return redirect(url_for('trades', journal_id=journal.id))
@@ -1412,7 +2938,127 @@ def link_platform(journal_id):
         flash("Plateforme liée avec succès.")
         return redirect(url_for('link_platform', journal_id=journal.id))
     links = PlatformLink.query.filter_by(journal_id=journal.id).all()
-    return render_template('link_platform.html', journal=journal, links=links)
+    return render_template('link_platform.html', journal=journal, links=links,
+                           sync_folders={link.id: platform_link_folder(link) for link in links})
+
+platform_sync_locks = LinkLocks()
+
+def platform_link_folder(link):
+    return link_folder(app.config['PLATFORM_SYNC_DIR'], link.plateforme, link.identifiant)
+
+def sync_platform_link(link_id, refresh_leaderboard=True):
+    """
+    Importe les nouveaux relevés déposés pour un lien de plateforme.
+
+    Seuls les relevés modifiés depuis la dernière synchronisation sont lus, et seuls leurs trades
+    postérieurs au point de synchronisation du lien sont importés ; les doublons restent écartés
+    par l'empreinte des trades. En cas d'échec le point n'avance pas : le prochain passage relit les mêmes relevés.
+
+    :param link_id: Identifiant du lien
+    :param refresh_leaderboard: Voir import_parsed_trades
+    :return: ImportReport, ou None si aucun nouveau relevé n'a été déposé (ou le lien est déjà en cours de synchronisation)
+    """
+    lock = platform_sync_locks.get(link_id)
+    if not lock.acquire(blocking=False):
+        return None
+    try:
+        link = db.session.get(PlatformLink, link_id)
+        if link is None:
+            return None
+        statements = pending_statements(platform_link_folder(link), link.sync_file_mtime)
+        if not statements:
+            return None
+        try:
+            parsed = read_statements([path for _, path in statements])
+            report = import_parsed_trades(link.journal, after_watermark(parsed, link.sync_watermark),
+                                          refresh_leaderboard=refresh_leaderboard)
+        except Exception as e:
+            db.session.rollback()
+            link.last_sync_at = datetime.utcnow()
+            link.last_sync_status = 'erreur'
+            link.last_sync_message = str(e)
+            db.session.commit()
+            raise
+        if report.latest_trade_at is not None and (link.sync_watermark is None or report.latest_trade_at > link.sync_watermark):
+            link.sync_watermark = report.latest_trade_at
+        link.sync_file_mtime = statements[-1][0]
+        link.last_sync_at = datetime.utcnow()
+        link.last_sync_status = 'ok'
+        link.last_sync_message = report.summary()
+        db.session.commit()
+        return report
+    finally:
+        lock.release()
+
+def sync_platform_links(link_ids=None, max_workers=None):
+    """
+    Synchronise des liens de plateforme en parallèle sur un pool de threads borné.
+
+    Chaque lien est traité dans son propre contexte d'application (donc sa propre session) ;
+    les totaux des classements sont recalculés une seule fois, à partir de la plus ancienne clôture importée.
+
+    :param link_ids: Liens à synchroniser (None = tous)
+    :param max_workers: Taille du pool (PLATFORM_SYNC_WORKERS par défaut)
+    :return: Liste de (identifiant du lien, ImportReport ou None, exception ou None)
+    """
+    if link_ids is None:
+        link_ids = [link_id for (link_id,) in db.session.query(PlatformLink.id).order_by(PlatformLink.id)]
+
+    def sync_in_context(link_id):
+        with app.app_context():
+            return sync_platform_link(link_id, refresh_leaderboard=False)
+
+    results = run_bounded(sync_in_context, link_ids, max_workers or app.config['PLATFORM_SYNC_WORKERS'])
+    closes = [report.earliest_close for _, report, _ in results
+              if report is not None and (report.inserted or report.closed) and report.earliest_close is not None]
+    if closes:
+        refresh_leaderboard_totals(since=min(closes).date())
+        db.session.commit()
+    return results
+
+def scheduled_platform_sync():
+    """Tâche planifiée : synchronise toutes les plateformes liées dans un contexte d'application."""
+    with app.app_context():
+        try:
+            results = sync_platform_links()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Erreur lors de la synchronisation des plateformes : {e}")
+            return
+        for link_id, _, error in results:
+            if error is not None:
+                logging.error(f"Erreur lors de la synchronisation du lien {link_id} : {error}")
+
+@app.route('/sync_platform/<int:link_id>', methods=['POST'])
+def sync_platform(link_id):
+    if 'user_id' not in session:
+        return redirect(url_for('login'))
+    link = db.session.get(PlatformLink, link_id)
+    if not link or link.journal.user_id != session['user_id']:
+        flash("Plateforme introuvable ou non autorisée.")
+        return redirect(url_for('home'))
+    journal_id = link.journal_id
+    try:
+        report = sync_platform_link(link.id)
+    except Exception as e:
+        flash(f"Erreur lors de la synchronisation : {e}")
+        return redirect(url_for('link_platform', journal_id=journal_id))
+    flash(report.summary() if report else "Aucun nouveau relevé à synchroniser.")
+    return redirect(url_for('link_platform', journal_id=journal_id))
+
+@app.cli.command('sync_platforms')
+@click.option('--workers', type=int, default=None, help="Taille du pool de synchronisation")
+def sync_platforms_command(workers):
+    """Synchronise toutes les plateformes liées à partir de leurs dossiers de relevés."""
+    started = time.perf_counter()
+    results = sync_platform_links(max_workers=workers)
+    for link_id, report, error in results:
+        if error is not None:
+            print(f"Lien {link_id} : erreur - {error}")
+        elif report is not None:
+            print(f"Lien {link_id} : {report.summary()}")
+    synced = sum(1 for _, report, _ in results if report is not None)
+    print(f"{len(results)} lien(s) vérifié(s), {synced} synchronisé(s) en {time.perf_counter() - started:.2f} s.")
 
 # 6. Paramètres utilisateur
 @app.route('/parametres', methods=['GET', 'POST'])
@@ -1585,6 +3231,89 @@ def admin():
         return redirect(url_for('home'))
     return render_template('admin.html', users=users)
 
+def save_instrument(symbol, type_, currency, label=None, **values):
+    """
+    Crée ou met à jour un instrument et incrémente la version du registre (commit à la charge de l'appelant).
+
+    :raises ValueError: Si la description de l'instrument est incomplète (voir instrument_spec)
+    """
+    instrument_spec(type_, currency, **values)
+    instrument = Instrument.query.filter_by(symbol=symbol).first()
+    if instrument is None:
+        instrument = Instrument(symbol=symbol)
+        db.session.add(instrument)
+    instrument.label = label or None
+    instrument.type = type_
+    instrument.currency = currency
+    for field in ('pip_value', 'multiplier', 'contract_size', 'point_value'):
+        setattr(instrument, field, values.get(field) if field in INSTRUMENT_FIELDS[type_] else None)
+    bump_registry_version('instruments')
+    return instrument
+
+def seed_instruments():
+    """Copie dans la table les instruments de predefined_instruments qui n'y sont pas encore."""
+    existing = {symbol for (symbol,) in db.session.query(Instrument.symbol).all()}
+    added = 0
+    for symbol, spec in predefined_instruments.items():
+        if symbol in existing:
+            continue
+        values = {field: spec[field] for field in INSTRUMENT_FIELDS[spec['type']]}
+        save_instrument(symbol, spec['type'], spec.get('quote_currency') or spec['currency'],
+                        label=spec.get('label'), **values)
+        added += 1
+    return added
+
+@app.cli.command('seed_instruments')
+def seed_instruments_command():
+    """Initialise la table des instruments à partir de predefined_instruments."""
+    added = seed_instruments()
+    db.session.commit()
+    print(f"{added} instrument(s) ajouté(s).")
+
+@app.route('/admin/instruments', methods=['GET', 'POST'])
+def admin_instruments():
+    if 'user_id' not in session or not session.get('is_admin'):
+        flash("Accès refusé.")
+        return redirect(url_for('login'))
+    if request.method == 'POST':
+        ok, symbol = sanitize_string(request.form.get('symbol'), min_length=1, max_length=50, allow_empty=False)
+        if not ok:
+            flash(f"Symbole invalide : {symbol}")
+            return redirect(url_for('admin_instruments'))
+        ok, label = sanitize_string(request.form.get('label'), max_length=100)
+        if not ok:
+            flash(f"Libellé invalide : {label}")
+            return redirect(url_for('admin_instruments'))
+        values = {field: parse_float(request.form.get(field), None)
+                  for field in ('pip_value', 'multiplier', 'contract_size', 'point_value')}
+        try:
+            save_instrument(symbol, request.form.get('type', ''), request.form.get('currency', '').strip().upper(),
+                            label=label, **values)
+        except ValueError as e:
+            flash(str(e))
+            return redirect(url_for('admin_instruments'))
+        db.session.commit()
+        instrument_registry.invalidate()
+        flash(f"Instrument {symbol} enregistré. Lancez « flask reprice_trades » pour revaloriser les trades existants.")
+        return redirect(url_for('admin_instruments'))
+    instruments = Instrument.query.order_by(Instrument.type, Instrument.symbol).all()
+    return render_template('admin_instruments.html', instruments=instruments, types=list(INSTRUMENT_FIELDS),
+                           group_labels=INSTRUMENT_GROUP_LABELS)
+
+@app.route('/admin/instruments/<int:instrument_id>/delete', methods=['POST'])
+def delete_instrument(instrument_id):
+    if 'user_id' not in session or not session.get('is_admin'):
+        flash("Accès refusé.")
+        return redirect(url_for('login'))
+    instrument = db.session.get(Instrument, instrument_id)
+    if instrument:
+        db.session.delete(instrument)
+        bump_registry_version('instruments')
+        db.session.commit()
+        instrument_registry.invalidate()
+        flash(f"Instrument {instrument.symbol} supprimé.")
+    return redirect(url_for('admin_instruments'))
+
 @app.route('/admin/edit_user/<int:user_id>', methods=['GET', 'POST'])
 def edit_user(user_id):
     if 'user_id' not in session or not session.get('is_admin'):
@@ -1667,7 +3396,11 @@ def delete_user(user_id):
         # 1. Supprimer les analyses liées à ce journal
         Analysis.query.filter_by(journal_id=journal.id).delete(synchronize_session=False)
         # 2. Supprimer les trades liés à ce journal
+        journal_trade_ids = db.session.query(Trade.id).filter(Trade.journal_id == journal.id)
+        db.session.execute(trade_tags.delete().where(trade_tags.c.trade_id.in_(journal_trade_ids)))
         Trade.query.filter_by(journal_id=journal.id).delete(synchronize_session=False)
+        JournalStatsBucket.query.filter_by(journal_id=journal.id).delete(synchronize_session=False)
+        JournalStats.query.filter_by(journal_id=journal.id).delete(synchronize_session=False)
         # 3. Supprimer le journal lui-même
         db.session.delete(journal)
     # 4. Supprimer l'utilisateur
@@ -1848,6 +3581,7 @@ def calendar():
                 description=description
             )
             db.session.add(new_event)
+            bump_registry_version('economic_events')
             db.session.commit()
             flash("Événement économique ajouté avec succès.")
         except ValueError:
@@ -1867,6 +3601,7 @@ def delete_event(event_id):
         flash("Événement introuvable.")
         return redirect(url_for('calendar'))
     db.session.delete(event)
+    bump_registry_version('economic_events')
     db.session.commit()
     flash("Événement supprimé avec succès.")
     return redirect(url_for('calendar'))
@@ -2283,14 +4018,13 @@ def delete_strategy(strategy_id):
 def check_trades():
     if 'user_id' not in session:
         return redirect(url_for('login'))
-    trades = Trade.query.join(Journal).filter(Journal.user_id == session['user_id']).all()
     strategies = Strategy.query.filter_by(user_id=session['user_id']).all()
     messages = []
-    for trade in trades:
-        for strategy in strategies:
-            if strategy.name in (trade.tags or ''):
-                if not evaluate_trade_against_strategy(trade, strategy):
-                    messages.append(f"Le trade n°{trade.id} ne respecte pas la stratégie '{strategy.name}'.")
+    for strategy in strategies:
+        # Seuls les trades tagués du nom de la stratégie sont lus, via l'index des tags
+        for trade in trades_tagged(strategy.name, user_id=session['user_id']).order_by(Trade.id.asc()):
+            if not evaluate_trade_against_strategy(trade, strategy):
+                messages.append(f"Le trade n°{trade.id} ne respecte pas la stratégie '{strategy.name}'.")
     return render_template('trade_check_results.html', messages=messages)
 
 def evaluate_trade_against_strategy(trade, strategy):
@@ -2330,11 +4064,25 @@ scheduler = BackgroundScheduler()
 # Planification de la tâche pour s'exécuter toutes les heures
 scheduler.add_job(fetch_economic_events, 'interval', hours=1)
 
-scheduler.start()
+# Classements : mise à jour incrémentale fréquente, recalcul complet chaque nuit
+scheduler.add_job(scheduled_leaderboard_refresh, 'interval', minutes=15)
+scheduler.add_job(scheduled_leaderboard_refresh, 'cron', hour=3, kwargs={'full': True})
 
-# Assurez-vous que le planificateur s'arrête correctement à la fin de l'application
-import atexit
-atexit.register(lambda: scheduler.shutdown())
+# MAE/MFE des trades à partir des bougies importées dans la journée
+scheduler.add_job(scheduled_trade_excursions, 'cron', hour=4)
+
+# Plateformes liées : import incrémental des nouveaux relevés
+scheduler.add_job(scheduled_platform_sync, 'interval', minutes=app.config['PLATFORM_SYNC_INTERVAL_MINUTES'],
+                  max_instances=1, coalesce=True)
+
+# Les processus de simulation (spawn) réexécutent ce module sous le nom __mp_main__ quand l'application
+# est lancée par "python main.py" : le planificateur ne tourne que dans le processus principal
+if __name__ != '__mp_main__':
+    scheduler.start()
+
+    # Assurez-vous que le planificateur s'arrête correctement à la fin de l'application
+    atexit.register(lambda: scheduler.shutdown())
+    atexit.register(shutdown_risk_simulations)
 
 # Gestion des erreurs
 @app.errorhandler(404)
@@ -0,0 +1,2 @@
+-- Version des données d'un journal, incrémentée à chaque écriture de trade
+ALTER TABLE journals ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0;
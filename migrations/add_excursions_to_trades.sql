@@ -0,0 +1,3 @@
+-- Excursions défavorable et favorable maximales des trades clôturés (voir ohlc_store)
+ALTER TABLE trades ADD COLUMN mae FLOAT;
+ALTER TABLE trades ADD COLUMN mfe FLOAT;
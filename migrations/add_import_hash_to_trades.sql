@@ -0,0 +1,3 @@
+-- Empreinte du contenu des trades importés : un même trade ne peut être importé deux fois dans un journal
+ALTER TABLE trades ADD COLUMN import_hash VARCHAR(64);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_trades_journal_import_hash ON trades (journal_id, import_hash);
@@ -0,0 +1,11 @@
+-- Numéro d'ordre du trade dans son journal, attribué à l'insertion (voir assign_trade_sequence)
+ALTER TABLE trades ADD COLUMN numero_ordre INTEGER;
+CREATE INDEX IF NOT EXISTS ix_trades_journal_numero_ordre ON trades (journal_id, numero_ordre);
+
+-- Numérotation des trades existants par ordre d'enregistrement (équivalent de la commande flask renumber_trades)
+UPDATE trades SET numero_ordre = sequence.numero
+FROM (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY journal_id ORDER BY date_enregistrement, id) AS numero
+    FROM trades
+) AS sequence
+WHERE sequence.id = trades.id;
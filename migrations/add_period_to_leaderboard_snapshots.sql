@@ -0,0 +1,4 @@
+-- Ajout de la fenêtre (daily, weekly, monthly, all) aux instantanés du classement
+ALTER TABLE leaderboard_snapshots ADD COLUMN period VARCHAR(10) NOT NULL DEFAULT 'all';
+DROP INDEX IF EXISTS ix_leaderboard_snapshots_rank;
+CREATE INDEX IF NOT EXISTS ix_leaderboard_snapshots_period_rank ON leaderboard_snapshots (period, rank);
@@ -0,0 +1,6 @@
+-- État de la synchronisation incrémentale des plateformes liées
+ALTER TABLE platform_links ADD COLUMN sync_watermark DATETIME;
+ALTER TABLE platform_links ADD COLUMN sync_file_mtime FLOAT;
+ALTER TABLE platform_links ADD COLUMN last_sync_at DATETIME;
+ALTER TABLE platform_links ADD COLUMN last_sync_status VARCHAR(20);
+ALTER TABLE platform_links ADD COLUMN last_sync_message TEXT;
@@ -0,0 +1,46 @@
+-- Registre des instruments, modifiable sans redéploiement (voir InstrumentRegistry)
+CREATE TABLE IF NOT EXISTS instruments (
+    id INTEGER PRIMARY KEY,
+    symbol VARCHAR(50) NOT NULL UNIQUE,
+    label VARCHAR(100),
+    type VARCHAR(20) NOT NULL,
+    currency VARCHAR(10) NOT NULL,
+    pip_value FLOAT,
+    multiplier FLOAT,
+    contract_size FLOAT,
+    point_value FLOAT,
+    updated_at DATETIME
+);
+
+-- Version de chaque registre en mémoire, incrémentée à chaque modification
+CREATE TABLE IF NOT EXISTS registry_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Instruments prédéfinis (équivalent de la commande flask seed_instruments)
+INSERT OR IGNORE INTO instruments (symbol, label, type, currency, pip_value, multiplier, contract_size, point_value) VALUES
+    ('EUR/USD', NULL, 'forex', 'USD', 10, NULL, NULL, NULL),
+    ('GBP/USD', NULL, 'forex', 'USD', 10, NULL, NULL, NULL),
+    ('USD/JPY', NULL, 'forex', 'JPY', 1000, NULL, NULL, NULL),
+    ('AUD/USD', NULL, 'forex', 'USD', 10, NULL, NULL, NULL),
+    ('USD/CHF', NULL, 'forex', 'USD', 10, NULL, NULL, NULL),
+    ('NZD/USD', NULL, 'forex', 'USD', 10, NULL, NULL, NULL),
+    ('EUR/JPY', NULL, 'forex', 'JPY', 1000, NULL, NULL, NULL),
+    ('GBP/JPY', NULL, 'forex', 'JPY', 1000, NULL, NULL, NULL),
+    ('EUR/GBP', NULL, 'forex', 'GBP', 10, NULL, NULL, NULL),
+    ('AAPL', 'Apple (AAPL)', 'stock', 'USD', NULL, 1, NULL, NULL),
+    ('TSLA', 'Tesla (TSLA)', 'stock', 'USD', NULL, 1, NULL, NULL),
+    ('MSFT', 'Microsoft (MSFT)', 'stock', 'USD', NULL, 1, NULL, NULL),
+    ('AMZN', 'Amazon (AMZN)', 'stock', 'USD', NULL, 1, NULL, NULL),
+    ('GOOGL', 'Alphabet (GOOGL)', 'stock', 'USD', NULL, 1, NULL, NULL),
+    ('FB', 'Meta (FB)', 'stock', 'USD', NULL, 1, NULL, NULL),
+    ('CAC40', NULL, 'futures', 'EUR', NULL, NULL, 10, 10),
+    ('SP500', 'S&P 500', 'futures', 'USD', NULL, NULL, 5, 50),
+    ('DAX', NULL, 'futures', 'EUR', NULL, NULL, 25, 5),
+    ('FTSE100', 'FTSE 100', 'futures', 'GBP', NULL, NULL, 10, 10),
+    ('Pétrole', NULL, 'commodity', 'USD', NULL, NULL, 100, NULL),
+    ('Or', NULL, 'commodity', 'USD', NULL, NULL, 100, NULL),
+    ('Argent', NULL, 'commodity', 'USD', NULL, NULL, 5000, NULL),
+    ('Cuivre', NULL, 'commodity', 'USD', NULL, NULL, 25000, NULL);
+INSERT OR IGNORE INTO registry_versions (name, version) VALUES ('instruments', 1);
@@ -0,0 +1,22 @@
+-- Statistiques matérialisées par journal, maintenues à chaque écriture de trade
+CREATE TABLE IF NOT EXISTS journal_stats (
+    id INTEGER PRIMARY KEY,
+    journal_id INTEGER NOT NULL UNIQUE REFERENCES journals(id),
+    trade_count INTEGER DEFAULT 0,
+    win_count INTEGER DEFAULT 0,
+    total_result FLOAT DEFAULT 0,
+    total_profit FLOAT DEFAULT 0,
+    total_loss FLOAT DEFAULT 0,
+    updated_at DATETIME
+);
+-- Sous-agrégats par mois, symbole, heure et tag
+CREATE TABLE IF NOT EXISTS journal_stats_buckets (
+    id INTEGER PRIMARY KEY,
+    journal_id INTEGER NOT NULL REFERENCES journals(id),
+    dimension VARCHAR(10) NOT NULL,
+    bucket VARCHAR(200) NOT NULL,
+    trade_count INTEGER DEFAULT 0,
+    win_count INTEGER DEFAULT 0,
+    total_result FLOAT DEFAULT 0,
+    CONSTRAINT uq_journal_stats_buckets_key UNIQUE (journal_id, dimension, bucket)
+);
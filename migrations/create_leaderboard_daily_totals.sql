@@ -0,0 +1,11 @@
+-- Totaux journaliers par utilisateur utilisés pour les fenêtres glissantes du classement
+CREATE TABLE IF NOT EXISTS leaderboard_daily_totals (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    day DATE NOT NULL,
+    total_gains FLOAT DEFAULT 0,
+    total_losses FLOAT DEFAULT 0,
+    trade_count INTEGER DEFAULT 0,
+    CONSTRAINT uq_leaderboard_daily_totals_user_day UNIQUE (user_id, day)
+);
+CREATE INDEX IF NOT EXISTS ix_leaderboard_daily_totals_day ON leaderboard_daily_totals (day);
@@ -0,0 +1,12 @@
+-- Instantané du classement des performances (recalculé par rebuild_leaderboard)
+CREATE TABLE IF NOT EXISTS leaderboard_snapshots (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    name VARCHAR(101) NOT NULL,
+    total_gains FLOAT DEFAULT 0,
+    total_losses FLOAT DEFAULT 0,
+    performance FLOAT DEFAULT 0,
+    rank INTEGER NOT NULL,
+    computed_at DATETIME
+);
+CREATE INDEX IF NOT EXISTS ix_leaderboard_snapshots_rank ON leaderboard_snapshots (rank);
@@ -0,0 +1,30 @@
+-- Tags normalisés : une ligne par tag et une association par (trade, tag)
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS trade_tags (
+    trade_id INTEGER NOT NULL REFERENCES trades(id),
+    tag_id INTEGER NOT NULL REFERENCES tags(id),
+    PRIMARY KEY (trade_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS ix_trade_tags_tag_trade ON trade_tags (tag_id, trade_id);
+
+-- Reprise des tags existants depuis la chaîne séparée par des virgules de trades.tags
+-- (équivalent SQL de la commande flask backfill_trade_tags)
+WITH RECURSIVE split(trade_id, tag, rest) AS (
+    SELECT id, '', tags || ',' FROM trades WHERE tags IS NOT NULL AND tags != ''
+    UNION ALL
+    SELECT trade_id, trim(substr(rest, 1, instr(rest, ',') - 1)), substr(rest, instr(rest, ',') + 1)
+    FROM split WHERE rest != ''
+)
+INSERT OR IGNORE INTO tags (name) SELECT DISTINCT tag FROM split WHERE tag != '';
+
+WITH RECURSIVE split(trade_id, tag, rest) AS (
+    SELECT id, '', tags || ',' FROM trades WHERE tags IS NOT NULL AND tags != ''
+    UNION ALL
+    SELECT trade_id, trim(substr(rest, 1, instr(rest, ',') - 1)), substr(rest, instr(rest, ',') + 1)
+    FROM split WHERE rest != ''
+)
+INSERT OR IGNORE INTO trade_tags (trade_id, tag_id)
+SELECT DISTINCT split.trade_id, tags.id FROM split JOIN tags ON tags.name = split.tag WHERE split.tag != '';
@@ -0,0 +1,3 @@
+-- Index de la pagination par clé de la liste des trades (tri par enregistrement ou par ouverture)
+CREATE INDEX IF NOT EXISTS ix_trades_journal_enregistrement ON trades (journal_id, date_enregistrement, id);
+CREATE INDEX IF NOT EXISTS ix_trades_journal_debut ON trades (journal_id, date_debut, id);
@@ -0,0 +1,158 @@
+import numpy as np
+
+from trade_import import normalize_symbol
+
+# Niveaux d'impact considérés comme forts : saisie du calendrier ("High") et importance 3 de l'API
+HIGH_IMPACT_LEVELS = ('high', '3')
+DEFAULT_WINDOW_MINUTES = 30
+
+# Position d'un trade par rapport aux annonces, du plus faible au plus fort
+NEWS_NONE, NEWS_NEAR, NEWS_DURING = 0, 1, 2
+NEWS_CATEGORIES = ('none', 'near', 'during')
+
+
+def is_high_impact(impact) -> bool:
+    return str(impact or '').strip().lower() in HIGH_IMPACT_LEVELS
+
+
+def instrument_currencies(symbol: str, spec: dict | None = None) -> tuple[str, ...]:
+    """
+    Devises dont les annonces concernent un instrument.
+
+    Une paire de devises ("EUR/USD", "eurusd.m") est concernée par ses deux devises ; les autres instruments
+    par leur devise de cotation (predefined_instruments / registre), s'il est connu.
+    """
+    key = normalize_symbol(symbol or '')
+    if len(key) == 6 and key.isalpha() and (spec is None or spec.get('type') == 'forex'):
+        return key[:3], key[3:]
+    if spec:
+        currency = spec.get('quote_currency') or spec.get('currency')
+        if currency:
+            return (currency.upper(),)
+    return ()
+
+
+class EventIndex:
+    """
+    Annonces indexées par devise : un tableau trié des dates par devise.
+
+    Chaque requête est une recherche dichotomique (np.searchsorted) par trade et par devise :
+    rattacher n trades à m annonces coûte O((n + m) log m), sans comparer chaque trade à chaque annonce.
+    """
+
+    def __init__(self, times, currencies):
+        """
+        Args:
+            times: Date de chaque annonce (timestamps Unix)
+            currencies: Devise de chaque annonce
+        """
+        times = np.asarray(times, dtype=float)
+        currencies = np.asarray([str(c).upper() for c in currencies], dtype=object)
+        self._series = {}  # devise -> (dates triées, indices des annonces)
+        for currency in set(currencies):
+            indices = np.flatnonzero(currencies == currency)
+            order = np.argsort(times[indices], kind='stable')
+            self._series[currency] = (times[indices][order], indices[order])
+
+    def currencies(self) -> list[str]:
+        return sorted(self._series)
+
+    def match(self, trade_currencies, starts, ends, window_seconds: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Rattache chaque trade à une annonce de ses devises.
+
+        Un trade est "pendant" une annonce publiée entre son ouverture et sa clôture, "proche" d'une annonce
+        publiée dans les window_seconds qui précèdent son ouverture ou suivent sa clôture.
+
+        Args:
+            trade_currencies: Devises de chaque trade (voir instrument_currencies)
+            starts, ends: Ouverture et clôture de chaque trade (timestamps Unix ; clôture NaN = ouverture)
+
+        Returns:
+            tuple: (catégorie NEWS_* de chaque trade, indice de l'annonce retenue ou -1) ; pendant une annonce,
+            la première publiée ; à proximité, la plus proche du trade
+        """
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        ends = np.where(np.isnan(ends), starts, ends)
+        category = np.zeros(len(starts), dtype=np.int8)
+        event = np.full(len(starts), -1, dtype=np.intp)
+        # Couples (trade, devise) regroupés par devise : une recherche vectorisée par devise
+        by_currency = {}
+        for trade, currencies in enumerate(trade_currencies):
+            for currency in currencies:
+                if currency in self._series:
+                    by_currency.setdefault(currency, []).append(trade)
+        for currency, trades in by_currency.items():
+            times, indices = self._series[currency]
+            trades = np.asarray(trades, dtype=np.intp)
+            start, end = starts[trades], ends[trades]
+            first = np.searchsorted(times, start, side='left')  # Première annonce à partir de l'ouverture
+            after = np.searchsorted(times, end, side='right')  # Première annonce après la clôture
+            during = after > first
+            # Annonces voisines : la dernière avant l'ouverture et la première après la clôture
+            before_gap = np.where(first > 0, start - times[np.maximum(first - 1, 0)], np.inf)
+            after_gap = np.where(after < len(times), times[np.minimum(after, len(times) - 1)] - end, np.inf)
+            nearest = np.where(before_gap <= after_gap, first - 1, after)
+            near = ~during & (np.minimum(before_gap, after_gap) <= window_seconds)
+            found = np.where(during, NEWS_DURING, np.where(near, NEWS_NEAR, NEWS_NONE)).astype(np.int8)
+            # Un trade sur deux devises garde le rattachement le plus fort
+            better = found > category[trades]
+            chosen = trades[better]
+            category[chosen] = found[better]
+            event[chosen] = indices[np.where(during, first, nearest)[better]]
+        return category, event
+
+
+def news_breakdown(resultat, category) -> list[dict]:
+    """
+    Performance des trades par catégorie (pendant, proche, sans annonce), en une passe (np.bincount).
+
+    Returns:
+        list: Un dict par catégorie (nombre de trades, résultat total et moyen, taux de réussite en %)
+    """
+    resultat = np.nan_to_num(np.asarray(resultat, dtype=float))
+    category = np.asarray(category, dtype=np.intp)
+    size = len(NEWS_CATEGORIES)
+    counts = np.bincount(category, minlength=size)
+    totals = np.bincount(category, weights=resultat, minlength=size)
+    wins = np.bincount(category, weights=resultat > 0, minlength=size)
+    rows = []
+    for code, name in enumerate(NEWS_CATEGORIES):
+        count = int(counts[code])
+        rows.append({
+            'category': name,
+            'count': count,
+            'total_result': round(float(totals[code]), 2),
+            'average_result': round(float(totals[code]) / count, 2) if count else 0.0,
+            'win_rate': round(float(wins[code]) / count * 100, 2) if count else 0.0,
+        })
+    return rows
+
+
+def event_breakdown(resultat, category, event, titles, limit: int = 20) -> list[dict]:
+    """
+    Performance des trades rattachés à une annonce, regroupés par intitulé d'annonce
+    (les plus fréquents d'abord, au plus limit intitulés).
+    """
+    resultat = np.nan_to_num(np.asarray(resultat, dtype=float))
+    tagged = np.asarray(category) > NEWS_NONE
+    if not tagged.any():
+        return []
+    names = np.asarray(titles, dtype=object)[np.asarray(event)[tagged]]
+    labels, groups = np.unique(names.astype(str), return_inverse=True)
+    values = resultat[tagged]
+    counts = np.bincount(groups, minlength=len(labels))
+    totals = np.bincount(groups, weights=values, minlength=len(labels))
+    wins = np.bincount(groups, weights=values > 0, minlength=len(labels))
+    order = np.lexsort((labels, -counts))[:limit]
+    return [
+        {
+            'title': str(labels[i]),
+            'count': int(counts[i]),
+            'total_result': round(float(totals[i]), 2),
+            'average_result': round(float(totals[i]) / counts[i], 2),
+            'win_rate': round(float(wins[i]) / counts[i] * 100, 2),
+        }
+        for i in order
+    ]
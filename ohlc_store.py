@@ -0,0 +1,196 @@
+import csv
+import glob
+import os
+from itertools import islice
+
+import numpy as np
+
+from trade_import import normalize_symbol
+
+# Durée d'une bougie (secondes) : le magasin contient des bougies d'une minute
+CANDLE_SECONDS = 60
+CSV_CHUNK_ROWS = 100_000
+OHLC_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+def parse_candle_times(values: list[str]) -> np.ndarray:
+    """
+    Convertit les dates d'un lot de bougies en timestamps Unix (int64).
+
+    Formats acceptés : timestamps Unix, dates ISO ("2024-01-02 00:01:00") et MetaTrader ("2024.01.02 00:01").
+    """
+    if values and values[0].strip().isdigit():
+        return np.asarray(values, dtype=np.int64)
+    iso = [value.strip().replace('.', '-', 2) if value[4:5] == '.' else value.strip() for value in values]
+    return np.asarray(iso, dtype='datetime64[s]').astype(np.int64)
+
+
+def window_extremes(times: np.ndarray, high: np.ndarray, low: np.ndarray, starts, ends) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Plus haut et plus bas des bougies couvrant chaque fenêtre [début, fin], en une passe vectorisée.
+
+    Les fenêtres sont localisées par recherche dichotomique dans l'index temporel, puis réduites
+    par np.maximum.reduceat / np.minimum.reduceat sur la seule plage qui va de la première à la dernière
+    bougie des fenêtres : sur des tableaux mappés en mémoire, les bougies hors de cette plage ne sont
+    pas lues (celles situées entre deux fenêtres de la plage le sont, reduceat réduisant aussi les intervalles).
+
+    Args:
+        times: Début de chaque bougie (timestamps Unix triés)
+        high, low: Plus haut et plus bas de chaque bougie
+        starts, ends: Bornes des fenêtres (timestamps Unix)
+
+    Returns:
+        tuple: (plus hauts, plus bas) ; NaN pour une fenêtre sans bougie
+    """
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    highest = np.full(len(starts), np.nan)
+    lowest = np.full(len(starts), np.nan)
+    count = len(times)
+    if not count or not len(starts):
+        return highest, lowest
+    # Bougie contenant le début de la fenêtre, jusqu'à celle contenant sa fin (incluse)
+    lo = np.searchsorted(times, np.floor(starts / CANDLE_SECONDS) * CANDLE_SECONDS, side='left')
+    hi = np.searchsorted(times, ends, side='right')
+    valid = ~np.isnan(starts) & ~np.isnan(ends) & (lo < hi)
+    if not valid.any():
+        return highest, lowest
+    # Plage couverte par les fenêtres, indices ramenés au début de la plage
+    first, last = int(lo[valid].min()), int(hi[valid].max())
+    high, low = high[first:last], low[first:last]
+    lo, hi = lo[valid] - first, hi[valid] - first
+    count = last - first
+    # reduceat exige des indices < count : une fenêtre qui finit sur la dernière bougie
+    # de la plage est réduite jusqu'à l'avant-dernière, la dernière étant ajoutée ensuite
+    end = np.minimum(hi, count - 1)
+    indices = np.empty(2 * len(lo), dtype=np.intp)
+    indices[0::2] = lo
+    indices[1::2] = end
+    window_high = np.maximum.reduceat(high, indices)[0::2]
+    window_low = np.minimum.reduceat(low, indices)[0::2]
+    tail = hi == count
+    if tail.any():
+        window_high[tail] = np.maximum(window_high[tail], high[count - 1])
+        window_low[tail] = np.minimum(window_low[tail], low[count - 1])
+    highest[valid] = window_high
+    lowest[valid] = window_low
+    return highest, lowest
+
+
+def price_excursions(position, prix_entree, highest, lowest) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Excursions défavorable et favorable maximales, en unités de prix (>= 0).
+
+    Pour un achat l'excursion défavorable est la baisse sous le prix d'entrée et la favorable la hausse ;
+    c'est l'inverse pour une vente. NaN sans bougie sur la durée du trade.
+    """
+    entree = np.asarray(prix_entree, dtype=float)
+    buy = np.asarray([str(p).lower() == 'achat' for p in position], dtype=bool)
+    rise = np.maximum(highest - entree, 0)
+    fall = np.maximum(entree - lowest, 0)
+    return np.where(buy, fall, rise), np.where(buy, rise, fall)
+
+
+class OhlcStore:
+    """
+    Bougies d'une minute par instrument, stockées en fichiers .npy lus par mappage mémoire.
+
+    Chaque instrument occupe deux fichiers : <SYMBOLE>.time.npy (début des bougies, int64 trié)
+    et <SYMBOLE>.ohlc.npy (tableau 4 x n : open, high, low, close, une ligne contiguë par colonne).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._series = {}  # symbole -> (date de modification, timestamps, ohlc)
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        return (os.path.join(self.directory, f'{key}.time.npy'),
+                os.path.join(self.directory, f'{key}.ohlc.npy'))
+
+    def symbols(self) -> list[str]:
+        return sorted(os.path.basename(path)[:-len('.time.npy')]
+                      for path in glob.glob(os.path.join(self.directory, '*.time.npy')))
+
+    def load(self, symbol: str):
+        """
+        Bougies d'un instrument, mappées en mémoire (rechargées si les fichiers ont été réécrits).
+
+        Returns:
+            tuple: (timestamps, ohlc) ou None sans données pour cet instrument
+        """
+        key = normalize_symbol(symbol)
+        time_path, ohlc_path = self._paths(key)
+        try:
+            mtime = os.path.getmtime(ohlc_path)
+        except OSError:
+            return None
+        cached = self._series.get(key)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, np.load(time_path, mmap_mode='r'), np.load(ohlc_path, mmap_mode='r'))
+            self._series[key] = cached
+        return cached[1], cached[2]
+
+    def write(self, symbol: str, times, ohlc) -> int:
+        """
+        Fusionne des bougies avec celles déjà stockées (une bougie existante à la même date est remplacée).
+
+        Les fichiers sont réécrits puis substitués atomiquement : les lectures en cours restent valides.
+
+        Args:
+            times: Début des bougies (timestamps Unix)
+            ohlc: Tableau n x 4 (open, high, low, close)
+
+        Returns:
+            int: Nombre de bougies stockées pour l'instrument
+        """
+        key = normalize_symbol(symbol)
+        times = np.asarray(times, dtype=np.int64)
+        columns = np.asarray(ohlc, dtype=float).reshape(-1, 4).T
+        existing = self.load(key)
+        if existing is not None:
+            times = np.concatenate((times, np.asarray(existing[0])))
+            columns = np.concatenate((columns, np.asarray(existing[1])), axis=1)
+        # Tri stable puis première occurrence de chaque date : les nouvelles bougies (placées en tête) l'emportent
+        order = np.argsort(times, kind='stable')
+        times, columns = times[order], columns[:, order]
+        first_of_run = np.concatenate(([True], times[1:] != times[:-1]))
+        times, columns = times[first_of_run], np.ascontiguousarray(columns[:, first_of_run])
+
+        os.makedirs(self.directory, exist_ok=True)
+        for path, values in zip(self._paths(key), (times, columns)):
+            temporary = f'{path}.tmp'
+            with open(temporary, 'wb') as f:
+                np.save(f, values)
+            os.replace(temporary, path)
+        self._series.pop(key, None)
+        return len(times)
+
+    def import_csv(self, symbol: str, path: str, chunk_rows: int = CSV_CHUNK_ROWS) -> int:
+        """
+        Importe un fichier CSV de bougies (colonnes time, open, high, low, close) par lots.
+
+        Returns:
+            int: Nombre de bougies stockées pour l'instrument après import
+        """
+        times, values = [], []
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            while True:
+                rows = list(islice(reader, chunk_rows))
+                if not rows:
+                    break
+                times.append(parse_candle_times([row['time'] for row in rows]))
+                values.append(np.array([[float(row[column]) for column in OHLC_COLUMNS] for row in rows]))
+        if not times:
+            existing = self.load(symbol)
+            return 0 if existing is None else len(existing[0])
+        return self.write(symbol, np.concatenate(times), np.concatenate(values))
+
+    def extremes(self, symbol: str, starts, ends) -> tuple[np.ndarray, np.ndarray]:
+        """Plus haut et plus bas d'un instrument sur chaque fenêtre (voir window_extremes) ; NaN sans données."""
+        series = self.load(symbol)
+        if series is None:
+            nan = np.full(len(starts), np.nan)
+            return nan, nan.copy()
+        times, ohlc = series
+        return window_extremes(times, ohlc[1], ohlc[2], starts, ends)
@@ -0,0 +1,105 @@
+import glob
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.utils import secure_filename
+
+from trade_import import StatementFormatError, open_statement, parse_statement
+
+STATEMENT_PATTERNS = ('*.csv', '*.txt')
+
+
+def link_folder(root: str, plateforme: str, identifiant: str) -> str:
+    """Dossier de dépôt des relevés d'un lien : <root>/<plateforme>/<identifiant>."""
+    return os.path.join(root, secure_filename(plateforme) or '_', secure_filename(identifiant) or '_')
+
+
+def pending_statements(folder: str, since_mtime: float | None = None) -> list[tuple[float, str]]:
+    """
+    Relevés du dossier modifiés après since_mtime, du plus ancien au plus récent.
+
+    Un dossier absent ne contient aucun relevé.
+
+    Returns:
+        list: (date de modification, chemin)
+    """
+    statements = []
+    for pattern in STATEMENT_PATTERNS:
+        for path in glob.glob(os.path.join(folder, pattern)):
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue  # Fichier retiré entre la liste et la lecture
+            if since_mtime is None or mtime > since_mtime:
+                statements.append((mtime, path))
+    return sorted(statements)
+
+
+def read_statements(paths):
+    """
+    Enchaîne la lecture de plusieurs relevés (voir trade_import.parse_statement), au format détecté sur l'en-tête de chacun.
+
+    Chaque fichier n'est ouvert que le temps de sa lecture ; les motifs de rejet sont préfixés du nom du fichier.
+    Un relevé illisible est rejeté en entier (ligne 0) sans interrompre la lecture des suivants.
+    """
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            with open(path, 'rb') as f:
+                for line_number, row, error in parse_statement(open_statement(f)):
+                    yield line_number, row, (f"{name} : {error}" if error else None)
+        except (StatementFormatError, UnicodeDecodeError) as e:
+            yield 0, None, f"{name} : {e}"
+
+
+def trade_timestamp(row: dict):
+    """Date la plus récente d'un trade importé : clôture, ou ouverture s'il est en cours."""
+    return row['date_fin'] or row['date_debut']
+
+
+def after_watermark(parsed, watermark):
+    """
+    Écarte les trades antérieurs au point de synchronisation (watermark) d'un lien.
+
+    Les trades à la date exacte du point sont conservés : ceux déjà importés sont ensuite écartés
+    comme doublons, ce qui évite de perdre un trade de la même seconde arrivé plus tard.
+    """
+    for line_number, row, error in parsed:
+        if row is not None and watermark is not None and trade_timestamp(row) < watermark:
+            continue
+        yield line_number, row, error
+
+
+def run_bounded(func, items, max_workers: int) -> list[tuple]:
+    """
+    Applique func à chaque élément sur un pool d'au plus max_workers threads.
+
+    Une erreur sur un élément n'interrompt pas les autres.
+
+    Returns:
+        list: (élément, résultat ou None, exception ou None), dans l'ordre des éléments
+    """
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))),
+                            thread_name_prefix='platform-sync') as executor:
+        futures = [executor.submit(func, item) for item in items]
+    results = []
+    for item, future in zip(items, futures):
+        error = future.exception()
+        results.append((item, None if error else future.result(), error))
+    return results
+
+
+class LinkLocks:
+    """Un verrou par lien : une même source n'est jamais synchronisée deux fois en parallèle."""
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, link_id) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(link_id, threading.Lock())
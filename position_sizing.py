@@ -0,0 +1,195 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from downsampling import downsample, drawdown_extremes
+
+SIZING_KINDS = ('fixed_lot', 'fixed_risk', 'kelly')
+SIZING_LABELS = {'fixed_lot': "Lot fixe", 'fixed_risk': "Risque fixe (%)", 'kelly': "Fraction de Kelly"}
+CURVE_POINTS = 200
+# Itérations de la recherche des trades refusés faute de marge (règles à lot fixe) avant le calcul pas à pas
+MARGIN_ITERATIONS = 3
+
+
+class SizingRule(NamedTuple):
+    """
+    Règle de dimensionnement des positions.
+
+    kind : "fixed_lot" (value = lot), "fixed_risk" (value = % du solde risqué par trade)
+    ou "kelly" (value = fraction du critère de Kelly) ; max_leverage plafonne l'exposition
+    (valeur engagée / solde), None pour ne pas plafonner.
+    """
+    kind: str
+    value: float
+    max_leverage: float | None = None
+
+    @property
+    def label(self) -> str:
+        unit = '%' if self.kind == 'fixed_risk' else ''
+        leverage = f", levier max {self.max_leverage:g}" if self.max_leverage else ''
+        return f"{SIZING_LABELS[self.kind]} {self.value:g}{unit}{leverage}"
+
+
+def risk_per_lot(unit_pnl: np.ndarray) -> float:
+    """
+    Risque d'un lot (1R) : perte moyenne d'un lot sur les trades perdants du journal.
+
+    Les trades ne portent pas de stop : la perte moyenne sert d'unité de risque. 0 sans trade perdant.
+    """
+    losses = -unit_pnl[unit_pnl < 0]
+    return float(losses.mean()) if len(losses) else 0.0
+
+
+def kelly_fraction(r_multiples: np.ndarray) -> float:
+    """
+    Critère de Kelly pour des résultats exprimés en R : W - (1 - W) / B, borné à [0, 1].
+
+    W est le taux de trades gagnants et B le rapport gain moyen / perte moyenne.
+    """
+    wins = r_multiples[r_multiples > 0]
+    losses = r_multiples[r_multiples < 0]
+    if not len(wins) or not len(r_multiples):
+        return 0.0
+    if not len(losses):
+        return 1.0
+    win_rate = len(wins) / len(r_multiples)
+    payoff = wins.mean() / -losses.mean()
+    return float(min(max(win_rate - (1 - win_rate) / payoff, 0.0), 1.0))
+
+
+def _proportional_curves(r_multiples, leverage_per_r, capital, fractions, caps) -> np.ndarray:
+    """
+    Soldes des règles qui risquent une fraction du solde : chaque trade multiplie le solde par
+    (1 + g x R) avec g = min(fraction, plafond de levier), soit un produit cumulé par règle.
+    """
+    exposure = np.minimum(fractions[:, None], caps[:, None] * leverage_per_r[None, :])
+    factors = 1.0 + exposure * r_multiples[None, :]
+    np.maximum(factors, 0.0, out=factors)  # Un solde épuisé reste à zéro
+    curves = np.empty((len(fractions), len(r_multiples) + 1))
+    curves[:, 0] = capital
+    np.cumprod(factors, axis=1, out=curves[:, 1:])
+    curves[:, 1:] *= capital
+    return curves
+
+
+def _fixed_lot_curves(unit_pnl, notional, capital, lots, caps) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Soldes des règles à lot fixe : somme cumulée des résultats, en écartant les trades dont la marge
+    (valeur engagée / levier maximal, comme can_take_position) dépasse le solde disponible.
+
+    Les trades refusés dépendent du solde, qui dépend des trades refusés : le point fixe est cherché
+    par quelques passes vectorisées, puis calculé pas à pas (vectorisé sur les règles) s'il n'est pas atteint.
+    """
+    margin = lots[:, None] * notional[None, :] / caps[:, None]
+    pnl = lots[:, None] * unit_pnl[None, :]
+    taken = np.ones_like(pnl, dtype=bool)
+    active = np.arange(len(lots))  # Règles dont le point fixe n'est pas encore atteint
+    start = 0
+    for _ in range(MARGIN_ITERATIONS):
+        balance = capital + np.cumsum(np.where(taken[active], pnl[active], 0.0), axis=1)
+        before = np.concatenate((np.full((len(active), 1), float(capital)), balance[:, :-1]), axis=1)
+        allowed = (before > 0) & (before >= margin[active])
+        difference = allowed != taken[active]
+        changed = difference.any(axis=1)
+        taken[active] = allowed
+        if changed.any():
+            start = int(difference[changed].argmax(axis=1).min())
+        active = active[changed]
+        if not len(active):
+            break
+    if len(active):
+        # Calcul pas à pas des règles restantes, à partir de leur premier trade encore incertain :
+        # les décisions antérieures, identiques entre les deux dernières passes, sont déjà exactes
+        balance = capital + np.where(taken[active, :start], pnl[active, :start], 0.0).sum(axis=1)
+        # Une ligne contiguë par trade : chaque pas ne lit que deux vecteurs de la taille du nombre de règles
+        remaining_pnl = np.ascontiguousarray(pnl[active, start:].T)
+        remaining_margin = np.ascontiguousarray(margin[active, start:].T)
+        decisions = np.empty(remaining_pnl.shape, dtype=bool)
+        for i in range(len(remaining_pnl)):
+            np.greater_equal(balance, remaining_margin[i], out=decisions[i])
+            decisions[i] &= balance > 0
+            balance += remaining_pnl[i] * decisions[i]
+        taken[active, start:] = decisions.T
+    curves = np.empty((len(lots), pnl.shape[1] + 1))
+    curves[:, 0] = capital
+    np.cumsum(np.where(taken, pnl, 0.0), axis=1, out=curves[:, 1:])
+    curves[:, 1:] += capital
+    np.maximum(curves, 0.0, out=curves)
+    return curves, taken
+
+
+def replay(unit_pnl, notional, capital: float, rules: list[SizingRule]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rejoue une suite de trades sous plusieurs règles de dimensionnement.
+
+    Chaque famille de règles est calculée en une opération matricielle (règles x trades).
+
+    Args:
+        unit_pnl: Résultat de chaque trade pour un lot, dans l'ordre de clôture
+        notional: Valeur engagée par un lot de chaque trade (NaN ou 0 : pas de plafond de levier)
+        capital: Solde de départ
+        rules: Règles à comparer
+
+    Returns:
+        tuple: (soldes, une ligne de n + 1 points par règle ; nombre de trades pris par règle)
+    """
+    unit_pnl = np.asarray(unit_pnl, dtype=float)
+    notional = np.nan_to_num(np.asarray(notional, dtype=float), nan=0.0)
+    curves = np.empty((len(rules), len(unit_pnl) + 1))
+    taken = np.full(len(rules), len(unit_pnl))
+    caps = np.array([rule.max_leverage or np.inf for rule in rules], dtype=float)
+
+    one_r = risk_per_lot(unit_pnl)
+    r_multiples = unit_pnl / one_r if one_r > 0 else np.zeros_like(unit_pnl)
+    kelly = kelly_fraction(r_multiples)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Plafond de levier exprimé en fraction du solde risquée : lot <= solde x levier / valeur engagée
+        leverage_per_r = np.where((notional > 0) & (one_r > 0), one_r / notional, np.inf)
+
+    proportional = [i for i, rule in enumerate(rules) if rule.kind in ('fixed_risk', 'kelly')]
+    if proportional:
+        fractions = np.array([
+            rules[i].value / 100 if rules[i].kind == 'fixed_risk' else rules[i].value * kelly for i in proportional
+        ])
+        curves[proportional] = _proportional_curves(r_multiples, leverage_per_r, capital, fractions, caps[proportional])
+    fixed = [i for i, rule in enumerate(rules) if rule.kind == 'fixed_lot']
+    if fixed:
+        lots = np.array([rules[i].value for i in fixed], dtype=float)
+        curves[fixed], fixed_taken = _fixed_lot_curves(unit_pnl, notional, capital, lots, caps[fixed])
+        taken[fixed] = fixed_taken.sum(axis=1)
+    return curves, taken
+
+
+def summarize_curves(curves: np.ndarray, capital: float) -> dict:
+    """Solde final, rendement et drawdown maximal (%) de chaque courbe, en une passe."""
+    peaks = np.maximum.accumulate(curves, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(peaks > 0, (peaks - curves) / peaks * 100, 0.0)
+    final = curves[:, -1]
+    return {
+        'final_equity': final,
+        'return_pct': (final - capital) / capital * 100 if capital else np.zeros(len(final)),
+        'max_drawdown_pct': drawdown.max(axis=1),
+        'ruined': curves.min(axis=1) <= 0,
+    }
+
+
+def sample_curve(curve: np.ndarray, points: int = CURVE_POINTS) -> dict:
+    """
+    Courbe réduite à environ points valeurs (downsampling.lttb), drawdown maximal inclus.
+
+    Returns:
+        dict: Numéros des trades conservés (x) et soldes correspondants (y)
+    """
+    kept = downsample(np.arange(len(curve)), curve, points, keep=drawdown_extremes(curve))
+    return {'x': kept.tolist(), 'y': [round(float(v), 2) for v in curve[kept]]}
+
+
+def rule_grid(fixed_lots=(), risk_percents=(), kelly_fractions=(), leverages=(None,)) -> list[SizingRule]:
+    """Toutes les combinaisons (règle, plafond de levier) d'une grille de paramètres."""
+    rules = []
+    for max_leverage in leverages or (None,):
+        rules += [SizingRule('fixed_lot', value, max_leverage) for value in fixed_lots]
+        rules += [SizingRule('fixed_risk', value, max_leverage) for value in risk_percents]
+        rules += [SizingRule('kelly', value, max_leverage) for value in kelly_fractions]
+    return rules
@@ -0,0 +1,125 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class PricedTrades(NamedTuple):
+    """Résultats calculés d'un lot de trades, en devise du journal."""
+    resultat: np.ndarray     # NaN pour un trade sans prix de sortie
+    pourcentage: np.ndarray  # Résultat rapporté au capital initial du journal (0 sans prix de sortie)
+    margin: np.ndarray       # Marge requise : montant engagé converti, divisé par le levier
+
+
+def contract_terms(instrument_data: dict | None, default_currency: str) -> tuple[float, float, bool, str]:
+    """
+    Caractéristiques de valorisation d'un instrument.
+
+    Args:
+        instrument_data: Entrée de predefined_instruments (None pour un instrument personnalisé)
+        default_currency: Devise retenue pour un instrument personnalisé (celle du journal)
+
+    Returns:
+        tuple: (valeur d'un point de prix, valeur engagée par unité de prix,
+                multiplication par le lot, devise de cotation)
+    """
+    if instrument_data is None:
+        return 1.0, 1.0, True, default_currency
+    kind = instrument_data['type']
+    if kind == 'forex':
+        pip_size = 0.01 if instrument_data['quote_currency'] == 'JPY' else 0.0001
+        pip_value = instrument_data['pip_value']
+        return pip_value / pip_size, pip_value, True, instrument_data['quote_currency']
+    if kind == 'stock':
+        multiplier = instrument_data.get('multiplier', 1)
+        return multiplier, multiplier, True, instrument_data['currency']
+    if kind == 'futures':
+        point = instrument_data['contract_size'] * instrument_data['point_value']
+        return point, point, False, instrument_data['currency']
+    if kind == 'commodity':
+        size = instrument_data['contract_size']
+        return size, size, False, instrument_data['currency']
+    return 1.0, 1.0, True, default_currency
+
+
+def price_trades(instrument, position, prix_entree, prix_sortie, lot, devise, capital_initial, levier,
+                 instruments: dict, rates: dict, dates=None, fx=None) -> PricedTrades:
+    """
+    Calcule en une passe vectorisée le résultat, le pourcentage et la marge d'un lot de trades.
+
+    Chaque argument positionnel est une séquence (une valeur par trade) ; devise, capital_initial
+    et levier sont ceux du journal de chaque trade.
+
+    Args:
+        instruments: Caractéristiques des instruments (format de predefined_instruments)
+        rates: Taux de conversion {(devise source, devise cible): taux}, 1 par défaut
+        dates: Timestamps Unix de conversion (clôture du trade), un par trade
+        fx: Historique des taux (fx_rates.FxRateStore) ; avec dates, chaque trade est converti
+            au taux connu à sa date, rates servant de repli pour les dates et paires non couvertes
+    """
+    terms = {}
+    point_value, engaged_value, per_lot, pair = [], [], [], []
+    for name, journal_currency in zip(instrument, devise):
+        key = (name, journal_currency)
+        if key not in terms:
+            point, engaged, scaled, currency = contract_terms(instruments.get(name), journal_currency)
+            terms[key] = (point, engaged, scaled, (currency, journal_currency))
+        point, engaged, scaled, conversion_pair = terms[key]
+        point_value.append(point)
+        engaged_value.append(engaged)
+        per_lot.append(scaled)
+        pair.append(conversion_pair)
+    rate = conversion_rates_for(pair, rates, dates, fx)
+
+    entree = np.asarray(prix_entree, dtype=float)
+    sortie = np.asarray([np.nan if price is None else price for price in prix_sortie], dtype=float)
+    lots = np.where(per_lot, np.asarray(lot, dtype=float), 1.0)
+    direction = np.where([str(p).lower() == 'achat' for p in position], 1.0, -1.0)
+    capital = np.asarray(capital_initial, dtype=float)
+    leverage = np.asarray(levier, dtype=float)
+
+    resultat = direction * (sortie - entree) * np.asarray(point_value, dtype=float) * lots * rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pourcentage = np.where(np.isnan(resultat) | (capital == 0), 0.0, resultat / capital * 100)
+        montant = np.abs(entree * np.asarray(engaged_value, dtype=float) * lots) * rate
+        margin = np.where(leverage > 0, montant / leverage, montant)
+    return PricedTrades(resultat, pourcentage, margin)
+
+
+def conversion_rates_for(pairs: list[tuple[str, str]], rates: dict, dates=None, fx=None) -> np.ndarray:
+    """
+    Taux de conversion de chaque trade : une jointure as-of vectorisée par paire de devises.
+
+    Args:
+        pairs: (devise de cotation, devise du journal) de chaque trade
+        rates: Taux fixes de repli
+        dates: Timestamps Unix de conversion (None = taux fixes uniquement)
+        fx: Historique des taux (fx_rates.FxRateStore)
+    """
+    result = np.empty(len(pairs), dtype=float)
+    index = {}
+    for position, conversion_pair in enumerate(pairs):
+        index.setdefault(conversion_pair, []).append(position)
+    timestamps = None if dates is None or fx is None else np.asarray(dates, dtype=float)
+    for (base, quote), positions in index.items():
+        fallback = rates.get((base, quote), 1)
+        if timestamps is None:
+            result[positions] = fallback
+        else:
+            result[positions] = fx.rates_at(base, quote, timestamps[positions], default=fallback)
+    return result
+
+
+def price_trade(instrument: str, position: str, prix_entree: float, prix_sortie: float | None, lot: float,
+                devise: str, capital_initial: float, levier: float,
+                instruments: dict, rates: dict, date: float | None = None, fx=None) -> tuple[float | None, float, float]:
+    """
+    Valorise un seul trade (voir price_trades).
+
+    Returns:
+        tuple: (résultat ou None sans prix de sortie, pourcentage, marge)
+    """
+    priced = price_trades([instrument], [position], [prix_entree], [prix_sortie], [lot],
+                          [devise], [capital_initial], [levier], instruments, rates,
+                          dates=None if date is None else [date], fx=fx)
+    resultat = float(priced.resultat[0])
+    return (None if np.isnan(resultat) else resultat), float(priced.pourcentage[0]), float(priced.margin[0])
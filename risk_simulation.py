@@ -0,0 +1,93 @@
+import numpy as np
+
+DEFAULT_PATHS = 20_000
+SHARD_PATHS = 2_000  # Trajectoires par lot : un lot de 2 000 x 1 000 trades occupe ~16 Mo
+MIN_HORIZON = 100
+MAX_HORIZON = 1_000
+DRAWDOWN_LEVELS = (10, 20, 30, 50)
+RUIN_LEVEL = 50  # Ruine : solde tombé à 50 % (ou moins) du capital initial
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def default_horizon(trade_count: int) -> int:
+    """Nombre de trades simulés par trajectoire : l'historique du journal, borné à [MIN_HORIZON, MAX_HORIZON]."""
+    return int(min(max(trade_count, MIN_HORIZON), MAX_HORIZON))
+
+
+def simulate_shard(resultat, capital: float, n_paths: int, horizon: int, ruin_level: float = RUIN_LEVEL,
+                   seed=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Simule un lot de trajectoires de solde par tirage avec remise des résultats passés (bootstrap).
+
+    Fonction de module (sérialisable) : c'est l'unité de travail envoyée aux processus.
+
+    Returns:
+        tuple: (drawdown maximal de chaque trajectoire en % du plus haut, solde final, ruine atteinte)
+    """
+    resultat = np.asarray(resultat, dtype=float)
+    rng = np.random.default_rng(seed)
+    equity = resultat[rng.integers(0, len(resultat), size=(n_paths, horizon))]
+    np.cumsum(equity, axis=1, out=equity)
+    equity += capital
+    peaks = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peaks, capital, out=peaks)  # Le capital initial est le premier plus haut
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(peaks > 0, (peaks - equity) / peaks * 100, 100.0)
+    max_drawdown = np.minimum(drawdown.max(axis=1), 100.0)
+    ruined = equity.min(axis=1) <= capital * (1 - ruin_level / 100)
+    return max_drawdown, equity[:, -1].copy(), ruined
+
+
+def summarize(max_drawdown: np.ndarray, final_equity: np.ndarray, ruined: np.ndarray, capital: float,
+              levels=DRAWDOWN_LEVELS, ruin_level: float = RUIN_LEVEL) -> dict:
+    """Percentiles de drawdown et de solde final, probabilités de drawdown par seuil et de ruine."""
+    return {
+        'paths': int(len(max_drawdown)),
+        'capital_initial': capital,
+        'drawdown_percentiles': {
+            str(q): round(float(v), 2) for q, v in zip(PERCENTILES, np.percentile(max_drawdown, PERCENTILES))
+        },
+        'drawdown_probabilities': {
+            str(level): round(float(np.mean(max_drawdown >= level)) * 100, 2) for level in levels
+        },
+        'final_equity_percentiles': {
+            str(q): round(float(v), 2) for q, v in zip(PERCENTILES, np.percentile(final_equity, PERCENTILES))
+        },
+        'ruin_level': ruin_level,
+        'ruin_probability': round(float(np.mean(ruined)) * 100, 2),
+    }
+
+
+def run_simulation(resultat, capital: float, n_paths: int = DEFAULT_PATHS, horizon: int | None = None,
+                   executor=None, shard_paths: int = SHARD_PATHS, seed=None) -> dict | None:
+    """
+    Simulation Monte Carlo du risque de ruine d'un journal.
+
+    Les trajectoires sont réparties en lots indépendants (graines dérivées de seed) : avec un executor
+    (concurrent.futures.ProcessPoolExecutor) les lots sont calculés en parallèle, sinon dans le processus courant.
+
+    Args:
+        resultat: Résultats des trades clôturés du journal
+        capital: Capital initial du journal
+        n_paths: Nombre de trajectoires simulées
+        horizon: Nombre de trades par trajectoire (default_horizon par défaut)
+
+    Returns:
+        dict: Voir summarize, complété du nombre de trades et de l'horizon ; None sans trade clôturé
+    """
+    resultat = np.asarray(resultat, dtype=float)
+    resultat = resultat[~np.isnan(resultat)]
+    if not len(resultat):
+        return None
+    horizon = horizon or default_horizon(len(resultat))
+    sizes = [min(shard_paths, n_paths - start) for start in range(0, n_paths, shard_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    arguments = [(resultat, capital, size, horizon, RUIN_LEVEL, shard_seed) for size, shard_seed in zip(sizes, seeds)]
+    if executor is None:
+        shards = [simulate_shard(*args) for args in arguments]
+    else:
+        shards = list(executor.map(simulate_shard, *zip(*arguments)))
+    max_drawdown, final_equity, ruined = (np.concatenate(parts) for parts in zip(*shards))
+    summary = summarize(max_drawdown, final_equity, ruined, capital)
+    summary.update({'trades': int(len(resultat)), 'horizon': int(horizon)})
+    return summary
@@ -0,0 +1,78 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+def approximate_size(value) -> int:
+    """Estime la taille mémoire (en octets) d'une structure de dicts, listes et scalaires."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class VersionedLRUCache:
+    """
+    Cache LRU de résultats calculés, indexés par (espace, identifiant, version).
+
+    Une version plus récente remplace l'entrée précédente du même (espace, identifiant) :
+    une écriture qui incrémente la version invalide donc le cache sans suppression explicite.
+    Les entrées les moins récemment lues sont évincées au-delà de max_entries ou de max_bytes.
+    """
+
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (espace, identifiant) -> (version, valeur, taille)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, key, version):
+        """Retourne la valeur en cache pour cette version, ou None."""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return entry[1]
+
+    def set(self, namespace: str, key, version, value) -> None:
+        """Enregistre la valeur calculée pour cette version et évince si nécessaire."""
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop((namespace, key), None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[(namespace, key)] = (version, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def get_or_compute(self, namespace: str, key, version, compute):
+        """Retourne la valeur en cache ou la calcule avec compute() puis la met en cache."""
+        value = self.get(namespace, key, version)
+        if value is None:
+            value = compute()
+            self.set(namespace, key, version, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
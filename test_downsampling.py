@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from downsampling import lttb, downsample, drawdown_extremes, point_budget, MAX_POINTS
+
+def naive_lttb(x, y, threshold):
+    """Implémentation de référence de LTTB, point par point."""
+    n = len(y)
+    every = (n - 2) / (threshold - 2)
+    selected, a = [0], 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        if i == threshold - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+            avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        best, best_area = start, -1
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    return selected + [n - 1]
+
+class TestDownsampling(unittest.TestCase):
+    def test_matches_reference(self):
+        rng = np.random.default_rng(4)
+        y = np.cumsum(rng.normal(0, 1, 2000))
+        x = np.arange(2000.0)
+        for threshold in (3, 10, 97, 500):
+            self.assertEqual(lttb(x, y, threshold).tolist(), naive_lttb(x, y, threshold))
+
+    def test_short_series_unchanged(self):
+        self.assertEqual(lttb([0, 1, 2], [5, 6, 7], 10).tolist(), [0, 1, 2])
+        self.assertEqual(len(lttb(np.arange(100), np.arange(100), 2)), 100)
+
+    def test_keeps_spikes_and_drawdown(self):
+        y = np.zeros(100_000)
+        y[31_337] = 500.0
+        kept = lttb(np.arange(len(y)), y, 1000)
+        self.assertEqual(len(kept), 1000)
+        self.assertIn(31_337, kept)
+        equity = np.concatenate((np.linspace(100, 200, 5000), np.linspace(200, 50, 3000), np.linspace(50, 300, 7000)))
+        peak, trough = drawdown_extremes(equity)
+        self.assertEqual((peak, trough), (4999, 7999))
+        kept = downsample(np.arange(len(equity)), equity, 50, keep=(peak, trough))
+        self.assertTrue({peak, trough} <= set(kept.tolist()))
+
+    def test_point_budget(self):
+        self.assertEqual(point_budget(None, 1500), 1500)
+        self.assertEqual(point_budget('abc', 1500), 1500)
+        self.assertEqual(point_budget('1'), 3)
+        self.assertEqual(point_budget(10 ** 9), MAX_POINTS)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+import numpy as np
+from fx_rates import FxRateStore, to_epoch
+from pricing import price_trades
+
+class TestFxRateStore(unittest.TestCase):
+    def setUp(self):
+        self.store = FxRateStore.from_rows([
+            ('2025-01-10', 'EUR', 'USD', '1.10'),
+            ('2025-01-01', 'eur', 'usd', '1.00'),
+            ('2025-01-20 12:00', 'EUR', 'USD', '1.20'),
+        ])
+
+    def test_as_of_lookup(self):
+        self.assertIsNone(self.store.rate_at('EUR', 'USD', datetime(2024, 12, 31)))
+        self.assertEqual(self.store.rate_at('EUR', 'USD', datetime(2025, 1, 10)), 1.10)
+        self.assertEqual(self.store.rate_at('EUR', 'USD', datetime(2025, 1, 20, 11)), 1.10)
+        self.assertAlmostEqual(self.store.rate_at('USD', 'EUR', datetime(2025, 2, 1)), 1 / 1.20)
+        self.assertEqual(self.store.rate_at('GBP', 'USD', datetime(2025, 2, 1), default=1.3), 1.3)
+
+    def test_vectorized_lookup_matches_scalar(self):
+        dates = [datetime(2024, 12, 1), datetime(2025, 1, 5), datetime(2025, 1, 15), datetime(2025, 3, 1)]
+        timestamps = [to_epoch(d) for d in dates] + [np.nan]
+        rates = self.store.rates_at('EUR', 'USD', timestamps, default=0.9)
+        np.testing.assert_allclose(rates, [0.9, 1.0, 1.1, 1.2, 0.9])
+        for date, rate in zip(dates[1:], rates[1:]):
+            self.assertEqual(self.store.rate_at('EUR', 'USD', date), rate)
+
+    def test_from_directory_and_pricing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'eurusd.csv'), 'w') as f:
+                f.write("date,base,quote,rate\n2025-01-01,EUR,USD,1.05\n2025-06-01,EUR,USD,1.15\n")
+            store = FxRateStore.from_directory(directory)
+        self.assertEqual(store.pairs, [('EUR', 'USD')])
+        instruments = {"DAX": {"type": "futures", "contract_size": 1, "point_value": 1, "currency": "EUR"}}
+        priced = price_trades(["DAX"] * 3, ["Achat"] * 3, [100] * 3, [110] * 3, [1] * 3, ["USD"] * 3,
+                              [1000] * 3, [1] * 3, instruments, {("EUR", "USD"): 1.1},
+                              dates=[to_epoch(datetime(2024, 6, 1)), to_epoch(datetime(2025, 3, 1)),
+                                     to_epoch(datetime(2025, 7, 1))], fx=store)
+        np.testing.assert_allclose(priced.resultat, [11.0, 10.5, 11.5])
+
+if __name__ == '__main__':
+    unittest.main()
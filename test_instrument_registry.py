@@ -0,0 +1,52 @@
+import unittest
+from instrument_registry import InstrumentRegistry, instrument_spec
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestInstrumentRegistry(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.version = 1
+        self.table = {"EUR/USD": instrument_spec('forex', 'USD', pip_value=10)}
+        self.version_reads = 0
+        self.registry = InstrumentRegistry(self.load_version, lambda: dict(self.table),
+                                           check_interval=5, clock=self.clock)
+
+    def load_version(self):
+        self.version_reads += 1
+        return self.version
+
+    def test_reload_only_on_version_change(self):
+        self.assertEqual(self.registry.get("EUR/USD")['quote_currency'], 'USD')
+        self.table["DAX"] = instrument_spec('futures', 'EUR', contract_size=25, point_value=5)
+        self.clock.now = 10
+        self.assertNotIn("DAX", self.registry)  # version inchangée : pas de rechargement
+        self.version = 2
+        self.clock.now = 12
+        self.assertNotIn("DAX", self.registry)  # vérification pas encore due
+        self.clock.now = 16
+        self.assertIn("DAX", self.registry)
+        self.assertEqual(self.registry.reloads, 2)
+        self.assertEqual(self.version_reads, 3)
+
+    def test_invalidate_forces_check(self):
+        self.registry.instruments()
+        self.version = 2
+        self.registry.invalidate()
+        self.registry.instruments()
+        self.assertEqual(self.registry.version, 2)
+
+    def test_spec_validation(self):
+        self.assertEqual(instrument_spec('stock', 'USD', multiplier=1), {'type': 'stock', 'currency': 'USD', 'multiplier': 1})
+        with self.assertRaises(ValueError):
+            instrument_spec('futures', 'EUR', contract_size=25)
+        with self.assertRaises(ValueError):
+            instrument_spec('crypto', 'USD')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+from journal_analytics import (arrays_from_rows, equity_curve, drawdown, profit_factor, streaks,
+                               sharpe_ratio, sortino_ratio, average_holding_time, excursion_stats,
+                               compute_journal_metrics, daily_pnl_matrix, most_traded, correlation_matrix,
+                               rolling_correlations)
+
+class TestJournalAnalytics(unittest.TestCase):
+    def setUp(self):
+        # (resultat, date_debut, date_fin, lot, mae, mfe)
+        self.arrays = arrays_from_rows([
+            (100.0, 0, 3600, 1, -20.0, 200.0),
+            (50.0, 3600, 10800, 1, -10.0, 50.0),
+            (-200.0, 7200, 9000, 1, -250.0, 0.0),
+            (-50.0, 9000, None, 1, None, None),
+            (0.0, 9000, 9600, 1, -30.0, 10.0),
+            (300.0, 10000, 17200, 1, None, None),
+        ])
+
+    def test_equity_and_drawdown(self):
+        equity = equity_curve(1000, self.arrays.resultat)
+        np.testing.assert_allclose(equity, [1000, 1100, 1150, 950, 900, 900, 1200])
+        current, max_dd, max_dd_pct = drawdown(equity)
+        self.assertEqual(max_dd, 250)
+        self.assertAlmostEqual(max_dd_pct, 250 / 1150 * 100)
+        self.assertEqual(current[-1], 0)
+
+    def test_profit_factor(self):
+        self.assertAlmostEqual(profit_factor(self.arrays.resultat), 450 / 250)
+        self.assertIsNone(profit_factor(np.array([10.0, 5.0])))
+
+    def test_streaks(self):
+        self.assertEqual(streaks(self.arrays.resultat), (2, 2))
+        self.assertEqual(streaks(np.array([])), (0, 0))
+
+    def test_ratios(self):
+        returns = np.array([0.01, -0.02, 0.03, 0.01])
+        self.assertAlmostEqual(sharpe_ratio(returns), returns.mean() / returns.std(ddof=1))
+        self.assertAlmostEqual(sortino_ratio(returns), returns.mean() / np.sqrt(0.02 ** 2 / 4))
+        self.assertEqual(sharpe_ratio(np.array([0.01])), 0.0)
+
+    def test_average_holding_time_ignores_missing_dates(self):
+        self.assertAlmostEqual(average_holding_time(self.arrays.date_debut, self.arrays.date_fin),
+                               (3600 + 7200 + 1800 + 600 + 7200) / 5)
+
+    def test_excursion_stats(self):
+        stats = excursion_stats(self.arrays.resultat, self.arrays.mae, self.arrays.mfe)
+        self.assertEqual(stats['excursion_trades'], 4)
+        self.assertAlmostEqual(stats['avg_mae'], -310 / 4)
+        self.assertAlmostEqual(stats['avg_mfe'], 260 / 4)
+        self.assertAlmostEqual(stats['exit_efficiency'], (0.5 + 1.0) / 2 * 100)
+
+    def test_empty_journal(self):
+        metrics = compute_journal_metrics(1000, arrays_from_rows([]))
+        self.assertEqual(metrics['closed_trades'], 0)
+        self.assertEqual(metrics['final_equity'], 1000)
+        self.assertEqual(metrics['max_drawdown'], 0)
+        self.assertIsNone(metrics['exit_efficiency'])
+
+    def test_daily_pnl_matrix(self):
+        daily = daily_pnl_matrix([
+            ('2024-01-02', 'EUR/USD', 100.0, 2), ('2024-01-02', 'DAX', -50.0, 1),
+            ('2024-01-03', 'EUR/USD', 30.0, 1), ('2024-01-05', 'AAPL', 10.0, 1),
+        ])
+        self.assertEqual(daily.days, ['2024-01-02', '2024-01-03', '2024-01-05'])
+        self.assertEqual(daily.instruments, ['AAPL', 'DAX', 'EUR/USD'])
+        np.testing.assert_allclose(daily.pnl, [[0, -50, 100], [0, 0, 30], [10, 0, 0]])
+        self.assertEqual(daily.trade_counts.tolist(), [1, 1, 3])
+        top = most_traded(daily, 1)
+        self.assertEqual((top.instruments, top.days), (['EUR/USD'], ['2024-01-02', '2024-01-03']))
+
+    def test_correlations(self):
+        rng = np.random.default_rng(2)
+        pnl = rng.normal(0, 100, (60, 3))
+        pnl[:, 1] = 2 * pnl[:, 0] + rng.normal(0, 10, 60)
+        pnl[30:40, 2] = 0.0  # Fenêtres sans variation
+        np.testing.assert_allclose(correlation_matrix(pnl), np.corrcoef(pnl.T), atol=1e-12)
+        self.assertTrue(np.isnan(correlation_matrix(np.ones((5, 2)))[0, 1]))
+        pairs, rolling = rolling_correlations(pnl, 10)
+        self.assertEqual(pairs.tolist(), [[0, 1], [0, 2], [1, 2]])
+        self.assertEqual(rolling.shape, (3, 51))
+        for p, (a, b) in enumerate(pairs):
+            for end in range(10, 61):
+                window = pnl[end - 10:end]
+                expected = np.corrcoef(window[:, a], window[:, b])[0, 1] if window[:, b].std() > 0 else np.nan
+                np.testing.assert_allclose(rolling[p, end - 10], expected, atol=1e-9)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import csv
+import io
+import unittest
+from datetime import datetime
+from journal_export import csv_chunks, export_chunks, column_names, parquet_available
+
+class TestJournalExport(unittest.TestCase):
+    def test_csv_chunks_are_batched(self):
+        rows = ((i, None, datetime(2024, 1, 2, 3, 4, 5), 'a,"b"') for i in range(5))
+        chunks = list(csv_chunks(['id', 'vide', 'date', 'texte'], rows, batch_rows=2))
+        self.assertEqual(len(chunks), 4)  # En-tête puis 3 lots
+        parsed = list(csv.reader(io.StringIO(''.join(chunks))))
+        self.assertEqual(parsed[0], ['id', 'vide', 'date', 'texte'])
+        self.assertEqual(parsed[1], ['0', '', '2024-01-02 03:04:05', 'a,"b"'])
+        self.assertEqual(len(parsed), 6)
+
+    def test_export_chunks_csv(self):
+        columns = column_names('analyses')
+        data = b''.join(export_chunks('analyses', 'csv', [(1, 2, 'Titre é', 'Contenu', None, None)]))
+        self.assertEqual(data.decode('utf-8').splitlines(), [','.join(columns), '1,2,Titre é,Contenu,,'])
+
+    @unittest.skipUnless(parquet_available(), "pyarrow non installé")
+    def test_export_chunks_parquet(self):
+        import pyarrow.parquet as pq
+        rows = [(i, 1, 'Titre', 'Contenu', None, datetime(2024, 1, 1)) for i in range(7)]
+        data = b''.join(export_chunks('analyses', 'parquet', rows, batch_rows=3))
+        table = pq.read_table(io.BytesIO(data))
+        self.assertEqual(table.num_rows, 7)
+        self.assertEqual(table.column('id').to_pylist(), list(range(7)))
+
+if __name__ == '__main__':
+    unittest.main()
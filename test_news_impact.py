@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+from news_impact import (NEWS_DURING, NEWS_NEAR, NEWS_NONE, EventIndex, event_breakdown, instrument_currencies,
+                         is_high_impact, news_breakdown)
+
+def naive_category(currencies, start, end, events, window):
+    """Comparaison de chaque trade à chaque annonce, référence de la recherche dichotomique."""
+    best = NEWS_NONE
+    for time, currency in events:
+        if currency not in currencies:
+            continue
+        if start <= time <= end:
+            best = NEWS_DURING
+        elif min(abs(time - start), abs(time - end)) <= window:
+            best = max(best, NEWS_NEAR)
+    return best
+
+class TestNewsImpact(unittest.TestCase):
+    def test_instrument_currencies(self):
+        self.assertEqual(instrument_currencies("EUR/USD", {'type': 'forex', 'quote_currency': 'USD'}), ('EUR', 'USD'))
+        self.assertEqual(instrument_currencies("gbpjpy.m"), ('GBP', 'JPY'))
+        self.assertEqual(instrument_currencies("DAX", {'type': 'futures', 'currency': 'EUR'}), ('EUR',))
+        self.assertEqual(instrument_currencies("XYZ"), ())
+        self.assertTrue(is_high_impact("High"))
+        self.assertTrue(is_high_impact(3))
+        self.assertFalse(is_high_impact("Medium"))
+
+    def test_matches_nested_loops(self):
+        rng = np.random.default_rng(5)
+        codes = ['EUR', 'USD', 'JPY', 'GBP']
+        event_times = rng.uniform(0, 1_000_000, 300)
+        event_currencies = rng.choice(codes, 300)
+        starts = rng.uniform(0, 1_000_000, 2000)
+        ends = starts + rng.exponential(3600, 2000)
+        ends[::50] = np.nan  # Trades sans date de clôture
+        pairs = [tuple(rng.choice(codes, 2, replace=False)) for _ in range(2000)]
+        category, event = EventIndex(event_times, event_currencies).match(pairs, starts, ends, 1800)
+        events = list(zip(event_times, event_currencies))
+        for i, (currencies, start, end) in enumerate(zip(pairs, starts, ends)):
+            end = start if np.isnan(end) else end
+            self.assertEqual(category[i], naive_category(currencies, start, end, events, 1800))
+            if category[i] == NEWS_NONE:
+                self.assertEqual(event[i], -1)
+            else:
+                self.assertIn(event_currencies[event[i]], currencies)
+                if category[i] == NEWS_DURING:
+                    self.assertTrue(start <= event_times[event[i]] <= end)
+
+    def test_breakdown(self):
+        resultat = [100, -50, 30, -20, np.nan]
+        category = [NEWS_DURING, NEWS_DURING, NEWS_NEAR, NEWS_NONE, NEWS_NONE]
+        rows = {row['category']: row for row in news_breakdown(resultat, category)}
+        self.assertEqual(rows['during']['count'], 2)
+        self.assertEqual(rows['during']['total_result'], 50)
+        self.assertEqual(rows['during']['win_rate'], 50)
+        self.assertEqual(rows['none']['average_result'], -10)
+        events = event_breakdown(resultat, category, [0, 1, 0, -1, -1], ["NFP", "BCE"])
+        self.assertEqual([row['title'] for row in events], ["NFP", "BCE"])
+        self.assertEqual(events[0]['total_result'], 130)
+
+if __name__ == '__main__':
+    unittest.main()
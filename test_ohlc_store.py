@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from ohlc_store import OhlcStore, window_extremes, price_excursions, parse_candle_times
+
+class TestOhlcStore(unittest.TestCase):
+    def setUp(self):
+        # Bougies d'une minute à partir de t=0 : plus haut = 10 + i, plus bas = 10 - i
+        self.times = np.arange(10, dtype=np.int64) * 60
+        self.high = 10.0 + np.arange(10)
+        self.low = 10.0 - np.arange(10)
+
+    def test_window_extremes(self):
+        starts = [0, 90, 300, 540, 600, np.nan]
+        ends = [120, 150, 299, 10000, 700, 60]
+        highest, lowest = window_extremes(self.times, self.high, self.low, starts, ends)
+        np.testing.assert_array_equal(highest[:2], [12, 12])
+        np.testing.assert_array_equal(lowest[:2], [8, 8])
+        self.assertTrue(np.isnan(highest[2]))  # Fin avant la bougie de début
+        self.assertEqual((highest[3], lowest[3]), (19, 1))  # Fenêtre finissant sur la dernière bougie
+        self.assertTrue(np.isnan(highest[4]) and np.isnan(highest[5]))
+
+    def test_window_extremes_reads_only_covered_span(self):
+        # Bougies hors de la plage des fenêtres à NaN : le résultat n'en dépend pas
+        rng = np.random.default_rng(7)
+        times = np.arange(1000, dtype=np.int64) * 60
+        high = rng.normal(100, 5, 1000)
+        low = high - rng.uniform(0, 2, 1000)
+        high[:200] = high[800:] = low[:200] = low[800:] = np.nan
+        starts = rng.uniform(200 * 60, 700 * 60, 50)
+        ends = starts + rng.uniform(0, 100 * 60, 50)
+        highest, lowest = window_extremes(times, high, low, starts, ends)
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            window = (times >= np.floor(start / 60) * 60) & (times <= end)
+            self.assertEqual((highest[i], lowest[i]), (high[window].max(), low[window].min()))
+
+    def test_price_excursions(self):
+        adverse, favourable = price_excursions(['achat', 'vente', 'achat'], [10, 10, 10],
+                                               np.array([12.0, 12.0, 9.0]), np.array([9.0, 9.0, 11.0]))
+        np.testing.assert_array_equal(adverse, [1, 2, 0])
+        np.testing.assert_array_equal(favourable, [2, 1, 0])
+
+    def test_parse_candle_times(self):
+        np.testing.assert_array_equal(parse_candle_times(['1970-01-01 00:01:00', '1970.01.01 00:02']), [60, 120])
+        np.testing.assert_array_equal(parse_candle_times(['180']), [180])
+
+    def test_store_round_trip_and_merge(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = OhlcStore(directory)
+            path = os.path.join(directory, 'eurusd.csv')
+            with open(path, 'w') as f:
+                f.write("time,open,high,low,close\n120,1,3,0,2\n60,1,2,1,1\n")
+            self.assertEqual(store.import_csv('EUR/USD', path), 2)
+            self.assertEqual(store.write('EURUSD', [120, 180], [[1, 5, 1, 1], [1, 1, 1, 1]]), 3)
+            times, ohlc = store.load('eurusd.m')
+            self.assertIsInstance(ohlc, np.memmap)
+            np.testing.assert_array_equal(times, [60, 120, 180])
+            np.testing.assert_array_equal(ohlc[1], [2, 5, 1])
+            self.assertEqual(store.symbols(), ['EURUSD'])
+            highest, _ = store.extremes('EUR/USD', [60], [120])
+            self.assertEqual(highest[0], 5)
+            self.assertTrue(np.isnan(store.extremes('GBP/USD', [60], [120])[0][0]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from trade_import import import_in_chunks, trade_hash, write_imported_trades
+from platform_sync import link_folder, pending_statements, read_statements, after_watermark, run_bounded
+
+HEADER = "date_debut,instrument,position,prix_entree,lot,date_fin,prix_sortie\n"
+
+class TestPlatformSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content, mtime):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_link_folder_is_sanitized(self):
+        self.assertEqual(link_folder('/data', 'MT5', '../../etc'), os.path.join('/data', 'MT5', 'etc'))
+
+    def test_pending_statements_after_file_watermark(self):
+        old = self.write('a.csv', HEADER, 1000)
+        new = self.write('b.txt', HEADER, 2000)
+        self.write('notes.md', 'x', 3000)
+        self.assertEqual(pending_statements(self.tmp.name), [(1000, old), (2000, new)])
+        self.assertEqual(pending_statements(self.tmp.name, 1000), [(2000, new)])
+        self.assertEqual(pending_statements(os.path.join(self.tmp.name, 'absent')), [])
+
+    def test_read_statements_keeps_going_after_bad_file(self):
+        bad = self.write('bad.csv', "foo,bar\n1,2\n", 1000)
+        good = self.write('good.csv', HEADER + "2024-01-02 09:00,EUR/USD,achat,1.1,1,2024-01-02 10:00,1.2\n"
+                          "2024-01-03 09:00,EUR/USD,achat,1.1,1,,\n", 2000)
+        rows = list(read_statements([bad, good]))
+        self.assertEqual(rows[0][:2], (0, None))
+        self.assertTrue(rows[0][2].startswith('bad.csv : '))
+        kept = list(after_watermark(rows, datetime(2024, 1, 2, 10)))
+        self.assertEqual([row['date_debut'].day for _, row, _ in kept if row], [2, 3])
+        kept = list(after_watermark(rows, datetime(2024, 1, 2, 10, 1)))
+        self.assertEqual([row['date_debut'].day for _, row, _ in kept if row], [3])
+        self.assertEqual(len(kept), 2)  # Le rejet est conservé
+
+    def test_run_bounded(self):
+        active, peak, guard = [0], [0], threading.Lock()
+
+        def work(item):
+            with guard:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with guard:
+                active[0] -= 1
+            if item == 3:
+                raise ValueError("échec")
+            return item * 2
+
+        results = run_bounded(work, range(10), max_workers=3)
+        self.assertLessEqual(peak[0], 3)
+        self.assertEqual([item for item, _, _ in results], list(range(10)))
+        self.assertIsInstance(results[3][2], ValueError)
+        self.assertEqual(results[4][1:], (8, None))
+
+    def test_sync_failure_partway_through_statement_is_finalized(self):
+        path = self.write('a.csv', HEADER + "".join(
+            f"2024-01-{day:02d} 09:00,EUR/USD,achat,1.1,1,2024-01-{day:02d} 10:00,1.2\n" for day in range(1, 11)), 1000)
+
+        def failing(parsed, after):
+            for count, item in enumerate(parsed):
+                if count == after:
+                    raise OSError("disque indisponible")
+                yield item
+
+        finalized = []
+        with self.assertRaises(OSError):
+            import_in_chunks(failing(after_watermark(read_statements([path]), None), 7), 3, lambda rows: (len(rows), 0),
+                             lambda report, completed: finalized.append((report.inserted, completed, report.earliest_close)))
+        # Deux lots de 3 trades validés avant l'échec : le journal doit être mis à jour pour eux
+        self.assertEqual(finalized, [(6, False, datetime(2024, 1, 1, 10))])
+
+    def test_position_synced_open_then_closed_is_one_trade(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute("""CREATE TABLE trades (id INTEGER PRIMARY KEY, journal_id, date_debut, date_fin, session,
+                        instrument, position, prix_entree, prix_sortie, lot, risk_reward, time_frame, commentaires,
+                        resultat, pourcentage, statut, tags, date_enregistrement, import_hash)""")
+        conn.execute("CREATE UNIQUE INDEX uq_trades_journal_import_hash ON trades (journal_id, import_hash)")
+
+        def insert_chunk(rows):
+            inserts, closes = [], []
+            for row in rows:
+                digest, closed = trade_hash(row), row['prix_sortie'] is not None
+                resultat = (row['prix_sortie'] - row['prix_entree']) * row['lot'] if closed else None
+                date_fin = str(row['date_fin']) if row['date_fin'] else None
+                inserts.append((1, str(row['date_debut']), date_fin, None, row['instrument'], row['position'],
+                                row['prix_entree'], row['prix_sortie'], row['lot'], '', None, None, resultat, 0.0,
+                                'TERMINE' if closed else 'EN_COURS', None, '', digest))
+                if closed:
+                    closes.append((date_fin, row['prix_sortie'], resultat, 0.0, 1, digest))
+            with conn:
+                return write_imported_trades(conn, inserts, closes)
+
+        def sync(watermark, file_mtime):
+            statements = pending_statements(self.tmp.name, file_mtime)
+            parsed = after_watermark(read_statements([path for _, path in statements]), watermark)
+            return import_in_chunks(parsed, 100, insert_chunk, lambda report, completed: None), statements[-1][0]
+
+        self.write('1.csv', HEADER + "2024-01-02 09:00,EUR/USD,achat,1.1,2,,\n", 1000)
+        first, file_mtime = sync(None, None)
+        self.assertEqual((first.inserted, first.closed), (1, 0))
+        self.write('2.csv', HEADER + "2024-01-02 09:00,EUR/USD,achat,1.1,2,2024-01-03 10:00,1.2\n", 2000)
+        second, _ = sync(first.latest_trade_at, file_mtime)
+        self.assertEqual((second.inserted, second.closed, second.duplicates), (0, 1, 0))
+        trades = conn.execute("SELECT statut, prix_sortie, date_fin, round(resultat, 6) FROM trades").fetchall()
+        self.assertEqual(trades, [('TERMINE', 1.2, '2024-01-03 10:00:00', 0.2)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from position_sizing import SizingRule, replay, kelly_fraction, risk_per_lot, rule_grid, summarize_curves, sample_curve
+
+def naive_replay(unit_pnl, notional, capital, rule):
+    """Rejeu trade par trade, référence des calculs vectorisés."""
+    one_r = risk_per_lot(unit_pnl)
+    kelly = kelly_fraction(unit_pnl / one_r)
+    balance, curve = capital, [capital]
+    for pnl, value in zip(unit_pnl, notional):
+        cap = balance * rule.max_leverage / value if rule.max_leverage else np.inf
+        if rule.kind == 'fixed_lot':
+            lot = rule.value if balance > 0 and rule.value <= cap else 0.0
+        else:
+            fraction = rule.value / 100 if rule.kind == 'fixed_risk' else rule.value * kelly
+            lot = min(balance * fraction / one_r, cap)
+        balance = max(balance + lot * pnl, 0.0)
+        curve.append(balance)
+    return np.array(curve)
+
+class TestPositionSizing(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.unit_pnl = rng.normal(20, 200, 500)
+        self.notional = rng.uniform(5_000, 50_000, 500)
+
+    def test_matches_trade_by_trade_replay(self):
+        rules = rule_grid([0.5, 5, 40], [1, 5], [0.5, 1], leverages=[None, 10, 2])
+        curves, taken = replay(self.unit_pnl, self.notional, 10_000, rules)
+        for rule, curve in zip(rules, curves):
+            np.testing.assert_allclose(curve, naive_replay(self.unit_pnl, self.notional, 10_000, rule),
+                                       rtol=1e-9, atol=1e-6, err_msg=rule.label)
+        # Avec un levier de 2, un lot de 40 (200 000 à 2 000 000 engagés) n'est jamais finançable
+        self.assertEqual(taken[rules.index(SizingRule('fixed_lot', 40, 2))], 0)
+
+    def test_kelly_fraction(self):
+        # 60 % de gains de 2R, 40 % de pertes de 1R : 0.6 - 0.4 / 2 = 0.4
+        self.assertAlmostEqual(kelly_fraction(np.array([2, 2, 2, -1, -1.0])), 0.4)
+        self.assertEqual(kelly_fraction(np.array([-1.0, -2.0])), 0.0)
+
+    def test_summary_and_sampling(self):
+        curves = np.array([[100, 120, 60, 90], [100, 50, 0, 0]], dtype=float)
+        summary = summarize_curves(curves, 100)
+        np.testing.assert_allclose(summary['max_drawdown_pct'], [50, 100])
+        np.testing.assert_array_equal(summary['ruined'], [False, True])
+        sampled = sample_curve(np.array([100.0] * 500 + [150.0] + [40.0] * 499), points=5)
+        self.assertEqual((sampled['x'][0], sampled['x'][-1]), (0, 999))
+        self.assertIn(150, sampled['y'])  # Le plus haut et le creux du drawdown sont conservés
+        self.assertIn(40, sampled['y'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+from pricing import price_trade, price_trades
+
+INSTRUMENTS = {
+    "EUR/USD": {"type": "forex", "pip_value": 10, "quote_currency": "USD"},
+    "USD/JPY": {"type": "forex", "pip_value": 1000, "quote_currency": "JPY"},
+    "AAPL": {"type": "stock", "multiplier": 1, "currency": "USD"},
+    "DAX": {"type": "futures", "contract_size": 25, "point_value": 5, "currency": "EUR"},
+    "Or": {"type": "commodity", "contract_size": 100, "currency": "USD"},
+}
+RATES = {("EUR", "USD"): 1.1, ("JPY", "USD"): 0.007}
+
+class TestPricing(unittest.TestCase):
+    def test_forex_pips(self):
+        resultat, pourcentage, margin = price_trade("EUR/USD", "Achat", 1.1000, 1.1050, 2, "USD", 10000, 100, INSTRUMENTS, RATES)
+        self.assertAlmostEqual(resultat, 50 * 2 * 10)
+        self.assertAlmostEqual(pourcentage, 10)
+        self.assertAlmostEqual(margin, 1.1 * 2 * 10 / 100)
+        resultat, _, _ = price_trade("USD/JPY", "Vente", 150.00, 149.50, 1, "USD", 10000, 1, INSTRUMENTS, RATES)
+        self.assertAlmostEqual(resultat, 50 * 1000 * 0.007)
+
+    def test_direction_conversion_and_contracts(self):
+        priced = price_trades(
+            ["AAPL", "DAX", "Or", "XYZ"], ["Vente", "Achat", "achat", "Vente"],
+            [200, 18000, 2000, 10], [190, 18010, None, 12], [3, 4, 1, 5],
+            ["USD"] * 4, [1000] * 4, [1] * 4, INSTRUMENTS, RATES
+        )
+        np.testing.assert_allclose(priced.resultat[[0, 1, 3]], [30, 10 * 25 * 5 * 1.1, -10])
+        self.assertTrue(np.isnan(priced.resultat[2]))
+        np.testing.assert_allclose(priced.pourcentage, [3, 137.5, 0, -1])
+        np.testing.assert_allclose(priced.margin, [600, 18000 * 125 * 1.1, 200000, 50])
+
+    def test_open_trade(self):
+        self.assertEqual(price_trade("AAPL", "Achat", 100, None, 1, "USD", 0, 0, INSTRUMENTS, RATES), (None, 0.0, 100.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from risk_simulation import simulate_shard, summarize, run_simulation, default_horizon
+
+class TestRiskSimulation(unittest.TestCase):
+    def test_constant_losses_are_deterministic(self):
+        max_drawdown, final, ruined = simulate_shard([-100.0], 1000, n_paths=3, horizon=6, ruin_level=50, seed=1)
+        np.testing.assert_allclose(max_drawdown, [60, 60, 60])
+        np.testing.assert_allclose(final, [400, 400, 400])
+        self.assertTrue(ruined.all())
+        _, _, ruined = simulate_shard([-100.0], 1000, n_paths=2, horizon=4, ruin_level=50, seed=1)
+        self.assertFalse(ruined.any())
+
+    def test_drawdown_is_measured_from_running_peak(self):
+        max_drawdown, _, _ = simulate_shard([100.0], 1000, n_paths=1, horizon=3, seed=0)
+        self.assertEqual(max_drawdown[0], 0)
+        max_drawdown, _, _ = simulate_shard([-2000.0], 1000, n_paths=1, horizon=2, seed=0)
+        self.assertEqual(max_drawdown[0], 100)
+
+    def test_summarize(self):
+        summary = summarize(np.array([5.0, 15.0, 35.0, 60.0]), np.array([1.0, 2.0, 3.0, 4.0]),
+                            np.array([False, False, False, True]), 1000, levels=(10, 30))
+        self.assertEqual(summary['drawdown_probabilities'], {'10': 75.0, '30': 50.0})
+        self.assertEqual(summary['ruin_probability'], 25.0)
+        self.assertEqual(summary['paths'], 4)
+
+    def test_sharded_runs_are_reproducible(self):
+        resultat = [120.0, -80.0, 40.0, -150.0, 90.0, np.nan]
+        local = run_simulation(resultat, 5000, n_paths=1000, shard_paths=300, seed=7)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            pooled = run_simulation(resultat, 5000, n_paths=1000, shard_paths=300, seed=7, executor=executor)
+        self.assertEqual(local, pooled)
+        self.assertEqual((local['paths'], local['trades'], local['horizon']), (1000, 5, default_horizon(5)))
+        self.assertIsNone(run_simulation([], 5000))
+
+if __name__ == '__main__':
+    unittest.main()
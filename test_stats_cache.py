@@ -0,0 +1,40 @@
+import unittest
+from stats_cache import VersionedLRUCache
+
+class TestVersionedLRUCache(unittest.TestCase):
+    def test_new_version_invalidates(self):
+        cache = VersionedLRUCache()
+        cache.set('dashboard', 1, 0, {'solde': 100})
+        self.assertEqual(cache.get('dashboard', 1, 0), {'solde': 100})
+        self.assertIsNone(cache.get('dashboard', 1, 1))
+        cache.set('dashboard', 1, 1, {'solde': 150})
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get('dashboard', 1, 0))
+
+    def test_lru_eviction_by_entries(self):
+        cache = VersionedLRUCache(max_entries=2)
+        cache.set('dashboard', 1, 0, 'a')
+        cache.set('dashboard', 2, 0, 'b')
+        cache.get('dashboard', 1, 0)
+        cache.set('dashboard', 3, 0, 'c')
+        self.assertEqual(cache.get('dashboard', 1, 0), 'a')
+        self.assertIsNone(cache.get('dashboard', 2, 0))
+
+    def test_memory_cap(self):
+        cache = VersionedLRUCache(max_bytes=20000)
+        for journal_id in range(50):
+            cache.set('dashboard', journal_id, 0, {'mois': [str(i) for i in range(20)]})
+        self.assertLessEqual(cache.size_bytes, 20000)
+        self.assertIsNotNone(cache.get('dashboard', 49, 0))
+        self.assertIsNone(cache.get('dashboard', 0, 0))
+
+    def test_get_or_compute(self):
+        cache = VersionedLRUCache()
+        calls = []
+        compute = lambda: calls.append(1) or {'n': len(calls)}
+        self.assertEqual(cache.get_or_compute('home', 7, (1, 0), compute), {'n': 1})
+        self.assertEqual(cache.get_or_compute('home', 7, (1, 0), compute), {'n': 1})
+        self.assertEqual(len(calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from trade_close import close_errors, close_positions
+from trade_stats import aggregate_trades, apply_contribution
+
+OPEN = datetime(2025, 3, 3, 9, 0)
+CLOSE = datetime(2025, 3, 3, 17, 0)
+
+
+def open_trade(trade_id, instrument="EUR/USD", tags="Breakout"):
+    return SimpleNamespace(id=trade_id, instrument=instrument, tags=tags, date_debut=OPEN, prix_entree=1.1,
+                           prix_sortie=None, date_fin=None, resultat=None, pourcentage=None, statut="EN_COURS")
+
+
+def price(closed, closes):
+    # Résultat fictif : écart de prix x 1000
+    resultats = [(prix_sortie - trade.prix_entree) * 1000 for trade, (_, prix_sortie, _) in zip(closed, closes)]
+    return resultats, [resultat / 100 for resultat in resultats]
+
+
+class TestTradeClose(unittest.TestCase):
+    def setUp(self):
+        # Journal : deux positions ouvertes et une clôturée ; le trade 9 appartient à un autre journal
+        self.trades = {1: open_trade(1), 2: open_trade(2, "AAPL", None), 3: open_trade(3)}
+        self.trades[3].prix_sortie, self.trades[3].resultat, self.trades[3].statut = 1.2, 100.0, "TERMINE"
+        self.records = []
+
+    def close(self, closes):
+        return close_positions(self.trades, closes, price, self.records.append)
+
+    def test_valid_closes(self):
+        self.assertEqual(close_errors(self.trades, [(1, 1.15, CLOSE), (2, 180.0, CLOSE)]), [])
+
+    def test_rejections(self):
+        self.assertEqual(close_errors(self.trades, [(1, 1.15, CLOSE), (1, 1.16, CLOSE)]),
+                         ["un même trade figure plusieurs fois dans la clôture"])
+        self.assertEqual(close_errors(self.trades, [(9, 1.15, CLOSE)]), ["trade 9 introuvable"])
+        self.assertEqual(close_errors(self.trades, [(3, 1.15, CLOSE)]), ["trade 3 déjà clôturé"])
+        self.assertEqual(close_errors(self.trades, [(1, 1.15, datetime(2025, 3, 2))]),
+                         ["trade 1 clôturé avant son ouverture"])
+        self.assertEqual(close_errors(self.trades, [(1, 1.15, CLOSE.replace(tzinfo=timezone.utc))]),
+                         ["trade 1 : date de clôture avec fuseau horaire"])
+        for prix_sortie in (float('nan'), float('inf'), -1.0, 0.0):
+            self.assertEqual(close_errors(self.trades, [(1, prix_sortie, CLOSE)]),
+                             ["trade 1 : prix de sortie invalide"])
+
+    def test_all_or_nothing(self):
+        with self.assertRaises(ValueError) as raised:
+            self.close([(1, 1.15, CLOSE), (2, float('nan'), CLOSE), (9, 1.15, CLOSE)])
+        self.assertIn("trade 2 : prix de sortie invalide", str(raised.exception))
+        self.assertIn("trade 9 introuvable", str(raised.exception))
+        # Aucun trade modifié, statistiques et version des données inchangées
+        self.assertIsNone(self.trades[1].prix_sortie)
+        self.assertEqual(self.trades[1].statut, "EN_COURS")
+        self.assertEqual(self.records, [])
+
+    def test_bulk_close_updates_stats_once(self):
+        rows = lambda: [(t.instrument, t.tags, t.date_debut, t.resultat) for t in self.trades.values()]
+        aggregate = aggregate_trades(rows())
+        closed = self.close([(2, 180.0, CLOSE), (1, 1.15, CLOSE)])
+        self.assertEqual([trade.id for trade in closed], [2, 1])
+        self.assertEqual((self.trades[1].statut, self.trades[1].date_fin), ("TERMINE", CLOSE))
+        self.assertAlmostEqual(self.trades[1].resultat, 50.0)
+        # Une seule mise à jour (une seule nouvelle version des données) pour tout le lot
+        self.assertEqual(len(self.records), 1)
+        for before, after in self.records[0]:
+            apply_contribution(aggregate, before, sign=-1)
+            apply_contribution(aggregate, after)
+        expected = aggregate_trades(rows())
+        self.assertEqual(aggregate['totals'], expected['totals'])
+        self.assertEqual(aggregate['buckets'], expected['buckets'])
+        self.assertEqual(expected['totals']['wins'], 3)
+
+    def test_empty_close(self):
+        self.assertEqual(self.close([]), [])
+        self.assertEqual(self.records, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import io
+import unittest
+from datetime import datetime
+from trade_import import (StatementFormatError, open_statement, parse_statement, parse_date, trade_hash,
+                          normalize_symbol, market_session, chunked, import_in_chunks)
+
+MT4_STATEMENT = (
+    "Ticket,Open Time,Type,Size,Item,Price,S / L,T / P,Close Time,Price,Commission,Taxes,Swap,Profit\n"
+    "101,2024.03.01 08:15,buy,0.10,eurusd,1.0800,0,0,2024.03.01 10:00,1.0830,0,0,0,30\n"
+    "102,2024.03.01 09:00,balance,,,,,,,,,,,500\n"
+    "103,2024.03.02 14:30,sell limit,0.10,gbpusd,1.2600,0,0,2024.03.02 15:00,1.2600,0,0,0,0\n"
+)
+
+class TestTradeImport(unittest.TestCase):
+    def test_native_csv(self):
+        stream = io.StringIO(
+            "date_debut;instrument;position;prix_entree;lot;prix_sortie;date_fin;tags\n"
+            "2024-01-02 09:00;EUR/USD;Achat;1,1000;1;1,1010;2024-01-02 11:00;News\n"
+            "2024-01-03;AAPL;short;190;2;;;\n"
+            "2024-01-04;AAPL;vente;;2;;;\n"
+        )
+        rows = list(parse_statement(stream))
+        self.assertEqual(rows[0][1]['prix_sortie'], 1.101)
+        self.assertEqual(rows[0][1]['position'], 'achat')
+        self.assertEqual(rows[0][1]['tags'], 'News')
+        self.assertEqual([(line, row, error) for line, row, error in rows[1:]],
+                         [(3, None, "position invalide : short"), (4, None, "champ obligatoire manquant")])
+
+    def test_mt4_statement_skips_non_trades(self):
+        rows = list(parse_statement(open_statement(io.BytesIO(MT4_STATEMENT.encode('utf-16')))))
+        self.assertEqual(len(rows), 1)
+        row = rows[0][1]
+        self.assertEqual((row['instrument'], row['position'], row['lot']), ('eurusd', 'achat', 0.10))
+        self.assertEqual(row['date_fin'], datetime(2024, 3, 1, 10, 0))
+
+    def test_unknown_format(self):
+        with self.assertRaises(StatementFormatError):
+            list(parse_statement(io.StringIO("foo,bar\n1,2\n")))
+
+    def test_helpers(self):
+        self.assertEqual(parse_date("2024.01.15 10:23:45"), datetime(2024, 1, 15, 10, 23, 45))
+        self.assertEqual(parse_date("2024-01-15T10:23"), datetime(2024, 1, 15, 10, 23))
+        self.assertEqual(normalize_symbol("eurusd.m"), normalize_symbol("EUR/USD"))
+        self.assertEqual(market_session(datetime(2024, 1, 1, 14)), 'New York')
+        self.assertEqual([len(chunk) for chunk in chunked(range(5), 2)], [2, 2, 1])
+        row = {'instrument': 'EUR/USD', 'position': 'achat', 'date_debut': datetime(2024, 1, 1), 'date_fin': None,
+               'prix_entree': 1.1, 'prix_sortie': None, 'lot': 1.0}
+        self.assertEqual(trade_hash(row), trade_hash(dict(row, instrument='EURUSD', tags='News')))
+        self.assertNotEqual(trade_hash(row), trade_hash(dict(row, lot=2.0)))
+        # La clôture ne change pas l'empreinte : la position relevée ouverte puis clôturée reste un seul trade
+        self.assertEqual(trade_hash(row), trade_hash(dict(row, date_fin=datetime(2024, 1, 2), prix_sortie=1.2)))
+
+    def test_import_in_chunks_finalizes_committed_chunks_on_failure(self):
+        lines = "".join(f"2024-01-02 09:{i % 60:02d};EUR/USD;Achat;1.1;{i + 1};1.2;2024-01-02 11:00;\n" for i in range(500))
+        data = ("date_debut;instrument;position;prix_entree;lot;prix_sortie;date_fin;tags\n" + lines).encode() + b"\xff\n"
+        committed, finalized = [], []
+        with self.assertRaises(UnicodeDecodeError):
+            import_in_chunks(parse_statement(open_statement(io.BytesIO(data))), 100,
+                             lambda rows: committed.append(len(rows)) or (len(rows), 0),
+                             lambda report, completed: finalized.append((report.inserted, completed)))
+        self.assertTrue(committed)
+        self.assertEqual(finalized, [(sum(committed), False)])
+
+        finalized.clear()
+        report = import_in_chunks(parse_statement(io.StringIO(MT4_STATEMENT)), 100, lambda rows: (0, 0),
+                                  lambda report, completed: finalized.append(completed))
+        self.assertEqual((report.inserted, report.duplicates, finalized), (0, 1, []))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import sqlite3
+import unittest
+from datetime import date
+from trade_pivot import pivot_trades, pivot_by, build_pivot_query
+
+class TestTradePivot(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.executescript("""
+            CREATE TABLE journals (id INTEGER PRIMARY KEY, user_id INTEGER);
+            CREATE TABLE trades (id INTEGER PRIMARY KEY, journal_id INTEGER, instrument TEXT, session TEXT,
+                                 time_frame TEXT, position TEXT, date_debut DATETIME, resultat FLOAT, statut TEXT);
+            CREATE TABLE tags (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+            CREATE TABLE trade_tags (trade_id INTEGER, tag_id INTEGER);
+            INSERT INTO journals VALUES (1, 10), (2, 10), (3, 99);
+            INSERT INTO trades VALUES
+                (1, 1, 'EUR/USD', 'London', 'H1', 'Achat', '2025-01-06 09:15:00.000000', 100, 'TERMINE'),
+                (2, 1, 'EUR/USD', 'London', 'H1', 'Vente', '2025-01-07 09:40:00.000000', -50, 'TERMINE'),
+                (3, 2, 'AAPL', 'New York', 'M15', 'Achat', '2025-02-03 15:00:00.000000', 30, 'TERMINE'),
+                (4, 2, 'AAPL', 'New York', 'M15', 'Achat', '2025-02-04 15:00:00.000000', NULL, 'EN_COURS'),
+                (5, 3, 'EUR/USD', 'London', 'H1', 'Achat', '2025-01-06 09:00:00.000000', 999, 'TERMINE');
+            INSERT INTO tags VALUES (1, 'Breakout'), (2, 'News');
+            INSERT INTO trade_tags VALUES (1, 1), (1, 2), (2, 1), (3, 2), (5, 1);
+        """)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_single_dimension_only_counts_user_trades(self):
+        by_instrument = pivot_by(pivot_trades(self.conn, ['instrument'], 10), 'instrument')
+        self.assertEqual(by_instrument['EUR/USD'], {'count': 2, 'total_result': 50, 'mean_result': 25, 'win_rate': 50})
+        self.assertEqual(by_instrument['AAPL']['count'], 1)
+
+    def test_combined_dimensions_and_filters(self):
+        rows = pivot_trades(self.conn, ['tag', 'weekday'], 10, date_from=date(2025, 1, 7))
+        self.assertEqual(
+            [(row['tag'], row['weekday'], row['count']) for row in rows],
+            [('Breakout', 'Mardi', 1), ('News', 'Lundi', 1)]
+        )
+        rows = pivot_trades(self.conn, ['hour'], 10, journal_id=2, closed_only=False)
+        self.assertEqual(rows, [{'hour': '15:00', 'count': 2, 'total_result': 30, 'mean_result': 15, 'win_rate': 50}])
+
+    def test_unknown_dimension(self):
+        with self.assertRaises(ValueError):
+            build_pivot_query(['instrument; DROP TABLE trades'], 10)
+
+if __name__ == '__main__':
+    unittest.main()
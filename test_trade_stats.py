@@ -0,0 +1,108 @@
+import random
+import sqlite3
+import unittest
+from datetime import datetime, timedelta
+from trade_stats import (split_tags, trade_contribution, aggregate_trades, aggregate_trades_sql,
+                         apply_contribution, build_dashboard_stats)
+
+ROWS = [
+    ("EUR/USD", "Breakout, News", datetime(2025, 1, 3, 9, 15), 120.0),
+    ("EUR/USD", "Breakout", datetime(2025, 1, 20, 14, 0), -40.0),
+    ("AAPL", None, datetime(2025, 2, 1, 9, 45), 60.5),
+    ("AAPL", "", datetime(2025, 2, 2, 16, 30), None),
+]
+
+class TestTradeStats(unittest.TestCase):
+    def test_split_tags(self):
+        self.assertEqual(split_tags(" Breakout, News ,,Breakout"), ["Breakout", "News"])
+        self.assertEqual(split_tags(None), [])
+
+    def test_aggregate_trades(self):
+        aggregate = aggregate_trades(ROWS)
+        self.assertEqual(aggregate['totals']['count'], 4)
+        self.assertEqual(aggregate['totals']['wins'], 2)
+        self.assertAlmostEqual(aggregate['totals']['total_profit'], 180.5)
+        self.assertAlmostEqual(aggregate['totals']['total_loss'], 40.0)
+        self.assertEqual(aggregate['buckets']['tag']['Breakout'], {'count': 2, 'wins': 1, 'total_result': 80.0})
+        self.assertEqual(aggregate['buckets']['hour']['09:00']['count'], 2)
+
+    def test_incremental_matches_full_aggregate(self):
+        # Création, modification puis suppression appliquées incrémentalement
+        aggregate = aggregate_trades(ROWS[:2])
+        apply_contribution(aggregate, trade_contribution(*ROWS[2]))
+        apply_contribution(aggregate, trade_contribution(*ROWS[3]))
+        apply_contribution(aggregate, trade_contribution(*ROWS[1]), sign=-1)
+        edited = ("EUR/USD", "Breakout", datetime(2025, 1, 20, 14, 0), 15.0)
+        apply_contribution(aggregate, trade_contribution(*edited))
+        expected = aggregate_trades([ROWS[0], ROWS[2], ROWS[3], edited])
+        self.assertEqual(aggregate['totals'], expected['totals'])
+        self.assertEqual(aggregate['buckets'], expected['buckets'])
+
+    def test_build_dashboard_stats(self):
+        data = build_dashboard_stats(1000, aggregate_trades(ROWS))
+        self.assertEqual(data['stats']['mois'], ['2025-01', '2025-02'])
+        self.assertEqual(data['stats']['trades_count'], [2, 2])
+        self.assertAlmostEqual(data['stats']['solde'], 1140.5)
+        self.assertEqual(data['stats']['win_rate'], 50.0)
+        self.assertEqual(data['trades_by_symbol']['EUR/USD']['win_rate'], 50.0)
+        self.assertNotIn('win_rate', data['trades_by_hour']['09:00'])
+
+
+def generate_journal(conn, journal_id, n_trades, seed=42):
+    """Insère un journal aléatoire (dates au format stocké par SQLAlchemy) et retourne ses lignes."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n_trades):
+        date_debut = datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 600000))
+        resultat = rng.choice([None, round(rng.uniform(-250, 300), 2), 0.0])
+        tags = rng.choice([None, '', 'Breakout', 'Breakout, News', ' Reversal ,News', 'Scalp,Scalp'])
+        instrument = rng.choice(['EUR/USD', 'USD/JPY', 'AAPL', 'DAX', 'Or'])
+        trade_id = conn.execute(
+            'INSERT INTO trades (journal_id, instrument, tags, date_debut, resultat) VALUES (?, ?, ?, ?, ?)',
+            (journal_id, instrument, tags, date_debut.strftime('%Y-%m-%d %H:%M:%S.%f'), resultat)
+        ).lastrowid
+        for tag in split_tags(tags):
+            conn.execute('INSERT OR IGNORE INTO tags (name) VALUES (?)', (tag,))
+            conn.execute('INSERT INTO trade_tags (trade_id, tag_id) SELECT ?, id FROM tags WHERE name = ?', (trade_id, tag))
+        rows.append((instrument, tags, date_debut, resultat))
+    return rows
+
+class TestSqlBackendParity(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.executescript(
+            'CREATE TABLE trades (id INTEGER PRIMARY KEY, journal_id INTEGER, instrument VARCHAR(50), '
+            'tags VARCHAR(200), date_debut DATETIME, resultat FLOAT);'
+            'CREATE TABLE tags (id INTEGER PRIMARY KEY, name VARCHAR(100) UNIQUE);'
+            'CREATE TABLE trade_tags (trade_id INTEGER, tag_id INTEGER, PRIMARY KEY (trade_id, tag_id));'
+        )
+
+    def tearDown(self):
+        self.conn.close()
+
+    def assertAggregatesEqual(self, first, second):
+        self.assertEqual(first['totals'].keys(), second['totals'].keys())
+        for key in first['totals']:
+            self.assertAlmostEqual(first['totals'][key], second['totals'][key], places=6)
+        for dimension in first['buckets']:
+            self.assertEqual(set(first['buckets'][dimension]), set(second['buckets'][dimension]), dimension)
+            for key, bucket in first['buckets'][dimension].items():
+                other = second['buckets'][dimension][key]
+                self.assertEqual(bucket['count'], other['count'])
+                self.assertEqual(bucket['wins'], other['wins'])
+                self.assertAlmostEqual(bucket['total_result'], other['total_result'], places=6)
+
+    def test_generated_journal(self):
+        rows = generate_journal(self.conn, 1, 2000)
+        generate_journal(self.conn, 2, 300, seed=7)  # Un autre journal ne doit pas être compté
+        self.assertAggregatesEqual(aggregate_trades(rows), aggregate_trades_sql(self.conn, 1))
+        self.assertEqual(
+            build_dashboard_stats(1000, aggregate_trades(rows))['stats']['mois'],
+            build_dashboard_stats(1000, aggregate_trades_sql(self.conn, 1))['stats']['mois']
+        )
+
+    def test_empty_journal(self):
+        self.assertAggregatesEqual(aggregate_trades([]), aggregate_trades_sql(self.conn, 3))
+
+if __name__ == '__main__':
+    unittest.main()
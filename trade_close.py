@@ -0,0 +1,70 @@
+import math
+
+from trade_stats import trade_contribution
+
+
+def close_errors(trades: dict, closes) -> list[str]:
+    """
+    Motifs de refus d'une clôture groupée, tous relevés en une passe (rien n'est clôturé s'il y en a un).
+
+    Args:
+        trades: Trades ouverts ou non du journal, par identifiant (un trade d'un autre journal en est absent)
+        closes: Liste de (identifiant du trade, prix de sortie, date de clôture)
+
+    Returns:
+        list: Motifs de refus, vide si la clôture est valide
+    """
+    trade_ids = [trade_id for trade_id, _, _ in closes]
+    if len(set(trade_ids)) != len(trade_ids):
+        return ["un même trade figure plusieurs fois dans la clôture"]
+    errors = []
+    for trade_id, prix_sortie, date_fin in closes:
+        trade = trades.get(trade_id)
+        if trade is None:
+            errors.append(f"trade {trade_id} introuvable")
+        elif trade.prix_sortie is not None or trade.statut == "TERMINE":
+            errors.append(f"trade {trade_id} déjà clôturé")
+        elif not isinstance(prix_sortie, (int, float)) or not math.isfinite(prix_sortie) or prix_sortie <= 0:
+            errors.append(f"trade {trade_id} : prix de sortie invalide")
+        elif date_fin.tzinfo is not None:
+            errors.append(f"trade {trade_id} : date de clôture avec fuseau horaire")
+        elif trade.date_debut is not None and date_fin < trade.date_debut:
+            errors.append(f"trade {trade_id} clôturé avant son ouverture")
+    return errors
+
+
+def close_positions(trades: dict, closes, price, record) -> list:
+    """
+    Clôture plusieurs positions d'un journal, tout ou rien.
+
+    Args:
+        trades: Trades du journal par identifiant (voir close_errors)
+        closes: Liste de (identifiant du trade, prix de sortie, date de clôture)
+        price: Fonction (trades clôturés, closes) -> (résultats, pourcentages), valorisation du lot en une passe
+        record: Fonction appelée une seule fois avec les (contribution avant, contribution après) de tout le lot,
+                qui met à jour les statistiques et la version des données du journal
+
+    Returns:
+        list: Trades clôturés, dans l'ordre de closes
+
+    Raises:
+        ValueError: Si une clôture est invalide (voir close_errors) ; aucun trade n'est alors modifié
+    """
+    errors = close_errors(trades, closes)
+    if errors:
+        raise ValueError("Clôture impossible : " + ", ".join(errors) + ".")
+    if not closes:
+        return []
+    closed = [trades[trade_id] for trade_id, _, _ in closes]
+    resultats, pourcentages = price(closed, closes)
+    changes = []
+    for trade, (_, prix_sortie, date_fin), resultat, pourcentage in zip(closed, closes, resultats, pourcentages):
+        before = trade_contribution(trade.instrument, trade.tags, trade.date_debut, trade.resultat)
+        trade.prix_sortie = prix_sortie
+        trade.date_fin = date_fin
+        trade.resultat = float(resultat)
+        trade.pourcentage = float(pourcentage)
+        trade.statut = "TERMINE"
+        changes.append((before, trade_contribution(trade.instrument, trade.tags, trade.date_debut, trade.resultat)))
+    record(changes)
+    return closed
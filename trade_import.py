@@ -0,0 +1,321 @@
+import csv
+import hashlib
+import io
+import re
+import time
+from datetime import datetime
+from itertools import islice
+
+IMPORT_FORMATS = ('csv', 'mt4', 'mt5')
+
+# Colonnes du format "csv" natif : obligatoires, puis textes facultatifs
+# (date_fin et prix_sortie sont également lues ; les autres colonnes sont ignorées)
+CSV_REQUIRED_COLUMNS = ('date_debut', 'instrument', 'position', 'prix_entree', 'lot')
+CSV_TEXT_COLUMNS = ('session', 'time_frame', 'risk_reward', 'tags', 'commentaires')
+
+# En-têtes des exports d'historique MetaTrader : les colonnes Time/Price apparaissent deux fois
+# (ouverture puis clôture), les champs sont donc lus par position
+MT4_HEADER = ('Ticket', 'Open Time', 'Type', 'Size', 'Item', 'Price', 'S / L', 'T / P', 'Close Time', 'Price')
+MT5_HEADER = ('Time', 'Position', 'Symbol', 'Type', 'Volume', 'Price', 'S / L', 'T / P', 'Time', 'Price')
+MT_POSITIONS = {
+    'mt4': {'date_debut': 1, 'type': 2, 'lot': 3, 'instrument': 4, 'prix_entree': 5, 'date_fin': 8, 'prix_sortie': 9},
+    'mt5': {'date_debut': 0, 'instrument': 2, 'type': 3, 'lot': 4, 'prix_entree': 5, 'date_fin': 8, 'prix_sortie': 9},
+}
+MT_POSITION_TYPES = {'buy': 'achat', 'sell': 'vente'}
+
+DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M',
+                '%Y.%m.%d %H:%M:%S', '%Y.%m.%d %H:%M', '%Y-%m-%d')
+
+# Sessions de marché selon l'heure d'ouverture (UTC), pour les relevés qui ne la précisent pas
+SESSION_HOURS = ((0, 'Tokyo'), (7, 'Londres'), (13, 'New York'), (22, 'Sydney'))
+
+
+class StatementFormatError(ValueError):
+    """Relevé illisible : format non reconnu ou colonnes obligatoires absentes."""
+
+
+class ImportReport:
+    """Bilan d'un import : lignes lues, insérées, doublons, rejets et débit."""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.closed = 0  # Positions importées ouvertes, clôturées par un relevé ultérieur
+        self.duplicates = 0
+        self.rejected = []  # (numéro de ligne, motif)
+        self.earliest_close = None  # Première clôture lue (recalcul des classements à partir de ce jour)
+        self.latest_trade_at = None  # Date la plus récente lue (point de synchronisation des liens)
+        self.started_at = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started_at
+        return self
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.inserted} trade(s) importé(s), {self.closed} position(s) clôturée(s), "
+                f"{self.duplicates} doublon(s) ignoré(s), "
+                f"{len(self.rejected)} ligne(s) rejetée(s) en {self.elapsed:.2f} s "
+                f"({self.rows_per_second:.0f} lignes/s).")
+
+
+def open_statement(binary_stream) -> io.TextIOBase:
+    """
+    Ouvre un relevé binaire en flux texte, sans le charger en mémoire.
+
+    Les exports MetaTrader sont souvent en UTF-16 : l'encodage est déduit de l'indicateur d'ordre des octets.
+    """
+    buffered = binary_stream if hasattr(binary_stream, 'peek') else io.BufferedReader(binary_stream)
+    head = buffered.peek(2)[:2]
+    encoding = 'utf-16' if head in (b'\xff\xfe', b'\xfe\xff') else 'utf-8-sig'
+    return io.TextIOWrapper(buffered, encoding=encoding, newline='')
+
+
+def detect_format(header: list[str]) -> str:
+    """
+    Reconnaît le format d'un relevé à son en-tête.
+
+    Raises:
+        StatementFormatError: Si l'en-tête ne correspond à aucun format connu
+    """
+    names = tuple(name.strip() for name in header)
+    if names[:len(MT4_HEADER)] == MT4_HEADER:
+        return 'mt4'
+    if names[:len(MT5_HEADER)] == MT5_HEADER:
+        return 'mt5'
+    if all(column in names for column in CSV_REQUIRED_COLUMNS):
+        return 'csv'
+    raise StatementFormatError("Format de relevé non reconnu (CSV natif, MT4 ou MT5 attendu).")
+
+
+def parse_date(value: str) -> datetime | None:
+    """Lit une date de relevé ; une valeur vide donne None."""
+    value = (value or '').strip()
+    if not value:
+        return None
+    # Chemin rapide : dates ISO, et dates MetaTrader "2024.01.15 10:23" une fois les points remplacés
+    try:
+        return datetime.fromisoformat(value[:10].replace('.', '-') + value[10:] if value[4:5] == '.' else value)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"date invalide : {value}")
+
+
+def parse_number(value: str) -> float | None:
+    """Lit un nombre de relevé (virgule décimale et espaces tolérés) ; une valeur vide donne None."""
+    value = (value or '').strip().replace(' ', '').replace(',', '.')
+    return float(value) if value else None
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Clé de rapprochement d'un symbole : "eurusd.m", "EUR/USD" et "EURUSD" donnent "EURUSD"."""
+    symbol = symbol.strip().upper().split('.')[0]
+    return re.sub(r'[^A-Z0-9]', '', symbol)
+
+
+def market_session(date_debut: datetime) -> str:
+    """Session de marché correspondant à l'heure d'ouverture d'un trade."""
+    current = SESSION_HOURS[0][1]
+    for hour, name in SESSION_HOURS:
+        if date_debut.hour >= hour:
+            current = name
+    return current
+
+
+def _csv_row(values: dict) -> dict:
+    row = {
+        'date_debut': parse_date(values['date_debut']),
+        'date_fin': parse_date(values.get('date_fin')),
+        'instrument': values['instrument'].strip(),
+        'position': values['position'].strip().lower(),
+        'prix_entree': parse_number(values['prix_entree']),
+        'prix_sortie': parse_number(values.get('prix_sortie')),
+        'lot': parse_number(values['lot']),
+    }
+    for column in CSV_TEXT_COLUMNS:
+        row[column] = (values.get(column) or '').strip() or None
+    if row['position'] not in ('achat', 'vente'):
+        raise ValueError(f"position invalide : {values['position']}")
+    return row
+
+
+def _mt_row(fields: list[str], positions: dict) -> dict | None:
+    position = MT_POSITION_TYPES.get(fields[positions['type']].strip().lower())
+    if position is None:
+        return None  # Ordre en attente, dépôt, retrait... : pas un trade
+    return {
+        'date_debut': parse_date(fields[positions['date_debut']]),
+        'date_fin': parse_date(fields[positions['date_fin']]),
+        'instrument': fields[positions['instrument']].strip(),
+        'position': position,
+        'prix_entree': parse_number(fields[positions['prix_entree']]),
+        'prix_sortie': parse_number(fields[positions['prix_sortie']]),
+        'lot': parse_number(fields[positions['lot']]),
+        **dict.fromkeys(CSV_TEXT_COLUMNS),
+    }
+
+
+def parse_statement(text_stream, fmt: str | None = None):
+    """
+    Lit un relevé ligne par ligne.
+
+    Args:
+        text_stream: Flux texte (voir open_statement)
+        fmt: Format imposé (IMPORT_FORMATS), détecté sur l'en-tête si None
+
+    Yields:
+        tuple: (numéro de ligne, trade normalisé ou None, motif de rejet ou None) ;
+               les lignes qui ne sont pas des trades (ordres, dépôts) ne sont pas produites
+
+    Raises:
+        StatementFormatError: Si le relevé est vide ou son format non reconnu
+    """
+    sample = text_stream.readline()
+    if not sample.strip():
+        raise StatementFormatError("Le relevé est vide.")
+    delimiter = '\t' if sample.count('\t') > sample.count(',') else (';' if sample.count(';') > sample.count(',') else ',')
+    header = next(csv.reader([sample], delimiter=delimiter))
+    fmt = fmt or detect_format(header)
+    if fmt not in IMPORT_FORMATS:
+        raise StatementFormatError(f"Format inconnu : {fmt}")
+    if fmt == 'csv':
+        missing = [column for column in CSV_REQUIRED_COLUMNS if column not in header]
+        if missing:
+            raise StatementFormatError(f"Colonnes manquantes : {', '.join(missing)}")
+        columns = [name.strip() for name in header]
+
+    for line_number, fields in enumerate(csv.reader(text_stream, delimiter=delimiter), start=2):
+        if not any(field.strip() for field in fields):
+            continue
+        try:
+            if fmt == 'csv':
+                row = _csv_row(dict(zip(columns, fields)))
+            else:
+                if len(fields) < len(MT4_HEADER):
+                    continue  # Lignes de synthèse en fin de relevé
+                row = _mt_row(fields, MT_POSITIONS[fmt])
+                if row is None:
+                    continue
+        except (KeyError, ValueError) as e:
+            yield line_number, None, str(e)
+            continue
+        if row['date_debut'] is None or row['prix_entree'] is None or row['lot'] is None or not row['instrument']:
+            yield line_number, None, "champ obligatoire manquant"
+            continue
+        yield line_number, row, None
+
+
+def trade_hash(row: dict) -> str:
+    """
+    Empreinte d'un trade importé, calculée sur son ouverture uniquement (instrument, sens, date, prix, lot) :
+    une position relevée ouverte puis clôturée garde la même empreinte.
+    """
+    parts = [
+        normalize_symbol(row['instrument']), row['position'],
+        row['date_debut'].isoformat(), repr(row['prix_entree']), repr(row['lot']),
+    ]
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+# Insertion d'un trade importé ; un trade de même empreinte dans le journal est écarté par l'index unique
+SQL_INSERT_IMPORTED_TRADE = """
+    INSERT OR IGNORE INTO trades (
+        journal_id, date_debut, date_fin, session, instrument, position, prix_entree, prix_sortie, lot,
+        risk_reward, time_frame, commentaires, resultat, pourcentage, statut, tags, date_enregistrement, import_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Clôture d'une position importée encore ouverte par la ligne clôturée d'un relevé ultérieur
+SQL_CLOSE_IMPORTED_TRADE = """
+    UPDATE trades SET date_fin = ?, prix_sortie = ?, resultat = ?, pourcentage = ?, statut = 'TERMINE'
+    WHERE journal_id = ? AND import_hash = ? AND prix_sortie IS NULL
+"""
+
+
+def write_imported_trades(conn, inserts, closes) -> tuple[int, int]:
+    """
+    Écrit un lot de trades importés sur une connexion sqlite3, dans la transaction de l'appelant.
+
+    Args:
+        inserts: Paramètres de SQL_INSERT_IMPORTED_TRADE, un tuple par trade
+        closes: Paramètres de SQL_CLOSE_IMPORTED_TRADE, un tuple par trade clôturé du lot
+                (un trade inséré par le même lot est déjà clôturé et n'est pas modifié)
+
+    Returns:
+        tuple: (trades insérés, positions ouvertes clôturées)
+    """
+    changes = conn.total_changes
+    conn.executemany(SQL_INSERT_IMPORTED_TRADE, inserts)
+    inserted = conn.total_changes - changes
+    changes = conn.total_changes
+    if closes:
+        conn.executemany(SQL_CLOSE_IMPORTED_TRADE, closes)
+    return inserted, conn.total_changes - changes
+
+
+def chunked(iterable, size: int):
+    """Découpe un itérable en listes de size éléments au plus, sans le matérialiser."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_in_chunks(parsed, chunk_size: int, insert_chunk, finalize) -> ImportReport:
+    """
+    Importe des lignes de relevé (voir parse_statement) par lots validés un à un.
+
+    Un lot validé reste en base si la lecture échoue plus loin dans le relevé : finalize, qui met à jour
+    ce qui dépend des trades du journal (numérotation, statistiques, version des données), est donc appelé
+    dès qu'au moins un trade a été inséré ou clôturé, avant que l'erreur éventuelle ne soit propagée.
+
+    Args:
+        parsed: Lignes (numéro, trade normalisé, motif de rejet)
+        chunk_size: Nombre de lignes par lot
+        insert_chunk: Fonction (trades valides du lot) -> (trades insérés, positions ouvertes clôturées),
+                      dans sa propre transaction (voir write_imported_trades)
+        finalize: Fonction (bilan, relevé lu en entier) appelée après le dernier lot validé
+
+    Returns:
+        ImportReport: Bilan de l'import ; les dates de clôture et de trade ne portent que sur les lots validés
+    """
+    report = ImportReport()
+    completed = False
+    try:
+        for chunk in chunked(parsed, chunk_size):
+            rows = []
+            for line_number, row, error in chunk:
+                report.rows += 1
+                if error:
+                    report.rejected.append((line_number, error))
+                else:
+                    rows.append(row)
+            if not rows:
+                continue
+            inserted, closed = insert_chunk(rows)
+            report.inserted += inserted
+            report.closed += closed
+            report.duplicates += len(rows) - inserted - closed
+            for row in rows:
+                closed = row['date_fin'] is not None and row['prix_sortie'] is not None
+                if closed and (report.earliest_close is None or row['date_fin'] < report.earliest_close):
+                    report.earliest_close = row['date_fin']
+                latest = row['date_fin'] or row['date_debut']
+                if report.latest_trade_at is None or latest > report.latest_trade_at:
+                    report.latest_trade_at = latest
+        completed = True
+    finally:
+        if report.inserted or report.closed:
+            finalize(report, completed)
+    return report.finish()
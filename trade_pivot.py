@@ -0,0 +1,114 @@
+from datetime import date, datetime, time
+
+# Dimensions de regroupement autorisées et leur expression SQL
+PIVOT_DIMENSIONS = {
+    'instrument': "trades.instrument",
+    'tag': "tags.name",
+    'hour': "strftime('%H', trades.date_debut) || ':00'",
+    'weekday': "CAST(strftime('%w', trades.date_debut) AS INTEGER)",
+    'session': "trades.session",
+    'time_frame': "trades.time_frame",
+    'position': "trades.position",
+}
+
+# strftime('%w') : 0 = dimanche
+WEEKDAYS = ['Dimanche', 'Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi']
+
+
+def build_pivot_query(dimensions, user_id: int, journal_id: int | None = None,
+                      date_from: date | None = None, date_to: date | None = None,
+                      closed_only: bool = True) -> tuple[str, list]:
+    """
+    Construit la requête GROUP BY d'un tableau croisé sur les trades d'un utilisateur.
+
+    Args:
+        dimensions: Combinaison de clés de PIVOT_DIMENSIONS (exemple : ['instrument', 'hour'])
+        user_id: Propriétaire des journaux analysés
+        journal_id: Restreint l'analyse à un journal
+        date_from: Premier jour inclus (sur date_debut)
+        date_to: Dernier jour inclus (sur date_debut)
+        closed_only: N'analyse que les trades terminés
+
+    Returns:
+        tuple[str, list]: Requête SQL et paramètres
+
+    Raises:
+        ValueError: Si une dimension est inconnue ou répétée
+    """
+    dimensions = list(dimensions)
+    unknown = [d for d in dimensions if d not in PIVOT_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Dimension(s) inconnue(s) : {', '.join(unknown)}")
+    if len(set(dimensions)) != len(dimensions):
+        raise ValueError("Chaque dimension ne peut apparaître qu'une fois.")
+
+    select = [f"{PIVOT_DIMENSIONS[d]} AS {d}" for d in dimensions]
+    select += [
+        "COUNT(*) AS count",
+        "COALESCE(SUM(trades.resultat), 0) AS total_result",
+        "COALESCE(SUM(CASE WHEN trades.resultat > 0 THEN 1 ELSE 0 END), 0) AS wins",
+    ]
+    sql = [f"SELECT {', '.join(select)} FROM trades JOIN journals ON journals.id = trades.journal_id"]
+    if 'tag' in dimensions:
+        sql.append("JOIN trade_tags ON trade_tags.trade_id = trades.id JOIN tags ON tags.id = trade_tags.tag_id")
+
+    where = ["journals.user_id = ?"]
+    params = [user_id]
+    if journal_id is not None:
+        where.append("trades.journal_id = ?")
+        params.append(journal_id)
+    if date_from is not None:
+        where.append("trades.date_debut >= ?")
+        params.append(datetime.combine(date_from, time.min).strftime('%Y-%m-%d %H:%M:%S.%f'))
+    if date_to is not None:
+        where.append("trades.date_debut <= ?")
+        params.append(datetime.combine(date_to, time.max).strftime('%Y-%m-%d %H:%M:%S.%f'))
+    if closed_only:
+        where.append("trades.statut = 'TERMINE'")
+    sql.append("WHERE " + " AND ".join(where))
+
+    if dimensions:
+        sql.append("GROUP BY " + ", ".join(dimensions))
+        sql.append("ORDER BY " + ", ".join(dimensions))
+    return "\n".join(sql), params
+
+
+def pivot_trades(conn, dimensions, user_id: int, **filters) -> list[dict]:
+    """
+    Regroupe les trades selon une combinaison de dimensions en une seule requête.
+
+    Args:
+        conn: Connexion sqlite3 (voir get_db_connection)
+        dimensions: Combinaison de clés de PIVOT_DIMENSIONS
+        user_id: Propriétaire des journaux analysés
+        **filters: journal_id, date_from, date_to, closed_only (voir build_pivot_query)
+
+    Returns:
+        list[dict]: Une ligne par groupe avec les dimensions, count, total_result, mean_result et win_rate
+    """
+    dimensions = list(dimensions)
+    sql, params = build_pivot_query(dimensions, user_id, **filters)
+    rows = []
+    for values in conn.execute(sql, params):
+        row = dict(zip(dimensions, values))
+        count, total_result, wins = values[len(dimensions):]
+        if not count:
+            continue
+        if 'weekday' in row and row['weekday'] is not None:
+            row['weekday'] = WEEKDAYS[row['weekday']]
+        row.update({
+            'count': count,
+            'total_result': round(total_result, 2),
+            'mean_result': round(total_result / count, 2),
+            'win_rate': round(wins / count * 100, 2),
+        })
+        rows.append(row)
+    return rows
+
+
+def pivot_by(rows: list[dict], dimension: str) -> dict:
+    """Indexe le résultat d'un tableau à une dimension par la valeur de cette dimension."""
+    return {
+        row[dimension]: {k: v for k, v in row.items() if k != dimension}
+        for row in rows
+    }
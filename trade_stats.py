@@ -0,0 +1,203 @@
+from datetime import datetime
+
+# Dimensions des sous-agrégats d'un journal
+STATS_DIMENSIONS = ('month', 'symbol', 'hour', 'tag')
+
+
+def split_tags(tags: str | None) -> list[str]:
+    """
+    Découpe la chaîne de tags d'un trade ("Breakout, News") en liste sans doublons.
+
+    Returns:
+        list[str]: Tags nettoyés, dans l'ordre de saisie
+    """
+    result = []
+    for tag in (tags or '').split(','):
+        tag = tag.strip()
+        if tag and tag not in result:
+            result.append(tag)
+    return result
+
+
+def trade_buckets(instrument: str, tags: str | None, date_debut: datetime | None) -> list[tuple[str, str]]:
+    """
+    Liste les sous-agrégats (dimension, clé) auxquels un trade contribue.
+
+    Returns:
+        list[tuple[str, str]]: Par exemple [('symbol', 'EUR/USD'), ('hour', '09:00'), ('month', '2025-01'), ('tag', 'News')]
+    """
+    buckets = [('symbol', instrument)]
+    if date_debut:
+        buckets.append(('hour', date_debut.strftime('%H:00')))
+        buckets.append(('month', date_debut.strftime('%Y-%m')))
+    buckets.extend(('tag', tag) for tag in split_tags(tags))
+    return buckets
+
+
+def trade_contribution(instrument: str, tags: str | None, date_debut: datetime | None,
+                       resultat: float | None) -> dict:
+    """Contribution d'un trade aux agrégats de son journal."""
+    result = resultat or 0
+    return {
+        'result': result,
+        'win': result > 0,
+        'buckets': trade_buckets(instrument, tags, date_debut),
+    }
+
+
+def empty_aggregate() -> dict:
+    """Agrégat vide : totaux du journal et sous-agrégats par dimension."""
+    return {
+        'totals': {'count': 0, 'wins': 0, 'total_result': 0.0, 'total_profit': 0.0, 'total_loss': 0.0},
+        'buckets': {dimension: {} for dimension in STATS_DIMENSIONS},
+    }
+
+
+def apply_contribution(aggregate: dict, contribution: dict, sign: int = 1) -> dict:
+    """
+    Ajoute (sign=1) ou retire (sign=-1) la contribution d'un trade d'un agrégat.
+
+    Les sous-agrégats qui ne contiennent plus aucun trade sont supprimés.
+    """
+    result = contribution['result']
+    totals = aggregate['totals']
+    totals['count'] += sign
+    totals['wins'] += sign if contribution['win'] else 0
+    totals['total_result'] += sign * result
+    if result > 0:
+        totals['total_profit'] += sign * result
+    elif result < 0:
+        totals['total_loss'] += sign * -result
+
+    for dimension, key in contribution['buckets']:
+        bucket = aggregate['buckets'][dimension].setdefault(key, {'count': 0, 'wins': 0, 'total_result': 0.0})
+        bucket['count'] += sign
+        bucket['wins'] += sign if contribution['win'] else 0
+        bucket['total_result'] += sign * result
+        if bucket['count'] <= 0:
+            del aggregate['buckets'][dimension][key]
+    return aggregate
+
+
+def aggregate_trades(rows) -> dict:
+    """
+    Agrège en une seule passe des lignes (instrument, tags, date_debut, resultat).
+
+    Returns:
+        dict: Agrégat au format de empty_aggregate()
+    """
+    aggregate = empty_aggregate()
+    for instrument, tags, date_debut, resultat in rows:
+        apply_contribution(aggregate, trade_contribution(instrument, tags, date_debut, resultat))
+    return aggregate
+
+
+def _win_rate(wins: int, count: int) -> float:
+    return (wins / count) * 100 if count > 0 else 0
+
+
+def build_dashboard_stats(capital_initial: float, aggregate: dict) -> dict:
+    """
+    Met en forme un agrégat pour le template du dashboard.
+
+    Returns:
+        dict: Clés 'stats', 'trades_by_symbol', 'trades_by_tag' et 'trades_by_hour'
+    """
+    totals = aggregate['totals']
+    buckets = aggregate['buckets']
+
+    def breakdown(dimension, with_win_rate=True):
+        data = {}
+        for key in sorted(buckets[dimension]):
+            bucket = buckets[dimension][key]
+            data[key] = {'count': bucket['count'], 'total_result': bucket['total_result']}
+            if with_win_rate:
+                data[key]['win_rate'] = _win_rate(bucket['wins'], bucket['count'])
+        return data
+
+    mois = sorted(buckets['month'])
+    stats = {
+        'solde': capital_initial + totals['total_result'],
+        'mois': mois,
+        'gains_per_month': [buckets['month'][month]['total_result'] for month in mois],
+        'trades_count': [buckets['month'][month]['count'] for month in mois],
+        'total_profit': round(totals['total_profit'], 2),
+        'total_loss': round(totals['total_loss'], 2),
+        'win_rate': round(_win_rate(totals['wins'], totals['count']), 2),
+    }
+    return {
+        'stats': stats,
+        'trades_by_symbol': breakdown('symbol'),
+        'trades_by_tag': breakdown('tag'),
+        'trades_by_hour': breakdown('hour', with_win_rate=False),
+    }
+
+
+# Requêtes du backend "sql" : seules les petites tables de résultats remontent de SQLite
+_SQL_TOTALS = """
+    SELECT COUNT(*),
+           COALESCE(SUM(CASE WHEN resultat > 0 THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(resultat), 0),
+           COALESCE(SUM(CASE WHEN resultat > 0 THEN resultat ELSE 0 END), 0),
+           COALESCE(SUM(CASE WHEN resultat < 0 THEN -resultat ELSE 0 END), 0)
+    FROM trades WHERE journal_id = ?
+"""
+
+_SQL_GROUPED = """
+    SELECT {key} AS bucket,
+           COUNT(*),
+           COALESCE(SUM(CASE WHEN resultat > 0 THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(resultat), 0)
+    FROM trades WHERE journal_id = ? AND {key} IS NOT NULL
+    GROUP BY bucket
+"""
+
+_SQL_DIMENSION_KEYS = {
+    'symbol': "instrument",
+    'hour': "strftime('%H', date_debut) || ':00'",
+    'month': "strftime('%Y-%m', date_debut)",
+}
+
+_SQL_TAGS = """
+    SELECT tags.name,
+           COUNT(*),
+           COALESCE(SUM(CASE WHEN trades.resultat > 0 THEN 1 ELSE 0 END), 0),
+           COALESCE(SUM(trades.resultat), 0)
+    FROM trades
+    JOIN trade_tags ON trade_tags.trade_id = trades.id
+    JOIN tags ON tags.id = trade_tags.tag_id
+    WHERE trades.journal_id = ?
+    GROUP BY tags.name
+"""
+
+
+def aggregate_trades_sql(conn, journal_id: int) -> dict:
+    """
+    Backend "sql" : calcule l'agrégat d'un journal avec des GROUP BY SQLite.
+
+    Args:
+        conn: Connexion sqlite3 (voir get_db_connection)
+        journal_id: Identifiant du journal
+
+    Returns:
+        dict: Agrégat au format de empty_aggregate(), identique à aggregate_trades()
+    """
+    aggregate = empty_aggregate()
+    count, wins, total_result, total_profit, total_loss = conn.execute(_SQL_TOTALS, (journal_id,)).fetchone()
+    aggregate['totals'].update({
+        'count': count,
+        'wins': wins,
+        'total_result': total_result,
+        'total_profit': total_profit,
+        'total_loss': total_loss,
+    })
+
+    for dimension, key in _SQL_DIMENSION_KEYS.items():
+        for bucket, bucket_count, bucket_wins, bucket_result in conn.execute(_SQL_GROUPED.format(key=key), (journal_id,)):
+            aggregate['buckets'][dimension][bucket] = {
+                'count': bucket_count, 'wins': bucket_wins, 'total_result': bucket_result,
+            }
+
+    for tag, tag_count, tag_wins, tag_result in conn.execute(_SQL_TAGS, (journal_id,)):
+        aggregate['buckets']['tag'][tag] = {'count': tag_count, 'wins': tag_wins, 'total_result': tag_result}
+    return aggregate